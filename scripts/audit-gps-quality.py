@@ -11,38 +11,12 @@ Checks:
 """
 
 import json
-import math
 import os
+import sys
 from pathlib import Path
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two GPS points in miles"""
-    R = 3959  # Earth radius in miles
-
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
-
-def calculate_path_distance(path):
-    """Calculate total distance of GPS path"""
-    if len(path) < 2:
-        return 0
-
-    total = 0
-    for i in range(1, len(path)):
-        total += haversine_distance(
-            path[i-1][0], path[i-1][1],
-            path[i][0], path[i][1]
-        )
-    return total
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import geodesy  # noqa: E402
 
 def audit_route(trail):
     """Score one route's GPS quality. Returns {score, issues, warnings, stats}."""
@@ -67,7 +41,7 @@ def audit_route(trail):
     stats = trail.get('stats', {})
     trail_distance = stats.get('distance', 0)
     if trail_distance == 0:
-        trail_distance = calculate_path_distance(path)
+        trail_distance = geodesy.path_length_mi(path)
         rr['warnings'].append(f'No distance in stats, calculated: {trail_distance:.1f} mi')
 
     if trail_distance > 0:
@@ -87,7 +61,10 @@ def audit_route(trail):
         rr['issues'].append(f'Very low GPS density: {points_per_mile:.1f} pts/mi (need 15+)')
         rr['score'] -= 40
 
-    has_elevation = all(len(p) >= 3 for p in path)
+    if isinstance(path, geodesy.PathArray):
+        has_elevation = path.is_3d
+    else:
+        has_elevation = all(len(p) >= 3 for p in path)
     if not has_elevation:
         rr['issues'].append('Missing elevation data in path')
         rr['score'] -= 30
@@ -105,9 +82,8 @@ def audit_route(trail):
         rr['score'] -= 5
 
     if num_points >= 3:
-        straight_distance = haversine_distance(path[0][0], path[0][1],
-                                               path[-1][0], path[-1][1])
-        actual_distance = calculate_path_distance(path)
+        straight_distance = geodesy.haversine_mi(path[0], path[-1])
+        actual_distance = geodesy.path_length_mi(path)
         if actual_distance > 0:
             straightness = straight_distance / actual_distance
             if straightness > 0.9:
@@ -126,12 +102,9 @@ def audit_route(trail):
     return rr
 
 
-def audit_trail(file_path):
-    """Audit a single trail file"""
+def audit_record(data, file_path):
+    """Audit an already-parsed trail record (file_path is for the report)"""
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
         trail_name = data.get('name', 'Unknown')
         state = data.get('state', 'Unknown')
 
@@ -181,6 +154,20 @@ def audit_trail(file_path):
 
         return results
 
+    except Exception as e:
+        return {
+            'name': 'Error',
+            'file': os.path.basename(file_path),
+            'issues': [f'Error: {str(e)}'],
+            'quality_score': 0
+        }
+
+
+def audit_trail(file_path):
+    """Audit a single trail file"""
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
     except json.JSONDecodeError:
         return {
             'name': 'Parse Error',
@@ -195,6 +182,7 @@ def audit_trail(file_path):
             'issues': [f'Error: {str(e)}'],
             'quality_score': 0
         }
+    return audit_record(data, file_path)
 
 def audit_all_trails(data_dir='/home/user/hiking/website/src/data'):
     """Audit all trail files"""
@@ -2,30 +2,47 @@
 """
 Batch-build every state with the fully automated pipeline.
 
-Runs scripts/auto-state.py for each state in pipeline.config.json using its
-per-state import tuning. Queued execution (default 1 worker, max 3) with pauses
-between states — Overpass and the government ArcGIS services rate-limit, so
-this is deliberately not 50-way parallel.
+Runs the auto-state.py build for each state in pipeline.config.json using
+its per-state import tuning — not as one opaque process per state, but as
+its stages (auto-state.stages(): import, prune, fetch-trails,
+enrich-elevation, enrich-poi, run-pipeline, publish), scheduled as a work
+queue:
 
-Resumable: progress is tracked in pipeline-reports/auto-all-progress.json.
+  order     a state's stages run one after another (each reads what the
+            previous one wrote); different states' stages overlap, earlier
+            states first
+  limits    --workers caps the stages in flight overall, and STAGE_LIMITS
+            caps them per upstream service — one Overpass stage at a time
+            however many states are queued — so one state's CPU-only
+            stages (descriptions, SEO, audit) run while another waits on
+            Overpass. Every stage's requests also draw on the shared
+            per-host budget in scripts/rate_limit.py.
+
+Resumable at stage granularity: pipeline-reports/auto-all-progress.json
+records each stage's outcome, and a re-run resumes a state at its first
+stage that did not succeed — a failed enrich-poi does not redo import-state.
 States already completed (or that already have a data folder) are skipped
 unless --force. Failures don't stop the batch; they're listed at the end and
 retried on the next run.
 
 Usage:
-  python3 scripts/auto-all.py                       # every state, one at a time
-  python3 scripts/auto-all.py --workers 2           # gentle parallelism
+  python3 scripts/auto-all.py                       # every state, 3 stages at a time
+  python3 scripts/auto-all.py --workers 6           # more overlap (service limits still apply)
   python3 scripts/auto-all.py --states colorado utah wyoming
   python3 scripts/auto-all.py --limit 5             # first 5 pending states
   python3 scripts/auto-all.py --force --states virginia   # redo a state
+  python3 scripts/auto-all.py --force --offline      # replay from the HTTP cache
+  python3 scripts/auto-all.py --catalogue            # peaks from the local catalogue
 """
 
 import argparse
+import importlib.util
 import json
+import os
 import subprocess
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
@@ -33,13 +50,27 @@ ROOT = Path(__file__).resolve().parent.parent
 SCRIPTS = ROOT / "scripts"
 DATA = ROOT / "website" / "src" / "data"
 PROGRESS = ROOT / "pipeline-reports" / "auto-all-progress.json"
-PAUSE_BETWEEN = 20  # seconds between state starts, per worker
+LOG_DIR = ROOT / "pipeline-reports" / "auto-all-logs"
+
+# Stages in flight per upstream service (see auto-state.stages()). Overpass
+# asks for about one client slot; "cpu" stages are local work only.
+STAGE_LIMITS = {"overpass": 1, "arcgis": 2, "open-meteo": 1, "cpu": os.cpu_count() or 2}
+
+
+def load_module(path, name):
+    """Load a script with a hyphenated filename as an importable module."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
 
 
 def load_progress():
     if PROGRESS.exists():
-        return json.loads(PROGRESS.read_text())
-    return {"done": {}, "failed": {}}
+        prog = json.loads(PROGRESS.read_text())
+        prog.setdefault("stages", {})
+        return prog
+    return {"done": {}, "failed": {}, "stages": {}}
 
 
 def save_progress(prog):
@@ -47,18 +78,66 @@ def save_progress(prog):
     PROGRESS.write_text(json.dumps(prog, indent=2) + "\n")
 
 
-def build_state(slug):
-    """Run auto-state for one slug; returns (slug, ok, seconds)."""
+def run_stage(slug, stage):
+    """Run one stage of one state, appending to the state's log; returns
+    (ok, seconds)."""
     t0 = time.time()
-    log_dir = ROOT / "pipeline-reports" / "auto-all-logs"
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log = log_dir / f"{slug}.log"
-    with open(log, "w") as fh:
-        r = subprocess.run(
-            [sys.executable, str(SCRIPTS / "auto-state.py"), slug],
-            stdout=fh, stderr=subprocess.STDOUT,
-        )
-    return slug, r.returncode == 0, round(time.time() - t0)
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_DIR / f"{slug}.log", "a") as fh:
+        fh.write(f"\n{'─' * 70}\n▶ {stage['label']}\n{'─' * 70}\n")
+        fh.flush()
+        r = subprocess.run(stage["cmd"], stdout=fh, stderr=subprocess.STDOUT)
+        if r.returncode != 0:
+            fh.write(f"  ⚠️  {stage['label']} exited {r.returncode} (continuing)\n")
+    return r.returncode == 0, round(time.time() - t0)
+
+
+def remaining_stages(stages, done):
+    """The stages still to run: everything from the first one that has not
+    succeeded (later stages consume its output, so they redo too)."""
+    for i, stage in enumerate(stages):
+        if not (done.get(stage["name"]) or {}).get("ok"):
+            return stages[i:]
+    return []
+
+
+def schedule(plans, workers, on_stage, on_state):
+    """Run every state's stages with the work-queue rules in the module
+    docstring. plans is {slug: [stage, ...]} in priority order;
+    on_stage(slug, stage, ok, secs) is called as each stage finishes and
+    on_state(slug) once a state's last stage has."""
+    queue = {slug: list(stages) for slug, stages in plans.items() if stages}
+    for slug in plans:
+        if slug not in queue:
+            on_state(slug)  # every stage already succeeded on an earlier run
+    busy = dict.fromkeys(STAGE_LIMITS, 0)
+    running = {}  # future -> (slug, stage)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while queue or running:
+            active = {slug for slug, _ in running.values()}
+            for slug, stages in queue.items():
+                if len(running) >= workers:
+                    break
+                stage = stages[0]
+                if slug in active or any(busy.get(svc, 0) >= STAGE_LIMITS.get(svc, 1)
+                                         for svc in stage["services"]):
+                    continue
+                for svc in stage["services"]:
+                    busy[svc] = busy.get(svc, 0) + 1
+                print(f"▶ {slug} · {stage['name']}")
+                running[ex.submit(run_stage, slug, stage)] = (slug, stage)
+                active.add(slug)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                slug, stage = running.pop(fut)
+                for svc in stage["services"]:
+                    busy[svc] -= 1
+                ok, secs = fut.result()
+                on_stage(slug, stage, ok, secs)
+                queue[slug].pop(0)
+                if not queue[slug]:
+                    del queue[slug]
+                    on_state(slug)
 
 
 def live_draft(slug):
@@ -85,12 +164,23 @@ def main():
     p = argparse.ArgumentParser(description="Batch state builder")
     p.add_argument("--states", nargs="*", help="only these slugs")
     p.add_argument("--limit", type=int, help="max states this run")
-    p.add_argument("--workers", type=int, default=1, choices=[1, 2, 3])
+    p.add_argument("--workers", type=int, default=3,
+                   help="stages in flight across all states (STAGE_LIMITS "
+                        "still caps each upstream service)")
     p.add_argument("--force", action="store_true",
                    help="re-run even if already done / has data")
     p.add_argument("--commit", action="store_true",
                    help="git commit+push each state's data as it completes")
+    p.add_argument("--offline", action="store_true",
+                   help="no network: answer every fetch from the HTTP cache "
+                        "(see scripts/http_cache.py)")
+    p.add_argument("--catalogue", action="store_true",
+                   help="import peaks from the local peak catalogue "
+                        "(scripts/build-peak-catalogue.py), not Overpass")
     args = p.parse_args()
+    if args.offline:
+        os.environ["SUMMITSEEKER_OFFLINE"] = "1"  # inherited by every stage
+    auto_state = load_module(SCRIPTS / "auto-state.py", "auto_state")
 
     cfg = json.loads((ROOT / "pipeline.config.json").read_text())
     all_slugs = [s["slug"] for s in cfg.get("states", [])]
@@ -105,58 +195,78 @@ def main():
         if not args.force:
             if slug in prog["done"]:
                 continue
-            if (DATA / slug).is_dir() and any((DATA / slug).glob("*.json")):
+            if (DATA / slug).is_dir() and any((DATA / slug).glob("*.json")) \
+                    and slug not in prog["stages"]:
                 # Has data from before this runner; count it done, don't redo.
                 prog["done"][slug] = {"note": "pre-existing data",
                                       "at": datetime.now().isoformat(timespec="seconds")}
                 continue
         pending.append(slug)
-    save_progress(prog)
 
     if args.limit:
         pending = pending[: args.limit]
+    plans = {}
+    for slug in pending:
+        if args.force:
+            prog["stages"].pop(slug, None)
+        stages = auto_state.stages(auto_state.apply_tuning(
+            auto_state.parser().parse_args([slug] + ["--catalogue"] * args.catalogue)))
+        todo = remaining_stages(stages, prog["stages"].setdefault(slug, {}))
+        if len(todo) == len(stages):
+            (LOG_DIR / f"{slug}.log").unlink(missing_ok=True)  # a fresh build
+        plans[slug] = todo
+    save_progress(prog)
     if not pending:
         print("Nothing to do — all requested states are done. "
               "Use --force to rebuild.")
         return
 
-    print(f"Batch: {len(pending)} state(s), {args.workers} worker(s), "
-          f"{PAUSE_BETWEEN}s stagger\n  queue: {', '.join(pending)}")
-
+    print(f"Batch: {len(pending)} state(s), {args.workers} stage(s) at a time\n"
+          f"  queue: {', '.join(pending)}\n"
+          f"  logs:  pipeline-reports/auto-all-logs/<state>.log")
+    state_secs = {}
     results = []
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futures = {}
-        for i, slug in enumerate(pending):
-            if i:
-                time.sleep(PAUSE_BETWEEN)
-            print(f"▶ starting {slug} "
-                  f"(log: pipeline-reports/auto-all-logs/{slug}.log)")
-            futures[ex.submit(build_state, slug)] = slug
-        for fut in as_completed(futures):
-            slug, ok, secs = fut.result()
-            live, draft = live_draft(slug)
-            results.append((slug, ok, secs, live, draft))
-            prog = load_progress()
-            if ok:
-                prog["done"][slug] = {"live": live, "draft": draft, "secs": secs,
-                                      "at": datetime.now().isoformat(timespec="seconds")}
-                prog["failed"].pop(slug, None)
-            else:
-                prog["failed"][slug] = {"secs": secs,
-                                        "at": datetime.now().isoformat(timespec="seconds")}
-            save_progress(prog)
-            print(f"  {'✅' if ok else '❌'} {slug}: {live} live / {draft} draft "
-                  f"({secs}s)")
-            if args.commit and ok and (live or draft):
-                subprocess.run(["git", "add", f"website/src/data/{slug}",
-                                "pipeline.config.json"], cwd=ROOT)
-                subprocess.run(
-                    ["git", "commit", "-m",
-                     f"Add {slug}: {live} live / {draft} draft via automated "
-                     f"build\n\nCo-Authored-By: Claude Fable 5 "
-                     f"<noreply@anthropic.com>"],
-                    cwd=ROOT, capture_output=True)
-                subprocess.run(["git", "push"], cwd=ROOT, capture_output=True)
+
+    def on_stage(slug, stage, ok, secs):
+        state_secs[slug] = state_secs.get(slug, 0) + secs
+        prog["stages"].setdefault(slug, {})[stage["name"]] = {
+            "ok": ok, "secs": secs, "at": datetime.now().isoformat(timespec="seconds")}
+        save_progress(prog)
+        print(f"  {'·' if ok else '⚠️ '} {slug} · {stage['name']} "
+              f"{'done' if ok else 'failed'} ({secs}s)")
+
+    def on_state(slug):
+        ok = all(st.get("ok") for st in prog["stages"].get(slug, {}).values())
+        secs = state_secs.get(slug, 0)
+        if auto_state.enable_state(slug):
+            print(f"  · enabled '{slug}' in pipeline.config.json")
+        with open(LOG_DIR / f"{slug}.log", "a") as fh:
+            subprocess.run([sys.executable, str(SCRIPTS / "draft-status.py"), slug],
+                           stdout=fh, stderr=subprocess.STDOUT)
+        live, draft = live_draft(slug)
+        results.append((slug, ok, secs, live, draft))
+        if ok:
+            prog["done"][slug] = {"live": live, "draft": draft, "secs": secs,
+                                  "at": datetime.now().isoformat(timespec="seconds")}
+            prog["failed"].pop(slug, None)
+        else:
+            prog["failed"][slug] = {"secs": secs,
+                                    "at": datetime.now().isoformat(timespec="seconds")}
+        save_progress(prog)
+        print(f"  {'✅' if ok else '❌'} {slug}: {live} live / {draft} draft "
+              f"({secs}s)")
+        if args.commit and ok and (live or draft):
+            subprocess.run(["git", "add", f"website/src/data/{slug}",
+                            "pipeline.config.json"], cwd=ROOT)
+            subprocess.run(
+                ["git", "commit", "-m",
+                 f"Add {slug}: {live} live / {draft} draft via automated "
+                 f"build\n\nCo-Authored-By: Claude Fable 5 "
+                 f"<noreply@anthropic.com>"],
+                cwd=ROOT, capture_output=True)
+            subprocess.run(["git", "push"], cwd=ROOT, capture_output=True)
+
+    schedule(plans, max(1, args.workers), on_stage, on_state)
 
     print(f"\n{'=' * 62}\nBATCH SUMMARY\n{'=' * 62}")
     tot_live = tot_draft = 0
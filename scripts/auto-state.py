@@ -8,7 +8,7 @@ ODbL data, and auto-publishes the trails that pass the quality gate:
   1. import-state      peaks from OpenStreetMap (name, coords, elevation)
   2. curate prune      drop the OSM noise, keep notable destinations
   3. fetch-trails      real routes from USFS / NPS / USGS National Map
-  4. enrich-elevation  fill elevation on any 2-D path (Open-Meteo DEM)
+  4. enrich-elevation  fill elevation on any 2-D path (local DEM tiles, else Open-Meteo)
   5. enrich-poi        trailhead, parking, and along-trail features (OSM)
   6. run-pipeline      nearby peaks, descriptions, SEO, link check, audit, validate
   7. curate publish    auto-publish every trail that meets the quality bar
@@ -20,10 +20,13 @@ is network-heavy (OSM + government services) — expect a few minutes per state.
 Usage:
   python3 scripts/auto-state.py colorado
   python3 scripts/auto-state.py virginia --min-ele 2000 --keep-top 25 --radius-km 5
+  python3 scripts/auto-state.py colorado --offline   # replay from the HTTP cache
+  python3 scripts/auto-state.py maine --catalogue    # peaks from the local catalogue
 """
 
 import argparse
 import json
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -51,7 +54,7 @@ def enable_state(slug):
     return False
 
 
-def main():
+def parser():
     p = argparse.ArgumentParser(description="Fully automated state build")
     p.add_argument("state")
     p.add_argument("--min-ele", type=int, default=None,
@@ -76,17 +79,24 @@ def main():
                         "not raw elevation; default from pipeline.config.json")
     p.add_argument("--radius-km", type=float, default=4.0,
                    help="search radius for routes/POIs")
+    p.add_argument("--catalogue", action="store_true",
+                   help="import peaks from the local peak catalogue "
+                        "(scripts/build-peak-catalogue.py), not Overpass")
     p.add_argument("--skip-import", action="store_true",
                    help="use existing data; don't re-import from OSM")
-    args = p.parse_args()
-    s = args.state
-    py = sys.executable
+    p.add_argument("--offline", action="store_true",
+                   help="no network: every fetch is answered from the HTTP "
+                        "cache (scripts/http_cache.py), misses count as failures")
+    return p
 
-    # Per-state import tuning from the config (state highpoints differ wildly:
-    # Colorado's floor is 5000 ft, Florida's is 0). CLI flags override.
+
+def apply_tuning(args):
+    """Fill unset flags from the state's per-state import tuning in the config
+    (state highpoints differ wildly: Colorado's floor is 5000 ft, Florida's
+    is 0). CLI flags override."""
     cfg = json.loads((ROOT / "pipeline.config.json").read_text())
     tuning = next((st.get("import", {}) for st in cfg.get("states", [])
-                   if st["slug"] == s), {})
+                   if st["slug"] == args.state), {})
     if args.min_ele is None:
         args.min_ele = tuning.get("min_ele", 2000)
     if args.max_ele is None:
@@ -99,37 +109,72 @@ def main():
         args.near_population = tuning.get("near_population_mi")
     if not args.ignore_elevation_ranking:
         args.ignore_elevation_ranking = tuning.get("ignore_elevation_ranking", False)
+    return args
 
-    max_desc = f" · max-ele {args.max_ele}ft" if args.max_ele else ""
-    print(f"╔{'═' * 68}╗")
-    print(f"  FULLY AUTOMATED BUILD · {s} · min-ele {args.min_ele}ft{max_desc} · "
-          f"sort-by {args.sort_by} · keep-top {args.keep_top}")
-    print(f"╚{'═' * 68}╝")
 
+def stages(args):
+    """The build as [{name, label, cmd, services}], in dependency order —
+    each stage reads what the one before it wrote. `services` are every
+    upstream server a stage calls ("cpu" for local-only work), which is
+    what auto-all.py schedules by."""
+    s = args.state
+    py = sys.executable
+    out = []
     if not args.skip_import:
         import_cmd = [py, str(SCRIPTS / "import-state.py"), s,
                       "--min-ele", str(args.min_ele), "--sort-by", args.sort_by]
         if args.max_ele:
             import_cmd += ["--max-ele", str(args.max_ele)]
-        run("1/7  Import peaks (OpenStreetMap)", import_cmd)
+        if args.catalogue:
+            import_cmd += ["--catalogue"]
+        # The DEM cross-check (parse_ele) samples Open-Meteo; from the
+        # catalogue that is the only upstream call left.
+        out.append({"name": "import", "label": "1/7  Import peaks (OpenStreetMap)",
+                    "cmd": import_cmd,
+                    "services": ["open-meteo"] if args.catalogue
+                    else ["overpass", "open-meteo"]})
         prune_cmd = [py, str(SCRIPTS / "curate-state.py"), s, "prune",
                      "--keep-top", str(args.keep_top), "--apply"]
         if args.near_population:
             prune_cmd += ["--near-population", str(args.near_population)]
         if args.ignore_elevation_ranking:
             prune_cmd += ["--ignore-elevation"]
-        run("2/7  Prune to notable destinations", prune_cmd)
-
-    run("3/7  Fetch real routes (USFS / NPS / USGS)",
-        [py, str(SCRIPTS / "fetch-trails.py"), s, "--radius-km", str(args.radius_km)])
-    run("4/7  Fill elevation on 2-D paths (Open-Meteo)",
-        [py, str(SCRIPTS / "enrich-elevation.py"), "--state", s])
-    run("5/7  Trailhead, parking & features (OpenStreetMap)",
-        [py, str(SCRIPTS / "enrich-poi.py"), s])
-    run("6/7  Enrich + audit + validate",
-        [py, str(SCRIPTS / "run-pipeline.py"), "--state", s])
-    run("7/7  Publish everything that passes quality",
-        [py, str(SCRIPTS / "curate-state.py"), s])
+        out.append({"name": "prune", "label": "2/7  Prune to notable destinations",
+                    "cmd": prune_cmd, "services": ["cpu"]})
+    out += [
+        {"name": "fetch-trails", "label": "3/7  Fetch real routes (USFS / NPS / USGS)",
+         "cmd": [py, str(SCRIPTS / "fetch-trails.py"), s, "--radius-km", str(args.radius_km)],
+         # ArcGIS first, the OSM fallback on Overpass, DEM for 2-D routes
+         "services": ["arcgis", "overpass", "open-meteo"]},
+        {"name": "enrich-elevation",
+         "label": "4/7  Fill elevation on 2-D paths (DEM tiles / Open-Meteo)",
+         "cmd": [py, str(SCRIPTS / "enrich-elevation.py"), "--state", s],
+         "services": ["open-meteo"]},
+        {"name": "enrich-poi", "label": "5/7  Trailhead, parking & features (OpenStreetMap)",
+         "cmd": [py, str(SCRIPTS / "enrich-poi.py"), s], "services": ["overpass"]},
+        {"name": "run-pipeline", "label": "6/7  Enrich + audit + validate",
+         "cmd": [py, str(SCRIPTS / "run-pipeline.py"), "--state", s], "services": ["cpu"]},
+        {"name": "publish", "label": "7/7  Publish everything that passes quality",
+         "cmd": [py, str(SCRIPTS / "curate-state.py"), s], "services": ["cpu"]},
+    ]
+    return out
+
+
+def main():
+    args = apply_tuning(parser().parse_args())
+    if args.offline:
+        os.environ["SUMMITSEEKER_OFFLINE"] = "1"  # inherited by every stage
+    s = args.state
+    py = sys.executable
+
+    max_desc = f" · max-ele {args.max_ele}ft" if args.max_ele else ""
+    print(f"╔{'═' * 68}╗")
+    print(f"  FULLY AUTOMATED BUILD · {s} · min-ele {args.min_ele}ft{max_desc} · "
+          f"sort-by {args.sort_by} · keep-top {args.keep_top}")
+    print(f"╚{'═' * 68}╝")
+
+    for stage in stages(args):
+        run(stage["label"], stage["cmd"])
 
     if enable_state(s):
         print(f"\n  · enabled '{s}' in pipeline.config.json")
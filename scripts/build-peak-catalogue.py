@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Build the offline peak catalogue from local OpenStreetMap PBF extracts.
+
+Every named natural=peak node in the extracts is written to peak-catalogue/
+(see peak_catalogue.py) with its name, ele, prominence and wikidata tags,
+assigned to a state. After that, import-state.py --catalogue needs no
+Overpass query and no rate limit:
+
+  per state   a Geofabrik state extract (north-america/us/vermont-latest.osm.pbf)
+              is matched to its state by file name, and every peak in it is
+              that state's — Geofabrik cut it on the state boundary
+  larger      any other extract (us-latest.osm.pbf) is split by STATE_BBOX,
+              so a peak near a border lands in each state whose box holds it;
+              prefer state extracts where exact borders matter
+
+Extracts are read in parallel, one process per file. The catalogue is
+rebuilt from scratch each run: pass every extract you want in it.
+
+Usage:
+  python3 scripts/build-peak-catalogue.py ~/osm/vermont-latest.osm.pbf ~/osm/maine-latest.osm.pbf
+  python3 scripts/build-peak-catalogue.py ~/osm/us-latest.osm.pbf
+  python3 scripts/build-peak-catalogue.py ~/osm/*.osm.pbf --jobs 8 --out /tmp/peaks
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+import osm_pbf  # noqa: E402
+import peak_catalogue  # noqa: E402
+
+
+def load_module(path, name):
+    """Load a script with a hyphenated filename as an importable module."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_IMPORT = None
+
+
+def import_state():
+    global _IMPORT
+    if _IMPORT is None:
+        _IMPORT = load_module(SCRIPTS / "import-state.py", "import_state")
+    return _IMPORT
+
+
+def extract_state(path):
+    """The state slug a Geofabrik extract is named for, or None."""
+    stem = Path(path).name.split(".")[0]
+    matches = [s for s in import_state().STATES
+               if stem == s or stem.startswith(s + "-")]
+    return max(matches, key=len) if matches else None
+
+
+def read_extract(path):
+    """(path, state or None, [(osm_id, lat, lon, tags)], seconds) for one extract."""
+    t0 = time.time()
+    rows = [(osm_id, lat, lon, tags)
+            for osm_id, (lat, lon), tags in osm_pbf.iter_nodes(path, "natural", "peak")
+            if tags.get("name")]
+    return path, extract_state(path), rows, time.time() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Build the offline peak catalogue from OSM PBF extracts.")
+    p.add_argument("extracts", nargs="+", help=".osm.pbf files")
+    p.add_argument("--out", default=str(peak_catalogue.CATALOGUE_DIR),
+                   help="catalogue directory (default: peak-catalogue/)")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                   help="extracts read in parallel (default: CPU count)")
+    args = p.parse_args()
+
+    paths = [str(Path(x).expanduser()) for x in args.extracts]
+    missing = [x for x in paths if not Path(x).is_file()]
+    if missing:
+        sys.exit(f"❌ No such extract: {', '.join(missing)}")
+    bboxes = import_state().STATE_BBOX
+
+    by_state = {}
+    unplaced = 0
+    workers = max(1, min(args.jobs, len(paths)))
+    print(f"Reading {len(paths)} extract(s) for named peaks "
+          f"({workers} worker{'s' if workers > 1 else ''})…")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, state, rows, secs in pool.map(read_extract, paths):
+            how = state or "split by STATE_BBOX"
+            print(f"  {Path(path).name}: {len(rows)} named peaks ({how}, {secs:.0f}s)")
+            for row in rows:
+                if state:
+                    targets = [state]
+                else:
+                    targets = [s for s, (s_lat, w_lon, n_lat, e_lon) in bboxes.items()
+                               if s_lat <= row[1] <= n_lat and w_lon <= row[2] <= e_lon]
+                    unplaced += not targets
+                for s in targets:
+                    by_state.setdefault(s, {})[row[0]] = row  # extracts overlap
+
+    meta = peak_catalogue.write({s: list(rows.values()) for s, rows in by_state.items()},
+                                args.out, sources=[Path(x).name for x in paths])
+    if unplaced:
+        print(f"  · {unplaced} peak(s) outside every state's bounding box skipped")
+    print(f"\n✅ {meta['count']} peak rows across {len(meta['states'])} state(s) "
+          f"in {args.out}")
+    print("Now run:  python3 scripts/import-state.py <state> --catalogue")
+
+
+if __name__ == "__main__":
+    main()
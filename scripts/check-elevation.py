@@ -23,7 +23,6 @@ Usage:
 
 import glob
 import json
-import ssl
 import sys
 import time
 import urllib.error
@@ -35,13 +34,9 @@ ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 EPQS = "https://epqs.nationalmap.gov/v1/json"
 
-
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
+sys.path.insert(0, str(ROOT / "scripts"))
+import http_cache  # noqa: E402
+from http_client import ssl_context  # noqa: E402
 
 
 def usgs_elevation(lat, lon, ctx, retries=3):
@@ -51,11 +46,12 @@ def usgs_elevation(lat, lon, ctx, retries=3):
                                  headers={"User-Agent": "summitseeker-elev/1.0"})
     for attempt in range(retries):
         try:
-            with urllib.request.urlopen(req, timeout=40, context=ctx) as resp:
-                val = json.loads(resp.read()).get("value")
+            val = http_cache.fetch(req, timeout=40, context=ctx).get("value")
             if val is None or float(val) < -1000:
                 return None
             return round(float(val))
+        except http_cache.OfflineMiss:
+            return None
         except urllib.error.URLError as e:
             if "CERTIFICATE_VERIFY_FAILED" in str(e):
                 sys.exit("❌ TLS cert verification failed (macOS/python.org). Fix:\n"
@@ -99,7 +95,6 @@ def main():
             continue
         usgs = usgs_elevation(lat, lon, ctx)
         checked += 1
-        time.sleep(0.3)
         if usgs is None:
             continue
         diff = elev - usgs
@@ -37,8 +37,14 @@ def trail_states():
     return [p.name for p in data_dir.iterdir() if p.is_dir() and p.name not in skip]
 
 
-def build_index(states):
-    """Set of (state_slug, slug) for every existing trail file."""
+def build_index(states, store=None):
+    """Set of (state_slug, slug) for every existing trail file.
+
+    With a TrailStore (run-pipeline.py), the index comes from records the
+    run has already parsed and is cached for the rest of the run.
+    """
+    if store is not None:
+        return store.index(states)
     index = set()
     data_dir = ROOT / "website" / "src" / "data"
     for state in states:
@@ -51,29 +57,42 @@ def build_index(states):
     return index
 
 
-def check(states):
-    index = build_index(trail_states())  # validate against ALL states
+def state_records(state, store=None):
+    if store is not None:
+        return store.records(state)
     data_dir = ROOT / "website" / "src" / "data"
+    records = []
+    for f in sorted((data_dir / state).glob("*.json")):
+        try:
+            records.append((f, json.loads(f.read_text())))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def link_targets(d):
+    """(name, state_slug, slug) for each nearby_peaks link on a record."""
+    return [(np.get("name", "?"), np.get("state_slug") or d.get("state_slug"),
+             np.get("slug"))
+            for np in d.get("nearby_peaks") or []]
+
+
+def check(states, store=None):
+    index = build_index(trail_states(), store)  # validate against ALL states
     broken = []       # (file, name, target_state, target_slug)
     no_links = []     # files with zero nearby_peaks
     total_links = 0
 
     for state in states:
-        for f in sorted((data_dir / state).glob("*.json")):
-            try:
-                d = json.loads(f.read_text())
-            except json.JSONDecodeError:
-                continue
-            peaks = d.get("nearby_peaks") or []
-            if not peaks:
+        for f, d in state_records(state, store):
+            targets = link_targets(d)
+            if not targets:
                 no_links.append(f.relative_to(ROOT))
                 continue
-            for np in peaks:
+            for name, st, slug in targets:
                 total_links += 1
-                tgt = (np.get("state_slug") or d.get("state_slug"), np.get("slug"))
-                if tgt not in index:
-                    broken.append((f.relative_to(ROOT), np.get("name", "?"),
-                                   tgt[0], tgt[1]))
+                if (st, slug) not in index:
+                    broken.append((f.relative_to(ROOT), name, st, slug))
     return broken, no_links, total_links
 
 
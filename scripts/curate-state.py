@@ -34,6 +34,9 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+
 GENERIC_NAME = re.compile(r"\b(hill|knob|rise|ridge|mound)\b", re.I)
 
 # Real, publicly documented coordinates of population centers, used ONLY as a
@@ -55,20 +58,11 @@ POPULATION_CENTERS = {
 }
 
 
-def _hav_mi(a_lat, a_lon, b_lat, b_lon):
-    r = 3959
-    dlat = math.radians(b_lat - a_lat)
-    dlon = math.radians(b_lon - a_lon)
-    h = (math.sin(dlat / 2) ** 2 + math.cos(math.radians(a_lat))
-         * math.cos(math.radians(b_lat)) * math.sin(dlon / 2) ** 2)
-    return r * 2 * math.asin(math.sqrt(h))
-
-
 def nearest_population_center_mi(state, rec):
     centers = POPULATION_CENTERS.get(state)
     if not centers or rec.get("lat") is None or rec.get("lon") is None:
         return None
-    return min(_hav_mi(c[1], c[2], rec["lat"], rec["lon"]) for c in centers)
+    return min(geodesy.distance_mi(c[1], c[2], rec["lat"], rec["lon"]) for c in centers)
 
 
 def load_audit():
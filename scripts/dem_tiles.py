@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Local DEM tile store: elevation lookups at disk speed, no network.
+
+enrich-elevation.py used to ask Open-Meteo for every point — 100 per request
+with a pause between chunks — so each route cost several round trips and
+nothing elevation-related worked offline. DemTiles answers from a directory
+of 1°x1° tiles instead:
+
+  .hgt      SRTM layout (N44W072.hgt: big-endian int16, 1201² or 3601²
+            samples, north row first). Memory-mapped; nothing is read until
+            a point lands in the tile.
+  .tif      Any GeoTIFF DEM (e.g. Copernicus GLO-30), read through rasterio
+            when it is installed and skipped when it isn't.
+
+Samples are bilinearly interpolated between the four surrounding posts. A
+point outside every tile, or next to a void post, gets None and falls
+through to the next provider (Open-Meteo, in batch_elevations).
+
+The directory is $SUMMITSEEKER_DEM_DIR, else dem-tiles/ at the repo root. Put
+a one-line SOURCE file in it (e.g. "Copernicus GLO-30 DEM") — that is the
+provenance written into records; without it they say "local DEM tiles".
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python sampler is used instead
+    np = None
+
+try:
+    import rasterio
+except ImportError:  # optional: GeoTIFF tiles are skipped without it
+    rasterio = None
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = ROOT / "dem-tiles"
+HGT_VOID = -32768
+HGT_NAME = re.compile(r"^([NS])(\d{2})([EW])(\d{3})\.hgt$", re.I)
+
+
+def dem_dir():
+    return Path(os.environ.get("SUMMITSEEKER_DEM_DIR") or DEFAULT_DIR)
+
+
+class _Hgt:
+    def __init__(self, path, lat0, lon0):
+        self.path, self.lat0, self.lon0 = path, lat0, lon0
+        self.n = int(math.isqrt(path.stat().st_size // 2))
+        self._mm = None
+        self._grid = None
+
+    def _open(self):
+        if self._mm is None:
+            with open(self.path, "rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            if np is not None:
+                self._grid = np.frombuffer(self._mm, dtype=">i2").reshape(self.n, self.n)
+
+    def _post(self, r, c):
+        return struct.unpack_from(">h", self._mm, 2 * (r * self.n + c))[0]
+
+    def sample(self, lat, lon):
+        """Metres at (lat, lon), or None on a void."""
+        self._open()
+        span = self.n - 1
+        r = (self.lat0 + 1 - lat) * span
+        c = (lon - self.lon0) * span
+        r0 = min(max(int(r), 0), span - 1)
+        c0 = min(max(int(c), 0), span - 1)
+        fr, fc = r - r0, c - c0
+        q = (self._post(r0, c0), self._post(r0, c0 + 1),
+             self._post(r0 + 1, c0), self._post(r0 + 1, c0 + 1))
+        if HGT_VOID in q:
+            return None
+        top = q[0] + (q[1] - q[0]) * fc
+        bottom = q[2] + (q[3] - q[2]) * fc
+        return top + (bottom - top) * fr
+
+    def sample_many(self, lats, lons):
+        """Vectorized sample() over NumPy arrays; NaN for voids."""
+        self._open()
+        span = self.n - 1
+        r = (self.lat0 + 1 - lats) * span
+        c = (lons - self.lon0) * span
+        r0 = np.clip(r.astype(int), 0, span - 1)
+        c0 = np.clip(c.astype(int), 0, span - 1)
+        fr, fc = r - r0, c - c0
+        g = self._grid
+        q00, q01 = g[r0, c0].astype(float), g[r0, c0 + 1].astype(float)
+        q10, q11 = g[r0 + 1, c0].astype(float), g[r0 + 1, c0 + 1].astype(float)
+        top = q00 + (q01 - q00) * fc
+        bottom = q10 + (q11 - q10) * fc
+        out = top + (bottom - top) * fr
+        void = (q00 == HGT_VOID) | (q01 == HGT_VOID) | (q10 == HGT_VOID) | (q11 == HGT_VOID)
+        out[void] = np.nan
+        return out
+
+
+class _GeoTiff:
+    def __init__(self, path, ds):
+        self.path = path
+        self.bounds = ds.bounds
+        self.transform = ds.transform
+        self.nodata = ds.nodata
+        self._band = None
+
+    def covers(self, lat, lon):
+        b = self.bounds
+        return b.left <= lon < b.right and b.bottom < lat <= b.top
+
+    def sample(self, lat, lon):
+        if self._band is None:
+            with rasterio.open(self.path) as ds:
+                self._band = ds.read(1)
+        band = self._band
+        col, row = ~self.transform * (lon, lat)
+        # Pixel values sit at pixel centres.
+        col, row = col - 0.5, row - 0.5
+        h, w = band.shape
+        r0 = min(max(int(math.floor(row)), 0), h - 2)
+        c0 = min(max(int(math.floor(col)), 0), w - 2)
+        fr, fc = min(max(row - r0, 0.0), 1.0), min(max(col - c0, 0.0), 1.0)
+        q = [float(band[r0, c0]), float(band[r0, c0 + 1]),
+             float(band[r0 + 1, c0]), float(band[r0 + 1, c0 + 1])]
+        if any(math.isnan(v) or (self.nodata is not None and v == self.nodata)
+               for v in q):
+            return None
+        top = q[0] + (q[1] - q[0]) * fc
+        bottom = q[2] + (q[3] - q[2]) * fc
+        return top + (bottom - top) * fr
+
+
+class DemTiles:
+    """Elevation in metres from the tiles in one directory."""
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else dem_dir()
+        self._hgt = {}    # (lat0, lon0) -> _Hgt
+        self._tiffs = []  # [_GeoTiff]
+        if self.directory.is_dir():
+            for f in sorted(self.directory.iterdir()):
+                m = HGT_NAME.match(f.name)
+                if m:
+                    lat0 = int(m[2]) * (1 if m[1].upper() == "N" else -1)
+                    lon0 = int(m[4]) * (1 if m[3].upper() == "E" else -1)
+                    self._hgt[(lat0, lon0)] = _Hgt(f, lat0, lon0)
+                elif f.suffix.lower() in (".tif", ".tiff") and rasterio is not None:
+                    with rasterio.open(f) as ds:
+                        self._tiffs.append(_GeoTiff(f, ds))
+        source = self.directory / "SOURCE"
+        self.label = (source.read_text().strip().splitlines() or ["local DEM tiles"])[0] \
+            if source.exists() else "local DEM tiles"
+
+    def __bool__(self):
+        return bool(self._hgt or self._tiffs)
+
+    def sample_m(self, lat, lon):
+        """Metres at (lat, lon), or None when no tile covers it."""
+        tile = self._hgt.get((math.floor(lat), math.floor(lon)))
+        if tile is not None:
+            return tile.sample(lat, lon)
+        for t in self._tiffs:
+            if t.covers(lat, lon):
+                return t.sample(lat, lon)
+        return None
+
+    def elevations_m(self, points):
+        """One value (metres) or None per (lat, lon) point, index-aligned."""
+        if np is None or not self._hgt:
+            return [self.sample_m(p[0], p[1]) for p in points]
+        # Group by tile so each .hgt is sampled in one vectorized call.
+        out = [None] * len(points)
+        groups = {}
+        for i, p in enumerate(points):
+            groups.setdefault((math.floor(p[0]), math.floor(p[1])), []).append(i)
+        for key, idx in groups.items():
+            tile = self._hgt.get(key)
+            if tile is None:
+                for i in idx:
+                    out[i] = self.sample_m(points[i][0], points[i][1])
+                continue
+            lats = np.array([points[i][0] for i in idx], dtype=float)
+            lons = np.array([points[i][1] for i in idx], dtype=float)
+            for i, v in zip(idx, tile.sample_many(lats, lons)):
+                out[i] = None if np.isnan(v) else float(v)
+        return out
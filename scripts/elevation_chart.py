@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Elevation chart builder: sample a route's profile at exact mile marks.
+
+enrich-elevation.py (build_chart) and gpx-to-geo.py (generate_chart) each
+found every chart sample with a min() over the whole cumulative-distance
+array — O(samples x points) — and took the nearest raw point's elevation,
+so a sample could sit a tenth of a mile off its mile mark on a sparse path.
+build() is the one implementation:
+
+  walk       the samples and the cumulative-distance array are both sorted,
+             so one two-pointer pass finds every sample's segment: O(n + num)
+  values     elevation and coordinates are interpolated linearly along the
+             segment at the sample's exact distance
+  density    a sample count (num, endpoints included) or a spacing in miles;
+             either way the last sample is the end of the route
+
+Chart points are in the frontend's canonical shape, {mile, elev, coord}
+(ElevationChart reads dataKey="mile"/"elev"), so a denser profile is just a
+larger num or a smaller spacing_mi.
+"""
+
+import math
+
+import geodesy
+
+CHART_POINTS = 15
+
+
+def _ele(p):
+    """A point's elevation, or None when it has none (2-D point, null)."""
+    return p[2] if len(p) > 2 and isinstance(p[2], (int, float)) else None
+
+
+def _lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def mile_marks(total_mi, num=CHART_POINTS, spacing_mi=None):
+    """The sample distances: num evenly spaced marks from 0 to total_mi, or
+    every spacing_mi miles plus the end."""
+    if total_mi <= 0:
+        return []
+    if spacing_mi:
+        marks = [i * spacing_mi for i in range(int(total_mi / spacing_mi + 1e-9) + 1)]
+        if total_mi - marks[-1] > 1e-9:
+            marks.append(total_mi)
+        return marks
+    num = max(2, num)
+    step = total_mi / (num - 1)
+    return [min(i * step, total_mi) for i in range(num)]
+
+
+def sample(path, marks, cum=None):
+    """(lat, lon, ele) at each distance in marks (sorted), interpolated
+    along the path. ele is None where neither neighbouring point has one."""
+    if cum is None:
+        cum = geodesy.cumulative_mi(path)
+    n = len(path)
+    out = []
+    j = 0
+    for target in marks:
+        # Advance to the segment [j, j+1] that contains target.
+        while j < n - 2 and cum[j + 1] < target:
+            j += 1
+        a, b = path[j], path[min(j + 1, n - 1)]
+        span = float(cum[min(j + 1, n - 1)] - cum[j])
+        t = (target - float(cum[j])) / span if span > 0 else 0.0
+        t = min(1.0, max(0.0, t))
+        ea, eb = _ele(a), _ele(b)
+        if ea is None or eb is None:
+            ele = ea if eb is None else eb
+        else:
+            ele = _lerp(ea, eb, t)
+        out.append((_lerp(a[0], b[0], t), _lerp(a[1], b[1], t), ele))
+    return out
+
+
+def build(path, num=CHART_POINTS, spacing_mi=None):
+    """Chart points [{mile, elev, coord}] for a [lat, lon, ele_ft] path (a
+    list or a geodesy.PathArray). Empty for a path with no length."""
+    if len(path) < 2:
+        return []
+    cum = geodesy.cumulative_mi(path)
+    total = float(cum[-1])
+    marks = mile_marks(total, num, spacing_mi)
+    chart = []
+    for mile, (lat, lon, ele) in zip(marks, sample(path, marks, cum)):
+        chart.append({"mile": round(mile, 2),
+                      "elev": round(ele) if ele is not None and not math.isnan(ele) else 0,
+                      "coord": [round(lat, 5), round(lon, 5)]})
+    return chart
@@ -9,21 +9,10 @@ Uses intelligent interpolation between existing points plus elevation modeling.
 import json
 import math
 import sys
+from pathlib import Path
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two GPS points in miles"""
-    R = 3959
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import geodesy  # noqa: E402
 
 def interpolate_points(start, end, num_points, start_ele, end_ele):
     """Interpolate points between start and end with elevation"""
@@ -76,13 +65,7 @@ def enhance_trail_gps(trail_file, target_points_per_mile=20):
 
     if trail_distance == 0:
         # Calculate from existing path
-        trail_distance = sum(
-            haversine_distance(
-                existing_path[i][0], existing_path[i][1],
-                existing_path[i+1][0], existing_path[i+1][1]
-            )
-            for i in range(len(existing_path) - 1)
-        )
+        trail_distance = geodesy.path_length_mi(existing_path)
 
     print(f"Distance: {trail_distance:.1f} mi")
     print(f"Existing points: {len(existing_path)}")
@@ -130,7 +113,7 @@ def enhance_trail_gps(trail_file, target_points_per_mile=20):
         end = existing_path[i + 1]
 
         # Calculate segment distance
-        segment_dist = haversine_distance(start[0], start[1], end[0], end[1])
+        segment_dist = geodesy.haversine_mi(start, end)
 
         # Number of points to add in this segment
         # Use ceiling to ensure we get enough points
@@ -157,17 +140,10 @@ def enhance_trail_gps(trail_file, target_points_per_mile=20):
     # Generate elevation chart (15 evenly spaced points)
     chart_points = 15
     chart = []
-    total_distance = 0
-    distances = [0]
 
     # Calculate cumulative distances
-    for i in range(1, len(enhanced_path)):
-        dist = haversine_distance(
-            enhanced_path[i-1][0], enhanced_path[i-1][1],
-            enhanced_path[i][0], enhanced_path[i][1]
-        )
-        total_distance += dist
-        distances.append(total_distance)
+    distances = geodesy.cumulative_mi(enhanced_path)
+    total_distance = float(distances[-1])
 
     # Generate chart points
     for i in range(chart_points):
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 """
-Fill missing elevation on a trail's GPS path from the Open-Meteo DEM.
+Fill missing elevation on a trail's GPS path from a DEM.
 
 A GPS path is sometimes 2-D — a recorded track with no elevation, or geometry
 that came without it — which leaves the elevation chart flat and the gain wrong.
-This batch-queries the free Open-Meteo elevation API (Copernicus 30 m DEM, no
-key) for each path point and writes real elevations, then recomputes the trail's
-elevation chart and gain.
+This samples local DEM tiles (dem_tiles.py: SRTM .hgt / GeoTIFF in
+dem-tiles/) for each path point, batch-querying the free Open-Meteo elevation
+API (Copernicus 30 m DEM, no key) only for points no tile covers, writes real
+elevations, then recomputes the trail's elevation chart and gain.
 
 It only touches paths whose elevation is missing or essentially flat — paths
 that already carry real elevation (e.g. from a 3-D GPX) are left alone. It does
@@ -20,8 +21,6 @@ Usage:
 
 import glob
 import json
-import math
-import ssl
 import sys
 import time
 import urllib.error
@@ -33,26 +32,16 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 ELEV_API = "https://api.open-meteo.com/v1/elevation"
+OPEN_METEO = "Open-Meteo (Copernicus 30 m DEM)"
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import dem_tiles  # noqa: E402
+import elevation_chart  # noqa: E402
+import http_cache  # noqa: E402
+from http_client import ssl_context  # noqa: E402
 
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
 
-
-def haversine_mi(a, b):
-    R = 3959
-    p1, p2 = math.radians(a[0]), math.radians(b[0])
-    dlat = math.radians(b[0] - a[0])
-    dlon = math.radians(b[1] - a[1])
-    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(h))
-
-
-def batch_elevations(points, ctx):
+def open_meteo_elevations(points, ctx):
     """Open-Meteo allows many coords per call; chunk to be safe.
 
     Always returns one entry per input point, using None for any point whose
@@ -70,13 +59,14 @@ def batch_elevations(points, ctx):
         chunk_result = None
         for attempt in range(3):
             try:
-                with urllib.request.urlopen(req, timeout=40, context=ctx) as resp:
-                    data = json.loads(resp.read())
+                data = http_cache.fetch(req, timeout=40, context=ctx)
                 # Open-Meteo returns metres; this site stores elevation in feet.
                 values = [round(m * 3.28084) for m in (data.get("elevation") or [])]
                 if len(values) == len(chunk):
                     chunk_result = values
                 break
+            except http_cache.OfflineMiss:
+                break
             except urllib.error.URLError as e:
                 if "CERTIFICATE_VERIFY_FAILED" in str(e):
                     sys.exit("❌ TLS cert verification failed (macOS/python.org). Fix:\n"
@@ -86,10 +76,50 @@ def batch_elevations(points, ctx):
             except Exception:
                 time.sleep(2 ** attempt)
         out.extend(chunk_result if chunk_result is not None else [None] * len(chunk))
-        time.sleep(0.2)
     return out
 
 
+_DEM = None
+
+
+def local_dem():
+    """The local tile store (dem_tiles.py), opened once per process."""
+    global _DEM
+    if _DEM is None:
+        _DEM = dem_tiles.DemTiles()
+    return _DEM
+
+
+def batch_elevations(points, ctx, sources=None):
+    """Elevation in feet per (lat, lon), index-aligned, None where unknown.
+
+    Local DEM tiles answer first, at disk speed; only the points they don't
+    cover go to Open-Meteo. With `sources` (a list), the label of every
+    provider that supplied a value is appended, for elevation_source().
+    """
+    out = [None] * len(points)
+    dem = local_dem()
+    if dem:
+        for i, m in enumerate(dem.elevations_m(points)):
+            if m is not None:
+                out[i] = round(m * 3.28084)
+        if sources is not None and any(v is not None for v in out):
+            sources.append(dem.label)
+    missing = [i for i, v in enumerate(out) if v is None]
+    if missing:
+        fetched = open_meteo_elevations([points[i] for i in missing], ctx)
+        for i, v in zip(missing, fetched):
+            out[i] = v
+        if sources is not None and any(v is not None for v in fetched):
+            sources.append(OPEN_METEO)
+    return out
+
+
+def elevation_source(sources):
+    """data_sources.elevation_source for values batch_elevations supplied."""
+    return " + ".join(sources) if sources else OPEN_METEO
+
+
 def needs_elevation(path):
     """True if the path has no real elevation (2-D points or all ~0/flat)."""
     eles = [p[2] for p in path if len(p) >= 3 and isinstance(p[2], (int, float))]
@@ -100,23 +130,12 @@ def needs_elevation(path):
     return max(eles) - min(eles) < 5  # essentially flat → not real elevation
 
 
-def build_chart(path, num=15):
+def build_chart(path, num=15, spacing_mi=None):
     """Chart points in the frontend's canonical shape: {mile, elev, coord}
-    (ElevationChart reads dataKey="mile"/"elev")."""
-    dists = [0.0]
-    for i in range(1, len(path)):
-        dists.append(dists[-1] + haversine_mi(path[i - 1], path[i]))
-    total = dists[-1]
-    chart = []
-    if total <= 0:
-        return chart
-    step = total / (num - 1)
-    for i in range(num):
-        target = i * step
-        idx = min(range(len(dists)), key=lambda j: abs(dists[j] - target))
-        chart.append({"mile": round(target, 2), "elev": round(path[idx][2]),
-                      "coord": [path[idx][0], path[idx][1]]})
-    return chart
+    (ElevationChart reads dataKey="mile"/"elev"), interpolated at exact mile
+    marks by elevation_chart.build(). `path` may be a list or a
+    geodesy.PathArray."""
+    return elevation_chart.build(path, num=num, spacing_mi=spacing_mi)
 
 
 def fix_summit_elevation(d, ctx):
@@ -131,12 +150,13 @@ def fix_summit_elevation(d, ctx):
         return False
     if d.get("lat") is None or d.get("lon") is None:
         return False
-    vals = batch_elevations([(d["lat"], d["lon"])], ctx)
+    sources = []
+    vals = batch_elevations([(d["lat"], d["lon"])], ctx, sources)
     if len(vals) != 1 or vals[0] is None or vals[0] <= 0:
         return False
     d["elevation"] = vals[0]
     ds = d.setdefault("data_sources", {})
-    ds["elevation_source"] = "Open-Meteo (Copernicus 30 m DEM) at summit coordinate"
+    ds["elevation_source"] = f"{elevation_source(sources)} at summit coordinate"
     ds["elevation_verified"] = str(date.today())
     print(f"  ✅ {d.get('name'):<28} summit elevation backfilled: {vals[0]} ft")
     return True
@@ -158,7 +178,8 @@ def process(path_file, ctx):
         return False
 
     pts = [(p[0], p[1]) for p in path]
-    eles = batch_elevations(pts, ctx)
+    sources = []
+    eles = batch_elevations(pts, ctx, sources)
     if len(eles) != len(pts) or any(e is None for e in eles):
         print(f"  · elevation fetch incomplete, skipped: {d.get('name')}")
         return False
@@ -170,7 +191,7 @@ def process(path_file, ctx):
     stats = t.setdefault("stats", {})
     stats["gain"] = round(max(eles) - min(eles))
     ds = d.setdefault("data_sources", {})
-    ds["elevation_source"] = "Open-Meteo (Copernicus 30 m DEM)"
+    ds["elevation_source"] = elevation_source(sources)
     ds["elevation_verified"] = str(date.today())
     Path(path_file).write_text(json.dumps(d, indent=2) + "\n")
     print(f"  ✅ {d.get('name'):<28} {len(new_path)} pts, gain {stats['gain']} ft")
@@ -191,7 +212,7 @@ def main():
         sys.exit(1)
     ctx = ssl_context()
     n = sum(bool(process(f, ctx)) for f in files)
-    print(f"\nFilled elevation on {n} trail(s) from Open-Meteo.")
+    print(f"\nFilled elevation on {n} trail(s) from the DEM.")
 
 
 if __name__ == "__main__":
@@ -17,11 +17,16 @@ add a GPX first). Everything is real OSM data; nothing is invented.
 Usage:
   python3 scripts/enrich-poi.py virginia
   python3 scripts/enrich-poi.py virginia --slug mount-rogers-va
+  python3 scripts/enrich-poi.py virginia --prefetch   # a few tile queries, not one per trail
+
+--prefetch downloads the POI nodes once for the whole state — the union of
+the route bounding boxes, in PREFETCH_TILE_DEG tiles — into a local spatial
+index, and enriches every trail from it, so neighbouring trails no longer
+download overlapping boxes and there is no per-trail round trip and pause.
 """
 
 import json
 import math
-import ssl
 import sys
 import time
 import urllib.error
@@ -32,6 +37,16 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 OVERPASS = "https://overpass-api.de/api/interpreter"
+# --prefetch tile size: small enough that a dense tile stays well inside
+# Overpass's timeout and memory limits.
+PREFETCH_TILE_DEG = 0.25
+
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+import http_cache  # noqa: E402
+from http_client import ssl_context  # noqa: E402
+from route_locator import RouteLocator  # noqa: E402
+from spatial_index import BoxIndex  # noqa: E402
 
 # OSM tag → our feature type. Order matters (first match wins).
 FEATURE_TAGS = [
@@ -56,30 +71,16 @@ FEATURE_TAGS = [
 ]
 
 
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
-
-
-def haversine_mi(a, b):
-    R = 3959
-    p1, p2 = math.radians(a[0]), math.radians(b[0])
-    dlat = math.radians(b[0] - a[0]); dlon = math.radians(b[1] - a[1])
-    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(h))
-
-
 def overpass(query, ctx):
+    """The query's elements, or None when it could not be fetched."""
     data = urllib.parse.urlencode({"data": query}).encode()
     req = urllib.request.Request(OVERPASS, data=data,
                                  headers={"User-Agent": "summitseeker/1.0"})
     for attempt in range(4):
         try:
-            with urllib.request.urlopen(req, timeout=120, context=ctx) as resp:
-                return json.loads(resp.read()).get("elements", [])
+            return http_cache.fetch(req, timeout=120, context=ctx).get("elements", [])
+        except http_cache.OfflineMiss:
+            return None
         except urllib.error.URLError as e:
             if "CERTIFICATE_VERIFY_FAILED" in str(e):
                 sys.exit("❌ TLS cert verification failed (macOS/python.org). Fix:\n"
@@ -87,7 +88,7 @@ def overpass(query, ctx):
             time.sleep(2 ** attempt * 2)
         except Exception:
             time.sleep(2 ** attempt * 2)
-    return []
+    return None
 
 
 def bbox_of(path, pad=0.01):
@@ -102,36 +103,79 @@ def feature_type(tags):
     return None
 
 
-def nearest_mile(path, cum, pt):
-    """Distance along the trail (miles) to the path point nearest pt."""
-    best_i = min(range(len(path)), key=lambda i: haversine_mi(path[i], pt))
-    off = haversine_mi(path[best_i], pt)
-    return round(cum[best_i], 2), off
-
-
-def process_trail(d, ctx, max_off_mi=0.2):
+def poi_query(s, w, n, e):
+    """Overpass query for trailheads, parking and feature nodes in a bbox."""
+    return (f"[out:json][timeout:90];("
+            f'node["highway"="trailhead"]({s},{w},{n},{e});'
+            f'node["amenity"="parking"]({s},{w},{n},{e});'
+            f'node["natural"="waterfall"]({s},{w},{n},{e});'
+            f'node["waterway"="waterfall"]({s},{w},{n},{e});'
+            f'node["tourism"="viewpoint"]({s},{w},{n},{e});'
+            f'node["man_made"="tower"]["tower:type"="observation"]({s},{w},{n},{e});'
+            f'node["amenity"~"shelter|picnic_site|bench"]({s},{w},{n},{e});'
+            f'node["tourism"~"wilderness_hut|alpine_hut|picnic_site"]({s},{w},{n},{e});'
+            f'node["natural"~"cliff|rock|stone|cave_entrance|spring|arch|peak"]({s},{w},{n},{e});'
+            f");out;")
+
+
+def prefetch_tiles(boxes):
+    """The PREFETCH_TILE_DEG grid tiles (s, w, n, e) any bbox reaches."""
+    t = PREFETCH_TILE_DEG
+    tiles = set()
+    for s, w, n, e in boxes:
+        for row in range(math.floor(s / t), math.floor(n / t) + 1):
+            for col in range(math.floor(w / t), math.floor(e / t) + 1):
+                tiles.add((row, col))
+    return [(round(r * t, 6), round(c * t, 6), round((r + 1) * t, 6), round((c + 1) * t, 6))
+            for r, c in sorted(tiles)]
+
+
+def prefetch(paths, ctx):
+    """(index, failed_tiles): every POI node around the given routes, from
+    one Overpass query per tile, in a BoxIndex that process_trail() reads
+    instead of querying per trail. Nodes are kept in id order, the order a
+    per-trail query returns them in."""
+    tiles = prefetch_tiles(bbox_of(p) for p in paths)
+    print(f"Prefetching POIs: {len(tiles)} tile(s) for {len(paths)} route(s)…")
+    nodes, failed = {}, []
+    for tile in tiles:
+        els = overpass(poi_query(*tile), ctx)
+        if els is None:
+            failed.append(tile)
+            continue
+        for el in els:
+            if "lat" in el:
+                nodes[el["id"]] = el
+    index = BoxIndex(cell_deg=0.05)
+    for _, el in sorted(nodes.items()):
+        index.add(el["lat"], el["lon"], el["lat"], el["lon"], el)
+    print(f"  {len(nodes)} node(s)"
+          + (f", {len(failed)} tile(s) failed" if failed else "") + "\n")
+    return index, failed
+
+
+def nearest_mile(locator, pt, max_off_mi):
+    """Distance along the trail (miles) to pt's closest approach — measured
+    to the route's segments, not just its vertices — or None when pt is more
+    than max_off_mi off the route."""
+    return locator.mile(pt[0], pt[1], max_off_mi)
+
+
+def process_trail(d, ctx, max_off_mi=0.2, elements=None):
+    """Enrich one record in place; True when anything changed. `elements`
+    (a prefetch() index) answers from memory instead of querying Overpass."""
     t = (d.get("trails") or [{}])[0]
     path = [[p[0], p[1]] for p in (t.get("geo", {}).get("path") or [])]
     if len(path) < 2:
         return False
     s, w, n, e = bbox_of(path)
-    # cumulative distance along path
-    cum = [0.0]
-    for i in range(1, len(path)):
-        cum.append(cum[-1] + haversine_mi(path[i - 1], path[i]))
-
-    q = (f"[out:json][timeout:90];("
-         f'node["highway"="trailhead"]({s},{w},{n},{e});'
-         f'node["amenity"="parking"]({s},{w},{n},{e});'
-         f'node["natural"="waterfall"]({s},{w},{n},{e});'
-         f'node["waterway"="waterfall"]({s},{w},{n},{e});'
-         f'node["tourism"="viewpoint"]({s},{w},{n},{e});'
-         f'node["man_made"="tower"]["tower:type"="observation"]({s},{w},{n},{e});'
-         f'node["amenity"~"shelter|picnic_site|bench"]({s},{w},{n},{e});'
-         f'node["tourism"~"wilderness_hut|alpine_hut|picnic_site"]({s},{w},{n},{e});'
-         f'node["natural"~"cliff|rock|stone|cave_entrance|spring|arch|peak"]({s},{w},{n},{e});'
-         f");out;")
-    els = overpass(q, ctx)
+    # segment index + cumulative distance along path, built once
+    locator = RouteLocator(path)
+
+    if elements is None:
+        els = overpass(poi_query(s, w, n, e), ctx)
+    else:
+        els = elements.intersecting(s, w, n, e)
     if not els:
         return False
 
@@ -143,15 +187,15 @@ def process_trail(d, ctx, max_off_mi=0.2):
         pt = [el["lat"], el["lon"]]
         tags = el.get("tags", {})
         if tags.get("highway") == "trailhead":
-            trailheads.append((haversine_mi(start_pt, pt), pt, tags))
+            trailheads.append((geodesy.haversine_mi(start_pt, pt), pt, tags))
         elif tags.get("amenity") == "parking":
-            parkings.append((haversine_mi(start_pt, pt), pt, tags))
+            parkings.append((geodesy.haversine_mi(start_pt, pt), pt, tags))
         else:
             ftype = feature_type(tags)
             if not ftype:
                 continue
-            mile, off = nearest_mile(path, cum, pt)
-            if off <= max_off_mi and tags.get("name"):
+            mile = nearest_mile(locator, pt, max_off_mi)
+            if mile is not None and tags.get("name"):
                 features.append({"name": tags["name"], "type": ftype,
                                  "lat": round(pt[0], 5), "lon": round(pt[1], 5),
                                  "mile": mile})
@@ -194,26 +238,41 @@ def process_trail(d, ctx, max_off_mi=0.2):
 def main():
     args = sys.argv[1:]
     slug = None
+    prefetch_all = "--prefetch" in args
+    args = [a for a in args if a != "--prefetch"]
     if "--slug" in args:
         i = args.index("--slug"); slug = args[i + 1]; args = args[:i] + args[i + 2:]
     if not args:
-        sys.exit("Usage: python3 scripts/enrich-poi.py <state> [--slug <slug>]")
+        sys.exit("Usage: python3 scripts/enrich-poi.py <state> [--slug <slug>] [--prefetch]")
     state = args[0]
     if not (DATA / state).is_dir():
         sys.exit(f"❌ No data folder for '{state}'")
 
     ctx = ssl_context()
-    n = 0
+    todo = []
     for f in sorted((DATA / state).glob("*.json")):
         d = json.loads(f.read_text())
         if slug and d.get("slug") != slug:
             continue
         if not (d.get("trails") or [{}])[0].get("geo", {}).get("path"):
             continue  # needs a route first
-        if process_trail(d, ctx):
+        todo.append((f, d))
+
+    index, failed = None, []
+    if prefetch_all and todo:
+        paths = [[[p[0], p[1]] for p in d["trails"][0]["geo"]["path"]] for _, d in todo]
+        index, failed = prefetch([p for p in paths if len(p) >= 2], ctx)
+    n = 0
+    for f, d in todo:
+        if index is not None:
+            s, w, north, e = bbox_of(d["trails"][0]["geo"]["path"])
+            if any(s <= tn and north >= ts and w <= te and e >= tw
+                   for ts, tw, tn, te in failed):
+                print(f"  ⚠️  {d.get('name')}: POI tile unavailable, skipped")
+                continue
+        if process_trail(d, ctx, elements=index):
             f.write_text(json.dumps(d, indent=2) + "\n")
             n += 1
-        time.sleep(0.5)
     print(f"\nEnriched {n} trail(s) with trailhead / parking / features from OSM.")
 
 
@@ -24,6 +24,11 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+import route_metrics as rm  # noqa: E402
+import trail_graph  # noqa: E402
+
 
 def load(name):
     spec = importlib.util.spec_from_file_location(name.replace("-", "_"),
@@ -64,16 +69,16 @@ def main():
                                 radius_km, ctx, name_eq=trail_name)
         if not feats:
             continue
-        path = ft.assemble(feats)
+        path = trail_graph.assemble(feats)
         if not path or len(path) < 2:
             continue
-        length = ft.path_len_mi(path)
-        near = min(ft.haversine_mi(summit, p) for p in path)
+        length = geodesy.path_length_mi(path)
+        near = geodesy.nearest_vertex(summit, path)[1]
         print(f"  {label}: \"{feats[0]['name']}\" {round(length,1)} mi, "
               f"nearest point {round(near,1)} mi from summit")
         if length < 0.5 or length > 30 or near > radius_km * 0.7:
             continue
-        if not best or length > ft.path_len_mi(best[0]):
+        if not best or length > geodesy.path_length_mi(best[0]):
             best = (path, attr, feats[0]["name"])
     if not best:
         sys.exit("❌ no usable geometry found — try another name or radius")
@@ -81,14 +86,15 @@ def main():
     path, attr, matched = best
     # Long switchbacked routes (Barr's "Ws") lose real distance if crushed to
     # 120 points — budget ~25 points/mile instead.
-    raw_len = ft.path_len_mi(path)
+    raw_len = geodesy.path_length_mi(path)
     maxn = max(120, min(900, int(raw_len * 60)))
     path = ft.simplify(ft.orient_to_summit(path, summit), maxn=maxn)
-    eles = ee.batch_elevations([(p[0], p[1]) for p in path], ctx)
+    elev_sources = []
+    eles = ee.batch_elevations([(p[0], p[1]) for p in path], ctx, elev_sources)
     if len(eles) != len(path) or any(e is None for e in eles):
         sys.exit("❌ elevation fetch failed")
     path3 = [[p[0], p[1], round(e)] for p, e in zip(path, eles)]
-    dist = sum(ft.haversine_mi(path3[i - 1], path3[i]) for i in range(1, len(path3)))
+    dist = geodesy.path_length_mi(path3)
 
     t = d["trails"][0]
     geo = t.setdefault("geo", {})
@@ -98,8 +104,6 @@ def main():
     geo["markers"]["start"] = [path3[0][0], path3[0][1]]
     stats = t.setdefault("stats", {})
     stats["gain"] = round(max(eles) - min(eles))
-    sys.path.insert(0, str(ROOT / "scripts"))
-    import route_metrics as rm
     stats.pop("distance_source", None)  # freshly computed geometry
     rm.apply_to_trail(t)
     dist = stats["distance"]
@@ -107,7 +111,7 @@ def main():
     t["name"] = pretty if pretty.lower().endswith("trail") else f"{pretty} Trail"
     ds = d.setdefault("data_sources", {})
     ds["gps_source"] = attr
-    ds["elevation_source"] = "Open-Meteo (Copernicus 30 m DEM)"
+    ds["elevation_source"] = ee.elevation_source(elev_sources)
     ds["route_verified"] = str(date.today())
     path_file.write_text(json.dumps(d, indent=2) + "\n")
     print(f"✅ {d['name']}: installed \"{matched}\" — {round(dist,1)} mi, "
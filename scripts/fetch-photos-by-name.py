@@ -14,9 +14,7 @@ Usage:
 
 import glob
 import json
-import math
 import re
-import ssl
 import sys
 import time
 import urllib.parse
@@ -29,6 +27,12 @@ UA = {"User-Agent": "summitseeker/1.0 (trail photo enrichment)"}
 GENERIC = ("images.unsplash.com",)
 MAX_KM = 15.0
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+import http_cache  # noqa: E402
+import rate_limit  # noqa: E402
+from http_client import ssl_context  # noqa: E402
+
 # These specific peaks have failed automated matching multiple times across
 # independent runs (their Wikidata item's linked photo is reliably wrong —
 # an ironworks furnace and a boundary marker for Mount Riga, a wind farm in a
@@ -38,44 +42,30 @@ MAX_KM = 15.0
 NEVER_AUTO_MATCH = {"mount-riga-ct", "bakke-mountain-ma", "stratton-mountain-vt"}
 
 
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
-
-
 def api(url, ctx, retries=5):
     for attempt in range(retries):
         try:
             req = urllib.request.Request(url, headers=UA)
-            with urllib.request.urlopen(req, timeout=40, context=ctx) as r:
-                body = r.read()
-            return json.loads(body)
+            return http_cache.fetch(req, timeout=40, context=ctx)
+        except http_cache.OfflineMiss:
+            return {}
         except json.JSONDecodeError:
             # Wikimedia's rate-limit response is HTTP 200 with a plain-text
             # body ("You are making too many requests..."), not an HTTP
             # error — a short retry loop just fires again immediately and
-            # burns the whole budget in seconds. Back off hard.
-            print(f"    · rate-limited, backing off {15 * (attempt + 1)}s "
-                  f"[{attempt + 1}/{retries}]")
-            time.sleep(15 * (attempt + 1))
+            # burns the whole budget in seconds. Back off hard, for every
+            # process sharing the host's budget.
+            wait = 15 * (attempt + 1)
+            print(f"    · rate-limited, backing off {wait}s [{attempt + 1}/{retries}]")
+            if rate_limit.enabled():
+                rate_limit.throttled(urllib.parse.urlsplit(url).hostname, wait)
+            else:
+                time.sleep(wait)  # no shared budget to hold the next request
         except Exception:
             time.sleep(2 * (attempt + 1))
     return {}
 
 
-def km(a_lat, a_lon, b_lat, b_lon):
-    r = 6371
-    dlat = math.radians(b_lat - a_lat)
-    dlon = math.radians(b_lon - a_lon)
-    h = (math.sin(dlat / 2) ** 2 +
-         math.cos(math.radians(a_lat)) * math.cos(math.radians(b_lat)) *
-         math.sin(dlon / 2) ** 2)
-    return 2 * r * math.asin(math.sqrt(h))
-
-
 def search_qids(name, ctx):
     q = urllib.parse.quote(name)
     url = (f"https://www.wikidata.org/w/api.php?action=wbsearchentities"
@@ -118,7 +108,7 @@ def entity_photo(qids, lat, lon, ctx):
         claims = ents.get(qid, {}).get("claims", {})
         try:
             c = claims["P625"][0]["mainsnak"]["datavalue"]["value"]
-            if km(lat, lon, c["latitude"], c["longitude"]) > MAX_KM:
+            if geodesy.distance_km(lat, lon, c["latitude"], c["longitude"]) > MAX_KM:
                 continue
             fn = claims["P18"][0]["mainsnak"]["datavalue"]["value"]
             if NON_SCENIC_FILENAME.search(fn):
@@ -165,12 +155,11 @@ def main():
                 continue
             if not (m.get("lat") and m.get("lon")):
                 continue
+            # Every lookup is paced by the shared Wikimedia budget
+            # (rate_limit.RATES), not just successful ones — most peaks have
+            # no match, and firing those requests back-to-back is what
+            # triggered Wikimedia's rate limit in the first place.
             fn = entity_photo(search_qids(m["name"], ctx), m["lat"], m["lon"], ctx)
-            # Pace every lookup, not just successful ones — most peaks have
-            # no match, and firing those requests back-to-back with no
-            # delay is what triggers Wikimedia's rate limit in the first
-            # place (it did, mid-run, on the first attempt at this).
-            time.sleep(0.5)
             if not fn:
                 continue
             lic, artist = commons_meta(fn, ctx)
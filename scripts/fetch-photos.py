@@ -21,7 +21,6 @@ import glob
 import html
 import json
 import re
-import ssl
 import sys
 import time
 import urllib.parse
@@ -32,24 +31,21 @@ ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 UA = {"User-Agent": "summitseeker/1.0 (trail photo enrichment)"}
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import http_cache  # noqa: E402
+from http_client import ssl_context  # noqa: E402
+
 # The generic placeholders we want to replace (real photos are kept).
 GENERIC = ("images.unsplash.com",)
 
 
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
-
-
 def api(url, ctx, retries=3):
     for attempt in range(retries):
         try:
             req = urllib.request.Request(url, headers=UA)
-            with urllib.request.urlopen(req, timeout=40, context=ctx) as r:
-                return json.loads(r.read())
+            return http_cache.fetch(req, timeout=40, context=ctx)
+        except http_cache.OfflineMiss:
+            return {}
         except Exception:
             time.sleep(2 * (attempt + 1))
     return {}
@@ -92,7 +88,6 @@ def batch_p18(qids, ctx):
                         out[qid] = fn
                 except (KeyError, IndexError):
                     pass
-        time.sleep(0.3)
     return out
 
 
@@ -116,7 +111,6 @@ def batch_meta(filenames, ctx):
                 "license": info.get("LicenseShortName", {}).get("value", ""),
                 "artist": artist[:120],
             }
-        time.sleep(0.3)
     return out
 
 
@@ -16,13 +16,37 @@ This keeps trust: only real, vetted routes reach the site.
 Usage:
   python3 scripts/fetch-trails.py virginia
   python3 scripts/fetch-trails.py virginia --radius-km 4 --limit 10
+  python3 scripts/fetch-trails.py virginia --peaks 8
+  python3 scripts/fetch-trails.py colorado --harvest
+  python3 scripts/fetch-trails.py colorado --retry-misses
+
+Lookups are concurrent: every source is queried for a peak at once, and
+--peaks drafts (default 4) are in flight together. HOST_LIMITS caps the
+requests in flight per host; the pace of request starts is the shared
+cross-process budget in rate_limit.py. The chosen route is the one the old one-source-at-a-time
+pass picked, and files are written in the same order.
+
+--harvest is for whole-state runs: each ArcGIS source is paged through
+(resultOffset) once per 0.5° tile around the state's drafts, and every peak
+is then matched against those features locally — requests scale with the
+area covered instead of peaks x sources x 2. OSM stays a per-peak fallback,
+and so does ArcGIS near any tile that could not be read in full.
+
+Runs are checkpointed: every lookup is appended to a per-state journal
+(.cache/fetch-trails/<state>.jsonl) as it finishes — the outcome, the
+features each source returned, and the HTTP cache keys of its requests. A
+peak that was searched and has no trail is skipped on later runs until
+MISS_TTL_DAYS pass, its name/position or the source list change, or
+--retry-misses is given. A lookup only counts as a miss when every request
+it made returned usable data, so outages and offline replays never do.
 """
 
+import asyncio
+import hashlib
 import importlib.util
 import json
 import math
 import re
-import ssl
 import sys
 import time
 import urllib.error
@@ -73,23 +97,59 @@ _spec.loader.exec_module(_ee)
 
 # Canonical distance semantics (route_length_mi / distance_type / distance).
 sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+import http_cache  # noqa: E402
+import path_simplify  # noqa: E402
 import route_metrics as _rm  # noqa: E402
+from http_client import ssl_context  # noqa: E402
+from spatial_index import BoxIndex  # noqa: E402
+from trail_graph import assemble  # noqa: E402
 
 
-def ssl_context():
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
+def envelope(lat, lon, radius_km):
+    """(west, south, east, north) of the box query_source sends."""
+    dlat = radius_km / 111.0
+    dlon = radius_km / (111.0 * max(0.2, math.cos(math.radians(lat))))
+    return lon - dlon, lat - dlat, lon + dlon, lat + dlat
 
 
-def haversine_mi(a, b):
-    R = 3959
-    p1, p2 = math.radians(a[0]), math.radians(b[0])
-    dlat = math.radians(b[0] - a[0]); dlon = math.radians(b[1] - a[1])
-    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(h))
+def name_base(name):
+    """The name without a segment suffix.
+
+    Services often split one trail into suffix-named segments ("North Longs
+    Peak - Upper" / "- Lower"). Matching on the base name returns every
+    segment; the stitcher keeps the connected chain.
+    """
+    return re.sub(r"\s*[-–]\s*[A-Za-z0-9 ]{1,12}$", "", name).strip() or name
+
+
+def arcgis_get(url, params, ctx):
+    """One GeoJSON query against an ArcGIS REST layer; None if it fails."""
+    full = f"{url}?{urllib.parse.urlencode(params)}"
+    req = urllib.request.Request(full, headers={"User-Agent": "summitseeker/1.0"})
+    for attempt in range(3):
+        try:
+            return http_cache.fetch(req, timeout=60, context=ctx)
+        except http_cache.OfflineMiss:
+            break
+        except urllib.error.URLError as e:
+            if "CERTIFICATE_VERIFY_FAILED" in str(e):
+                sys.exit("❌ TLS cert verification failed (macOS/python.org). Fix:\n"
+                         "   /Applications/Python\\ 3.13/Install\\ Certificates.command")
+            time.sleep(2 ** attempt)
+        except Exception:
+            time.sleep(2 ** attempt)
+    return None
+
+
+def normalize(ft, name_field, order_field):
+    """An ArcGIS GeoJSON feature as {name, order, lines:[[ [lon,lat],... ]]}."""
+    props = ft.get("properties") or {}
+    return {
+        "name": props.get(name_field) or "Unnamed",
+        "order": (props.get(order_field) or 0) if order_field else 0,
+        "lines": coords_of(ft),
+    }
 
 
 def query_source(url, name_field, order_field, lat, lon, radius_km, ctx,
@@ -102,48 +162,155 @@ def query_source(url, name_field, order_field, lat, lon, radius_km, ctx,
     bbox clips long approach trails (Barr Trail is 13 mi; a 4 km box keeps
     only the summit fragment).
     """
-    dlat = radius_km / 111.0
-    dlon = radius_km / (111.0 * max(0.2, math.cos(math.radians(lat))))
-    bbox = f"{lon - dlon},{lat - dlat},{lon + dlon},{lat + dlat}"
+    west, south, east, north = envelope(lat, lon, radius_km)
     out_fields = name_field + ("," + order_field if order_field else "")
     where = "1=1"
     if name_eq:
-        # Services often split one trail into suffix-named segments
-        # ("North Longs Peak - Upper" / "- Lower"). Match on the base name so
-        # all segments return; the stitcher keeps the connected chain.
-        base = re.sub(r"\s*[-–]\s*[A-Za-z0-9 ]{1,12}$", "", name_eq).strip() or name_eq
-        safe = base.replace(chr(39), chr(39) * 2)
+        safe = name_base(name_eq).replace(chr(39), chr(39) * 2)
         where = f"{name_field} LIKE '{safe}%'"
     params = {
-        "geometry": bbox, "geometryType": "esriGeometryEnvelope",
+        "geometry": f"{west},{south},{east},{north}",
+        "geometryType": "esriGeometryEnvelope",
         "inSR": "4326", "outSR": "4326",
         "spatialRel": "esriSpatialRelIntersects", "where": where,
         "outFields": out_fields, "returnGeometry": "true", "f": "geojson",
     }
-    full = f"{url}?{urllib.parse.urlencode(params)}"
-    req = urllib.request.Request(full, headers={"User-Agent": "summitseeker/1.0"})
-    feats = []
-    for attempt in range(3):
-        try:
-            with urllib.request.urlopen(req, timeout=60, context=ctx) as resp:
-                feats = json.loads(resp.read()).get("features", [])
-            break
-        except urllib.error.URLError as e:
-            if "CERTIFICATE_VERIFY_FAILED" in str(e):
-                sys.exit("❌ TLS cert verification failed (macOS/python.org). Fix:\n"
-                         "   /Applications/Python\\ 3.13/Install\\ Certificates.command")
-            time.sleep(2 ** attempt)
-        except Exception:
-            time.sleep(2 ** attempt)
-    norm_feats = []
-    for ft in feats:
-        props = ft.get("properties") or {}
-        norm_feats.append({
-            "name": props.get(name_field) or "Unnamed",
-            "order": (props.get(order_field) or 0) if order_field else 0,
-            "lines": coords_of(ft),
-        })
-    return norm_feats
+    feats = (arcgis_get(url, params, ctx) or {}).get("features", [])
+    return [normalize(ft, name_field, order_field) for ft in feats]
+
+
+# Harvest mode (--harvest): instead of two envelope queries per peak per
+# source, page through each source once per HARVEST_TILE_DEG tile around the
+# state's drafts, keep the features in a BoxIndex, and answer every peak's
+# query from that. Requests then scale with area, not with peak count. A
+# tile that could not be read in full (a page failed, or HARVEST_MAX_PAGES
+# ran out) is never trusted: peaks whose query box touches it are queried
+# per peak, as without --harvest.
+HARVEST_TILE_DEG = 0.5
+HARVEST_PAGE = 1000       # resultRecordCount; services cap at maxRecordCount
+HARVEST_MAX_PAGES = 200
+FULL_ROUTE_RADIUS_KM = 25.0  # the name_eq refetch box
+
+
+def harvest_tile(url, name_field, order_field, tile, ctx):
+    """Every feature of one source that intersects tile (west, south, east,
+    north), following resultOffset paging: (raw GeoJSON features, complete).
+    complete is False when a page failed or the page cap cut paging short."""
+    out_fields = name_field + ("," + order_field if order_field else "")
+    feats, seen = [], set()
+    offset = 0
+    for _ in range(HARVEST_MAX_PAGES):
+        params = {
+            "geometry": ",".join(str(v) for v in tile),
+            "geometryType": "esriGeometryEnvelope",
+            "inSR": "4326", "outSR": "4326",
+            "spatialRel": "esriSpatialRelIntersects", "where": "1=1",
+            "outFields": out_fields, "returnGeometry": "true", "f": "geojson",
+            "resultOffset": offset, "resultRecordCount": HARVEST_PAGE,
+        }
+        data = arcgis_get(url, params, ctx)
+        if data is None or "error" in data:
+            return feats, False
+        page = data.get("features", [])
+        new = 0
+        for ft in page:
+            key = feature_key(ft)
+            if key not in seen:
+                seen.add(key)
+                feats.append(ft)
+                new += 1
+        more = (data.get("exceededTransferLimit")
+                or (data.get("properties") or {}).get("exceededTransferLimit"))
+        # new == 0: a service without paging support answers every offset
+        # with the same first page.
+        if not new or not (more or len(page) >= HARVEST_PAGE):
+            return feats, True
+        offset += len(page)
+    return feats, False
+
+
+def feature_key(ft):
+    """Identity of a GeoJSON feature across tiles and pages."""
+    if ft.get("id") is not None:
+        return ft["id"]
+    return json.dumps([ft.get("properties"), ft.get("geometry")], sort_keys=True)
+
+
+def harvest_tiles(points, radius_km):
+    """The HARVEST_TILE_DEG grid tiles any point's query box can reach."""
+    t = HARVEST_TILE_DEG
+    cells = set()
+    for lat, lon in points:
+        west, south, east, north = envelope(lat, lon, radius_km)
+        for row in range(math.floor(south / t), math.floor(north / t) + 1):
+            for col in range(math.floor(west / t), math.floor(east / t) + 1):
+                cells.add((row, col))
+    return [(col * t, row * t, (col + 1) * t, (row + 1) * t)
+            for row, col in sorted(cells)]
+
+
+def _segment_hits_box(a, b, west, south, east, north):
+    """Does segment a-b ([lon, lat] ends) touch the box? (Liang–Barsky)"""
+    x0, y0 = a[0], a[1]
+    dx, dy = b[0] - x0, b[1] - y0
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x0 - west), (dx, east - x0), (-dy, y0 - south), (dy, north - y0)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        r = q / p
+        if p < 0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+        if t0 > t1:
+            return False
+    return True
+
+
+class HarvestedSource:
+    """One source's harvested features, queried like query_source."""
+
+    def __init__(self):
+        self.index = BoxIndex(cell_deg=0.05)
+        self._seen = set()
+        self.incomplete = []  # (west, south, east, north) tiles not read in full
+
+    def covers(self, lat, lon, radius_km):
+        """Can query() answer this box? Not if it touches an incomplete tile."""
+        west, south, east, north = envelope(lat, lon, radius_km)
+        return not any(w <= east and west <= e and s <= north and south <= n
+                       for w, s, e, n in self.incomplete)
+
+    def add(self, raw_feats, name_field, order_field):
+        for ft in raw_feats:
+            key = feature_key(ft)
+            if key in self._seen:
+                continue  # returned by more than one tile
+            self._seen.add(key)
+            f = normalize(ft, name_field, order_field)
+            pts = [pt for line in f["lines"] for pt in line]
+            if not pts:
+                continue
+            lons, lats = [pt[0] for pt in pts], [pt[1] for pt in pts]
+            self.index.add(min(lats), min(lons), max(lats), max(lons), f)
+
+    def query(self, lat, lon, radius_km, name_eq=None):
+        """What query_source would return, from the harvested features."""
+        west, south, east, north = envelope(lat, lon, radius_km)
+        base = name_base(name_eq) if name_eq else None
+        out = []
+        for f in self.index.intersecting(south, west, north, east):
+            if base is not None and not f["name"].startswith(base):
+                continue
+            if any((len(line) == 1 and west <= line[0][0] <= east
+                    and south <= line[0][1] <= north)
+                   or any(_segment_hits_box(line[i], line[i + 1], west, south, east, north)
+                          for i in range(len(line) - 1))
+                   for line in f["lines"]):
+                out.append(f)
+        return out
 
 
 OVERPASS = "https://overpass-api.de/api/interpreter"
@@ -166,9 +333,10 @@ def query_osm_paths(lat, lon, radius_km, ctx):
         headers={"User-Agent": "summitseeker/1.0 (trail fetcher)"})
     for attempt in range(3):
         try:
-            with urllib.request.urlopen(req, timeout=90, context=ctx) as resp:
-                els = json.loads(resp.read()).get("elements", [])
+            els = http_cache.fetch(req, timeout=90, context=ctx).get("elements", [])
             break
+        except http_cache.OfflineMiss:
+            return []
         except Exception:
             time.sleep(3 * (attempt + 1))
     else:
@@ -202,80 +370,12 @@ def norm(s):
     return re.sub(r"[^a-z0-9]+", " ", s).strip()
 
 
-JOIN_GAP_MI = 0.12  # segments whose endpoints are farther apart than this
-                    # are disconnected pieces, not a continuation
-
-
-def assemble(features):
-    """Stitch a trail's segments into one CONTINUOUS [lat,lon] path.
-
-    GIS services return a trail as many independent polylines, often disjoint
-    (parallel spurs, far-apart pieces sharing a name). Naively concatenating
-    them draws long straight jumps across the map. Instead: greedy endpoint
-    chaining — start from the longest segment, repeatedly attach the segment
-    whose nearest endpoint is within JOIN_GAP_MI of the chain's ends (reversing
-    as needed), and DROP anything that doesn't connect. The result is the
-    longest continuous run, which is what a hiker actually walks.
-    """
-    segs = []
-    for f in sorted(features, key=lambda f: f.get("order") or 0):
-        for line in f.get("lines", []):
-            pts = [[round(lat, 5), round(lon, 5)] for lon, lat in line]
-            if len(pts) >= 2:
-                segs.append(pts)
-    if not segs:
-        return []
-
-    def seg_len(s):
-        return sum(haversine_mi(s[i - 1], s[i]) for i in range(1, len(s)))
-
-    segs.sort(key=seg_len, reverse=True)
-    chain = list(segs.pop(0))
-
-    attached = True
-    while attached and segs:
-        attached = False
-        best = None  # (gap, idx, at_start, reverse)
-        for i, s in enumerate(segs):
-            for at_start in (False, True):
-                end = chain[0] if at_start else chain[-1]
-                for rev in (False, True):
-                    tip = (s[-1] if rev else s[0]) if not at_start else \
-                          (s[0] if rev else s[-1])
-                    gap = haversine_mi(end, tip)
-                    if gap <= JOIN_GAP_MI and (best is None or gap < best[0]):
-                        best = (gap, i, at_start, rev)
-        if best:
-            _, i, at_start, rev = best
-            s = segs.pop(i)
-            if rev:
-                s = list(reversed(s))
-            if at_start:
-                chain = s + chain
-            else:
-                chain = chain + s
-            attached = True
-
-    # de-dup consecutive identical points
-    path = [chain[0]]
-    for p in chain[1:]:
-        if p != path[-1]:
-            path.append(p)
-    return path
-
-
 def simplify(path, maxn=120):
+    """At most maxn points, chosen by shape (path_simplify.py) rather than
+    every k-th, so switchback corners and the summit end survive."""
     if len(path) <= maxn:
         return path
-    step = len(path) / maxn
-    out = [path[int(i * step)] for i in range(maxn)]
-    if out[-1] != path[-1]:
-        out.append(path[-1])
-    return out
-
-
-def path_len_mi(path):
-    return sum(haversine_mi(path[i - 1], path[i]) for i in range(1, len(path)))
+    return path_simplify.simplify(path, max_points=maxn, tolerance_m=0)
 
 
 # A proximity (non-name) match must look like a real day hike. Too short = a
@@ -297,13 +397,13 @@ def pick_trail(features, peak_name, summit, radius_mi):
         path = assemble(feats)
         if len(path) < 2:
             continue
-        near = min(haversine_mi(summit, p) for p in path)
+        near = geodesy.nearest_vertex(summit, path)[1]
         if near > radius_mi:
             continue
         tn = norm(name)
         name_match = bool(peak) and (peak in tn or tn in peak
                                      or bool(set(peak.split()) & set(tn.split())))
-        length = path_len_mi(path)
+        length = geodesy.path_length_mi(path)
         if not name_match:
             if length < PROX_MIN_MI or length > PROX_MAX_MI:
                 continue  # implausible as this peak's route
@@ -323,17 +423,251 @@ def pick_trail(features, peak_name, summit, radius_mi):
 
 def orient_to_summit(path, summit):
     """Make the summit-end last so the 'summit' marker is the destination."""
-    if haversine_mi(path[0], summit) < haversine_mi(path[-1], summit):
+    if geodesy.haversine_mi(path[0], summit) < geodesy.haversine_mi(path[-1], summit):
         return list(reversed(path))
     return path
 
 
-def process(state, slug_filter, radius_km, limit, ctx):
-    files = sorted((DATA / state).glob("*.json"))
-    done = 0
-    for f in files:
-        if limit and done >= limit:
-            break
+# Requests in flight per host. The federal ArcGIS services take a few
+# parallel queries; Overpass asks for about one client slot. How often
+# requests may start is rate_limit.RATES, shared with every other process.
+HOST_LIMITS = {
+    "overpass-api.de": 1,
+    "api.open-meteo.com": 2,
+}
+DEFAULT_HOST_LIMIT = 3
+
+
+class HostBudget:
+    """Runs blocking fetches on worker threads, at most HOST_LIMITS per host.
+
+    The fetchers stay plain urllib (and so keep http_cache, retries,
+    offline replay and the shared rate limiter); the event loop only decides
+    how many run at once.
+    """
+
+    def __init__(self):
+        self._slots = {}     # host -> Semaphore
+
+    async def run(self, url, fn, *args, **kwargs):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+        async with self._slots[host]:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+async def source_query(budget, harvest, url, nf, of, lat, lon, radius_km, ctx,
+                       name_eq=None):
+    """query_source, answered from the harvest when the source was harvested
+    and every tile the query box touches was read in full."""
+    if harvest and url in harvest and harvest[url].covers(lat, lon, radius_km):
+        return harvest[url].query(lat, lon, radius_km, name_eq=name_eq)
+    return await budget.run(url, query_source, url, nf, of, lat, lon, radius_km, ctx,
+                            name_eq=name_eq)
+
+
+async def harvest_sources(points, radius_km, ctx, budget):
+    """{url: HarvestedSource} for every ArcGIS source, covering the query
+    boxes (discovery and full-route) of every point."""
+    tiles = harvest_tiles(points, max(radius_km, FULL_ROUTE_RADIUS_KM))
+    jobs = [(url, nf, of, tile) for _, url, nf, of, _ in SOURCES for tile in tiles]
+    print(f"  · harvesting {len(tiles)} tile(s) x {len(SOURCES)} source(s)…")
+    pages = await asyncio.gather(*(budget.run(url, harvest_tile, url, nf, of, tile, ctx)
+                                   for url, nf, of, tile in jobs))
+    harvest = {url: HarvestedSource() for _, url, _, _, _ in SOURCES}
+    for (url, nf, of, tile), (feats, complete) in zip(jobs, pages):
+        harvest[url].add(feats, nf, of)
+        if not complete:
+            harvest[url].incomplete.append(tile)
+    for label, url, *_ in SOURCES:
+        print(f"    {label}: {len(harvest[url].index)} feature(s)")
+        if harvest[url].incomplete:
+            print(f"    ⚠ {label}: {len(harvest[url].incomplete)} tile(s) not read in "
+                  f"full (failed or over {HARVEST_MAX_PAGES} pages); peaks near them "
+                  f"are queried directly")
+    return harvest
+
+
+async def find_route(d, radius_km, ctx, budget, harvest=None, sources=None):
+    """The route for one peak: a dict for write_route(), or None. `sources`,
+    if given, is filled with the feature count each source returned."""
+    summit = [d["lat"], d["lon"]]
+    radius_mi = radius_km * 0.621
+    # Ask every public-domain source at once, then choose exactly as a
+    # sequential pass in SOURCES order would: a name match wins immediately,
+    # else the first source with any hit.
+    results = await asyncio.gather(*(
+        source_query(budget, harvest, url, nf, of, d["lat"], d["lon"], radius_km, ctx)
+        for _, url, nf, of, _ in SOURCES))
+    name = path = None
+    name_match = False
+    src_attr = ""
+    src_url = src_nf = src_of = None
+    if sources is not None:
+        sources.update((src[0], len(feats)) for src, feats in zip(SOURCES, results))
+    for (label, url, nf, of, attr), feats in zip(SOURCES, results):
+        if not feats:
+            continue
+        n, p, nm = pick_trail(feats, d["name"], summit, radius_mi=radius_mi)
+        if p and (nm or not path):   # take a name match immediately; else keep first hit
+            name, path, name_match, src_attr = n, p, nm, attr
+            src_url, src_nf, src_of = url, nf, of
+            if nm:
+                break
+    if not path:
+        # Last resort: named OSM ways (state parks / local trails that
+        # the federal services don't carry). Only asked when the federal
+        # sources came up empty — Overpass is the scarcest budget.
+        feats = await budget.run(OVERPASS, query_osm_paths,
+                                 d["lat"], d["lon"], radius_km, ctx)
+        if sources is not None:
+            sources["OSM"] = len(feats)
+        if feats:
+            n, p, nm = pick_trail(feats, d["name"], summit, radius_mi=radius_mi)
+            if p:
+                name, path, name_match = n, p, nm
+                src_attr = "OpenStreetMap contributors (ODbL)"
+                src_url = None  # no ArcGIS name_eq expansion for OSM
+    if not path:
+        return None
+
+    # Name-matched: refetch that trail's FULL geometry with a wide bbox —
+    # the discovery bbox clips long approach routes. Use it if longer
+    # (still capped by assemble()'s connectivity stitching, trail_graph.py).
+    if name_match and name and name != "Unnamed" and src_url:
+        full_feats = await source_query(budget, harvest, src_url, src_nf, src_of,
+                                        d["lat"], d["lon"], FULL_ROUTE_RADIUS_KM, ctx,
+                                        name_eq=name)
+        if full_feats:
+            full_path = assemble(full_feats)
+            if len(full_path) >= 2:
+                full_len = geodesy.path_length_mi(full_path)
+                near = geodesy.nearest_vertex(summit, full_path)[1]
+                if (full_len > geodesy.path_length_mi(path) and full_len <= 30
+                        and near <= radius_mi):
+                    path = full_path
+    path = simplify(orient_to_summit(path, summit))
+    elev_sources = []
+    eles = await budget.run(_ee.ELEV_API, _ee.batch_elevations,
+                            [(p[0], p[1]) for p in path], ctx, elev_sources)
+    return {"name": name, "path": path, "name_match": name_match,
+            "src_attr": src_attr, "eles": eles, "elev_sources": elev_sources}
+
+
+JOURNAL_DIR = ROOT / ".cache" / "fetch-trails"
+MISS_TTL_DAYS = 30  # ArcGIS services change slowly (http_cache keeps them 30 days)
+
+
+class Journal:
+    """Per-state checkpoint journal: one JSON line per finished lookup; the
+    latest line for a slug is its state."""
+
+    def __init__(self, state, radius_km):
+        self.path = JOURNAL_DIR / f"{state}.jsonl"
+        self.radius_km = radius_km
+        self.entries = {}
+        lines = 0
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                self.entries[e["slug"]] = e
+                lines += 1
+        if lines > 2 * len(self.entries) + 100:
+            self._rewrite()
+
+    def _rewrite(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text("".join(json.dumps(e) + "\n" for e in self.entries.values()))
+        tmp.replace(self.path)
+
+    def attempt_key(self, d):
+        """What a lookup depends on; a change means search again."""
+        basis = [d.get("name"), round(d["lat"], 5), round(d["lon"], 5), self.radius_km,
+                 [src[1] for src in SOURCES]]
+        return hashlib.sha1(json.dumps(basis).encode()).hexdigest()[:16]
+
+    def known_miss(self, d):
+        e = self.entries.get(d.get("slug"))
+        return (e is not None and e["outcome"] == "miss"
+                and e["key"] == self.attempt_key(d)
+                and time.time() - e["at"] < MISS_TTL_DAYS * 86400)
+
+    def record(self, d, route, sources, requests):
+        """Append one lookup. requests is http_cache.record()'s [(key, ok)]."""
+        ok = {k for k, good in requests if good}
+        failed = sorted({k for k, good in requests if not good} - ok)
+        if route is not None:
+            outcome = "route"
+        elif failed:
+            outcome = "error"
+        else:
+            outcome = "miss"
+        e = {"slug": d.get("slug"), "key": self.attempt_key(d), "at": round(time.time()),
+             "outcome": outcome, "sources": sources,
+             "requests": sorted(ok), "failed": failed}
+        self.entries[e["slug"]] = e
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as fh:
+            fh.write(json.dumps(e) + "\n")
+
+
+def write_route(f, d, route):
+    """Attach a find_route() result to the record and save it. False when
+    the elevation profile is incomplete."""
+    t = (d.get("trails") or [{}])[0]
+    summit = [d["lat"], d["lon"]]
+    path, eles = route["path"], route["eles"]
+    # batch_elevations now index-aligns its output with `path` and fills
+    # None for any point whose chunk failed, rather than silently
+    # dropping it (a dropped point used to misalign every point after
+    # it). So the length check alone no longer proves every point has a
+    # real value — a partial failure can still slip through as None.
+    if len(eles) != len(path) or any(e is None for e in eles):
+        print(f"  · elevation fetch failed for {d['name']}")
+        return False
+    path3 = [[p[0], p[1], round(e)] for p, e in zip(path, eles)]
+    dist = geodesy.path_length_mi(path3)
+    geo = t.setdefault("geo", {})
+    geo["path"] = path3
+    geo["chart"] = _ee.build_chart(path3)
+    geo.setdefault("markers", {})["summit"] = [summit[0], summit[1]]
+    geo["markers"]["start"] = [path3[0][0], path3[0][1]]
+    stats = t.setdefault("stats", {})
+    # `dist` is one traverse of the geometry. The hiked distance — what the
+    # NPS difficulty formula needs — is twice that for an out-and-back.
+    # route_metrics owns this rule for every caller.
+    stats["gain"] = round(max(eles) - min(eles))
+    stats.pop("distance_source", None)  # freshly computed geometry
+    _rm.apply_to_trail(t)
+    ds = d.setdefault("data_sources", {})
+    ds["gps_source"] = route["src_attr"]
+    ds["elevation_source"] = _ee.elevation_source(route["elev_sources"])
+    ds["route_verified"] = str(date.today())
+    f.write_text(json.dumps(d, indent=2) + "\n")
+    flag = "name-match" if route["name_match"] else "proximity"
+    print(f"  ✅ {d['name']:<26} ← \"{route['name']}\" ({flag}, {round(dist,1)}mi, "
+          f"{len(path3)}pts)")
+    return True
+
+
+def process(state, slug_filter, radius_km, limit, ctx, peaks=4, harvest=False,
+            retry_misses=False):
+    return asyncio.run(process_async(state, slug_filter, radius_km, limit, ctx,
+                                     peaks, harvest, retry_misses))
+
+
+async def process_async(state, slug_filter, radius_km, limit, ctx, peaks=4,
+                        harvest=False, retry_misses=False):
+    """Look up `peaks` drafts at a time; results are written and reported in
+    file order, so output is the same as a one-at-a-time run."""
+    journal = Journal(state, radius_km)
+    todo = []
+    skipped = 0
+    for f in sorted((DATA / state).glob("*.json")):
         d = json.loads(f.read_text())
         t = (d.get("trails") or [{}])[0]
         if t.get("geo", {}).get("path"):
@@ -342,90 +676,53 @@ def process(state, slug_filter, radius_km, limit, ctx):
             continue
         if slug_filter and d.get("slug") != slug_filter:
             continue
-        summit = [d["lat"], d["lon"]]
-        # Try each public-domain source in order; prefer a name match.
-        name = path = None
-        name_match = False
-        src_attr = ""
-        src_url = src_nf = src_of = None
-        for label, url, nf, of, attr in SOURCES:
-            feats = query_source(url, nf, of, d["lat"], d["lon"], radius_km, ctx)
-            if not feats:
-                continue
-            n, p, nm = pick_trail(feats, d["name"], summit, radius_mi=radius_km * 0.621)
-            if p and (nm or not path):   # take a name match immediately; else keep first hit
-                name, path, name_match, src_attr = n, p, nm, attr
-                src_url, src_nf, src_of = url, nf, of
-                if nm:
-                    break
-        if not path:
-            # Last resort: named OSM ways (state parks / local trails that
-            # the federal services don't carry).
-            feats = query_osm_paths(d["lat"], d["lon"], radius_km, ctx)
-            if feats:
-                n, p, nm = pick_trail(feats, d["name"], summit,
-                                      radius_mi=radius_km * 0.621)
-                if p:
-                    name, path, name_match = n, p, nm
-                    src_attr = "OpenStreetMap contributors (ODbL)"
-                    src_url = None  # no ArcGIS name_eq expansion for OSM
-        if not path:
-            print(f"  · no USFS/NPS trail near {d['name']}")
-            continue
-
-        # Name-matched: refetch that trail's FULL geometry with a wide bbox —
-        # the discovery bbox clips long approach routes. Use it if longer
-        # (still capped by assemble()'s connectivity stitching).
-        if name_match and name and name != "Unnamed" and src_url:
-            full_feats = query_source(src_url, src_nf, src_of, d["lat"], d["lon"],
-                                      25.0, ctx, name_eq=name)
-            if full_feats:
-                full_path = assemble(full_feats)
-                if len(full_path) >= 2:
-                    full_len = path_len_mi(full_path)
-                    near = min(haversine_mi(summit, p) for p in full_path)
-                    if (full_len > path_len_mi(path) and full_len <= 30
-                            and near <= radius_km * 0.621):
-                        path = full_path
-        path = simplify(orient_to_summit(path, summit))
-        eles = _ee.batch_elevations([(p[0], p[1]) for p in path], ctx)
-        # batch_elevations now index-aligns its output with `path` and fills
-        # None for any point whose chunk failed, rather than silently
-        # dropping it (a dropped point used to misalign every point after
-        # it). So the length check alone no longer proves every point has a
-        # real value — a partial failure can still slip through as None.
-        if len(eles) != len(path) or any(e is None for e in eles):
-            print(f"  · elevation fetch failed for {d['name']}")
+        if not retry_misses and journal.known_miss(d):
+            skipped += 1
             continue
-        path3 = [[p[0], p[1], round(e)] for p, e in zip(path, eles)]
-        dist = sum(haversine_mi(path3[i - 1], path3[i]) for i in range(1, len(path3)))
-        geo = t.setdefault("geo", {})
-        geo["path"] = path3
-        geo["chart"] = _ee.build_chart(path3)
-        geo.setdefault("markers", {})["summit"] = [summit[0], summit[1]]
-        geo["markers"]["start"] = [path3[0][0], path3[0][1]]
-        stats = t.setdefault("stats", {})
-        # `dist` is one traverse of the geometry. The hiked distance — what the
-        # NPS difficulty formula needs — is twice that for an out-and-back.
-        # route_metrics owns this rule for every caller.
-        stats["gain"] = round(max(eles) - min(eles))
-        stats.pop("distance_source", None)  # freshly computed geometry
-        _rm.apply_to_trail(t)
-        ds = d.setdefault("data_sources", {})
-        ds["gps_source"] = src_attr
-        ds["elevation_source"] = "Open-Meteo (Copernicus 30 m DEM)"
-        ds["route_verified"] = str(date.today())
-        f.write_text(json.dumps(d, indent=2) + "\n")
-        flag = "name-match" if name_match else "proximity"
-        print(f"  ✅ {d['name']:<26} ← \"{name}\" ({flag}, {round(dist,1)}mi, "
-              f"{len(path3)}pts)")
-        done += 1
+        todo.append((f, d))
+    if skipped:
+        print(f"  · skipping {skipped} peak(s) with no trail found in the last "
+              f"{MISS_TTL_DAYS} days (--retry-misses to search again)")
+
+    budget = HostBudget()
+    harvested = None
+    if harvest and todo:
+        harvested = await harvest_sources([(d["lat"], d["lon"]) for _, d in todo],
+                                          radius_km, ctx, budget)
+    window = asyncio.Semaphore(max(1, peaks))
+
+    async def lookup(d):
+        async with window:
+            requests, sources = [], {}
+            http_cache.record(requests)  # this task's context only
+            route = await find_route(d, radius_km, ctx, budget, harvested, sources)
+            journal.record(d, route, sources, requests)
+            return route
+
+    # Semaphore waiters are served first-come, so lookups start in file order.
+    tasks = [asyncio.ensure_future(lookup(d)) for _, d in todo]
+    done = 0
+    try:
+        for (f, d), task in zip(todo, tasks):
+            if limit and done >= limit:
+                break
+            route = await task
+            if route is None:
+                print(f"  · no USFS/NPS trail near {d['name']}")
+                continue
+            if write_route(f, d, route):
+                done += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     return done
 
 
 def main():
     args = sys.argv[1:]
-    radius_km, limit, slug = 4.0, None, None
+    radius_km, limit, slug, peaks = 4.0, None, None, 4
+    harvest = retry_misses = False
     pos = []
     i = 0
     while i < len(args):
@@ -436,11 +733,18 @@ def main():
             limit = int(args[i + 1]); i += 2
         elif a == "--slug":
             slug = args[i + 1]; i += 2
+        elif a == "--peaks":
+            peaks = int(args[i + 1]); i += 2
+        elif a == "--harvest":
+            harvest = True; i += 1
+        elif a == "--retry-misses":
+            retry_misses = True; i += 1
         else:
             pos.append(a); i += 1
     if not pos:
         sys.exit("Usage: python3 scripts/fetch-trails.py <state> "
-                 "[--radius-km 4] [--limit N] [--slug <slug>]")
+                 "[--radius-km 4] [--limit N] [--slug <slug>] [--peaks 4] [--harvest] "
+                 "[--retry-misses]")
     state = pos[0]
     if not (DATA / state).is_dir():
         sys.exit(f"❌ No data folder for '{state}'")
@@ -449,7 +753,7 @@ def main():
     print(f"Fetching trail routes for drafts in {state} "
           f"(radius {radius_km} km, sources: {', '.join(s[0] for s in SOURCES)})…")
     ctx = ssl_context()
-    n = process(state, slug, radius_km, limit, ctx)
+    n = process(state, slug, radius_km, limit, ctx, peaks, harvest, retry_misses)
     print(f"\nAttached routes to {n} trail(s). Now run:")
     print(f"  python3 scripts/run-pipeline.py --state {state}")
     print(f"  python3 scripts/curate-state.py {state}   # publishes the ones that pass quality")
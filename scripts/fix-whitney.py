@@ -2,18 +2,6 @@
 import json
 import math
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 3959
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
 def interpolate_points(start, end, num_points, start_ele, end_ele):
     points = []
     for i in range(num_points + 1):
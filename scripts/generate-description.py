@@ -32,7 +32,6 @@ Usage:
 
 import glob
 import json
-import math
 import sys
 from pathlib import Path
 
@@ -40,6 +39,10 @@ ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 CITIES = ROOT / "website" / "src" / "data-static" / "cities.json"
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+from route_locator import RouteLocator  # noqa: E402
+
 # Approximate regional treeline (ft). Only used for a "crosses treeline"
 # sentence when start elevation is clearly below and summit clearly above.
 TREELINE = {
@@ -49,6 +52,9 @@ TREELINE = {
     "new-hampshire": 4400, "maine": 4000, "vermont": 4000, "new-york": 4500,
 }
 
+# A feature farther than this from the route isn't "along the way".
+FEATURE_MAX_OFF_MI = 0.2
+
 # Season phrasing by broad region. Factual, not scenic.
 DESERT = {"arizona", "nevada", "new-mexico", "utah", "texas"}
 SOUTH = {"alabama", "arkansas", "florida", "georgia", "kentucky", "louisiana",
@@ -66,23 +72,9 @@ def fmt(n):
         return None
 
 
-def hav_mi(a_lat, a_lon, b_lat, b_lon):
-    r = 3959
-    dlat = math.radians(b_lat - a_lat)
-    dlon = math.radians(b_lon - a_lon)
-    h = (math.sin(dlat / 2) ** 2 + math.cos(math.radians(a_lat))
-         * math.cos(math.radians(b_lat)) * math.sin(dlon / 2) ** 2)
-    return 2 * r * math.asin(math.sqrt(h))
-
-
 def bearing_word(a_lat, a_lon, b_lat, b_lon):
     """Compass direction from a -> b."""
-    dlon = math.radians(b_lon - a_lon)
-    y = math.sin(dlon) * math.cos(math.radians(b_lat))
-    x = (math.cos(math.radians(a_lat)) * math.sin(math.radians(b_lat))
-         - math.sin(math.radians(a_lat)) * math.cos(math.radians(b_lat))
-         * math.cos(dlon))
-    deg = (math.degrees(math.atan2(y, x)) + 360) % 360
+    deg = geodesy.bearing_deg(a_lat, a_lon, b_lat, b_lon)
     dirs = ["north", "northeast", "east", "southeast",
             "south", "southwest", "west", "northwest"]
     return dirs[int((deg + 22.5) // 45) % 8]
@@ -219,12 +211,21 @@ def route_section(d, t, stats):
                             " forecast and turn around if conditions build.")
 
     # POIs in mile order (skip the summit itself — that's the destination).
+    # A feature with coordinates but no mile is placed on the route here.
     feats = []
+    locator = None
     for f in (t.get("features") or []):
-        if f.get("type") == "summit":
-            continue
-        if f.get("mile") is None or not f.get("type"):
+        if f.get("type") == "summit" or not f.get("type"):
             continue
+        if f.get("mile") is None:
+            if f.get("lat") is None or f.get("lon") is None or len(geo.get("path") or []) < 2:
+                continue
+            if locator is None:
+                locator = RouteLocator(geo["path"])
+            mile = locator.mile(f["lat"], f["lon"], FEATURE_MAX_OFF_MI)
+            if mile is None:
+                continue
+            f = dict(f, mile=mile)
         feats.append(f)
     feats.sort(key=lambda f: f["mile"])
     if feats:
@@ -251,8 +252,8 @@ def getting_there(d, t):
             " directions)."]
     try:
         cities = json.loads(CITIES.read_text())
-        near = min(cities, key=lambda c: hav_mi(c["lat"], c["lon"], lat, lon))
-        mi = hav_mi(near["lat"], near["lon"], lat, lon)
+        near = min(cities, key=lambda c: geodesy.distance_mi(c["lat"], c["lon"], lat, lon))
+        mi = geodesy.distance_mi(near["lat"], near["lon"], lat, lon)
         if mi <= 250:
             bits.append(f"It's roughly {int(round(mi / 5.0) * 5)} miles"
                         f" {bearing_word(near['lat'], near['lon'], lat, lon)}"
@@ -432,24 +433,36 @@ def is_v1_generated(desc):
             and "<h3>" not in desc)
 
 
-def process(path, force=False):
-    d = json.loads(Path(path).read_text())
+def process_record(d, force=False):
+    """Stage entry point: write description + FAQs onto a parsed record.
+
+    Mutates `d` in place. Returns {"slug", "changed", "description", "faqs"}
+    — the last two say which parts were (re)built — so run-pipeline.py can
+    call this in-process and count from the result, not from printed text.
+    """
+    result = {"slug": d.get("slug"), "changed": False,
+              "description": False, "faqs": False}
     if not d.get("name") or not d.get("slug"):
-        return False
+        return result
     desc = d.get("generated_description") or ""
-    replace = force or not desc.strip() or is_v1_generated(desc)
-    changed = False
-    if replace:
+    if force or not desc.strip() or is_v1_generated(desc):
         d["generated_description"] = build_description(d)
-        changed = True
+        result["description"] = True
     pc = d.setdefault("page_content", {})
     if force or not pc.get("faqs"):
         pc["faqs"] = build_faqs(d)
-        changed = True
-    if changed:
+        result["faqs"] = True
+    result["changed"] = result["description"] or result["faqs"]
+    return result
+
+
+def process(path, force=False):
+    d = json.loads(Path(path).read_text())
+    result = process_record(d, force)
+    if result["changed"]:
         Path(path).write_text(json.dumps(d, indent=2) + "\n")
-        print(f"  ✅ {'desc+faqs' if replace else 'faqs'}: {path}")
-    return changed
+        print(f"  ✅ {'desc+faqs' if result['description'] else 'faqs'}: {path}")
+    return result["changed"]
 
 
 def main():
@@ -4,10 +4,12 @@ Generate nearby_peaks internal links for trails that have none.
 
 Better internal linking improves retention (more places to click) and SEO
 (crawlable, related-content link graph). For each trail missing nearby_peaks,
-this finds the closest OTHER trails in the same state by real great-circle
-distance (from each trail's actual lat/lon) and links them. No data is
-invented — distances are computed, names/slugs/elevations come from the
-target files.
+this finds the closest OTHER trails in the same state (with --cross-state,
+in any state) by real great-circle distance (from each trail's actual
+lat/lon) and links them. No data is invented — distances are computed,
+names/slugs/elevations come from the target files. Candidates come from a
+spatial index (spatial_index.py), so each trail only looks at its own
+neighbourhood instead of every other trail.
 
 Idempotent: trails that already have nearby_peaks are left untouched unless
 --force is passed.
@@ -19,16 +21,20 @@ Usage:
 Options:
   --max N      max links per trail (default 4)
   --radius MI  only link peaks within MI miles (default 75)
+  --cross-state  link across state lines, so border peaks get their real
+               neighbours in adjacent states
 """
 
 import json
-import math
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 
+sys.path.insert(0, str(ROOT / "scripts"))
+from spatial_index import PointIndex  # noqa: E402
+
 
 def trail_states():
     cfg = ROOT / "pipeline.config.json"
@@ -40,49 +46,46 @@ def trail_states():
     return [p.name for p in DATA.iterdir() if p.is_dir() and p.name not in skip]
 
 
-def haversine_miles(lat1, lon1, lat2, lon2):
-    R = 3959
-    p1, p2 = math.radians(lat1), math.radians(lat2)
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(a))
+def peer_of(d, state, slug=None):
+    """The fields of a parsed record that linking needs, or None if unplaced."""
+    if d.get("lat") is None or d.get("lon") is None:
+        return None
+    return {
+        "name": d.get("name"),
+        "slug": d.get("slug", slug),
+        "state_slug": d.get("state_slug", state),
+        "elevation": d.get("elevation"),
+        "lat": d["lat"],
+        "lon": d["lon"],
+        "has_peaks": bool(d.get("nearby_peaks")),
+    }
 
 
 def load_state(state):
-    """Return list of trail dicts with the fields we need for linking."""
-    trails = []
+    """Return list of (file, record) for every parseable trail in the state."""
+    records = []
     for f in sorted((DATA / state).glob("*.json")):
         try:
-            d = json.loads(f.read_text())
+            records.append((f, json.loads(f.read_text())))
         except json.JSONDecodeError:
             continue
-        if d.get("lat") is None or d.get("lon") is None:
-            continue
-        trails.append({
-            "file": f,
-            "name": d.get("name"),
-            "slug": d.get("slug", f.stem),
-            "state_slug": d.get("state_slug", state),
-            "elevation": d.get("elevation"),
-            "lat": d["lat"],
-            "lon": d["lon"],
-            "has_peaks": bool(d.get("nearby_peaks")),
-        })
-    return trails
+    return records
 
 
-def nearest(target, others, max_n, radius):
-    scored = []
-    for o in others:
-        if o["slug"] == target["slug"]:
-            continue
-        dist = haversine_miles(target["lat"], target["lon"], o["lat"], o["lon"])
-        if dist <= radius:
-            scored.append((dist, o))
-    scored.sort(key=lambda x: x[0])
+def build_index(peers):
+    index = PointIndex(cell_deg=1.0)
+    for p in peers:
+        index.add(p["lat"], p["lon"], p)
+    return index
+
+
+def nearest(target, index, max_n, radius):
+    key = (target["state_slug"], target["slug"])
+    scored = index.nearest(
+        target["lat"], target["lon"], max_n, max_mi=radius,
+        exclude=lambda o: (o["state_slug"], o["slug"]) == key)
     out = []
-    for dist, o in scored[:max_n]:
+    for dist, o in scored:
         out.append({
             "name": o["name"],
             "slug": o["slug"],
@@ -93,35 +96,63 @@ def nearest(target, others, max_n, radius):
     return out
 
 
-def process_state(state, force, max_n, radius):
-    trails = load_state(state)
-    updated = 0
-    for t in trails:
+def link_state(records, state, force=False, max_n=4, radius=75.0, index=None):
+    """Stage entry point: link nearby_peaks across already-parsed records.
+
+    `records` is a list of (file, record) pairs for one state; records are
+    mutated in place. Returns one result per placed record:
+    {"slug", "file", "changed", "peaks"} — `peaks` is the list of linked
+    slugs (empty when none were in range), and only `changed` records need
+    writing back.
+
+    Candidates come from `index` when given (a PointIndex of peers, e.g.
+    spanning several states for --cross-state), else from this state alone.
+    """
+    placed = []
+    for f, d in records:
+        peer = peer_of(d, state, f.stem)
+        if peer:
+            placed.append((f, d, peer))
+    if index is None:
+        index = build_index(peer for _, _, peer in placed)
+    results = []
+    for f, d, t in placed:
         if t["has_peaks"] and not force:
             continue
-        peaks = nearest(t, trails, max_n, radius)
-        if not peaks:
-            print(f"  · no peers within {radius} mi: {t['slug']}")
+        peaks = nearest(t, index, max_n, radius)
+        if peaks:
+            d["nearby_peaks"] = peaks
+        results.append({"slug": t["slug"], "file": f, "changed": bool(peaks),
+                        "peaks": [p["slug"] for p in peaks]})
+    return results
+
+
+def process_state(state, force, max_n, radius, records=None, index=None):
+    records = records if records is not None else load_state(state)
+    by_file = dict(records)
+    updated = 0
+    for r in link_state(records, state, force, max_n, radius, index):
+        if not r["changed"]:
+            print(f"  · no peers within {radius} mi: {r['slug']}")
             continue
-        d = json.loads(t["file"].read_text())
-        d["nearby_peaks"] = peaks
-        with open(t["file"], "w") as fh:
-            json.dump(d, fh, indent=2)
+        with open(r["file"], "w") as fh:
+            json.dump(by_file[r["file"]], fh, indent=2)
             fh.write("\n")
         updated += 1
-        print(f"  ✅ {t['slug']}: linked {len(peaks)} peak(s) "
-              f"({', '.join(p['slug'] for p in peaks)})")
+        print(f"  ✅ {r['slug']}: linked {len(r['peaks'])} peak(s) "
+              f"({', '.join(r['peaks'])})")
     return updated
 
 
 def main():
     args = sys.argv[1:]
     force = "--force" in args
+    cross = "--cross-state" in args
     max_n = 4
     radius = 75.0
     states = []
     i = 0
-    rest = [a for a in args if a != "--force"]
+    rest = [a for a in args if a not in ("--force", "--cross-state")]
     while i < len(rest):
         if rest[i] == "--max":
             max_n = int(rest[i + 1]); i += 2
@@ -131,10 +162,20 @@ def main():
             states.append(rest[i]); i += 1
     states = states or trail_states()
 
+    loaded, index = {}, None
+    if cross:
+        # One national index, queried locally: a border peak's candidates are
+        # whatever lies within the radius, whichever state it is filed under.
+        loaded = {s: load_state(s) for s in set(states) | set(trail_states())}
+        index = build_index(peer for s, recs in sorted(loaded.items())
+                            for f, d in recs
+                            for peer in [peer_of(d, s, f.stem)] if peer)
+
     total = 0
     for state in states:
         print(f"▶ {state}")
-        total += process_state(state, force, max_n, radius)
+        total += process_state(state, force, max_n, radius,
+                               loaded.get(state), index)
     print(f"\nUpdated {total} trail(s) with nearby_peaks.")
 
 
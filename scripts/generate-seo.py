@@ -10,6 +10,9 @@ trails[].stats) — no trail facts are invented.
 Idempotent: existing seo fields are kept unless --force is passed. Only missing
 pieces are filled in.
 
+run-pipeline.py imports this file and calls process_record() on records it has
+already parsed, instead of spawning one interpreter per trail file.
+
 Usage:
   python3 scripts/generate-seo.py <trail-json> [<trail-json> ...]
   python3 scripts/generate-seo.py --force <trail-json>      # rebuild even if present
@@ -174,13 +177,29 @@ def generate_seo(data, force=False):
     return changed
 
 
+def process_record(data, force=False):
+    """Stage entry point: fill SEO on an already-parsed trail record.
+
+    Mutates `data` in place and returns {"slug", "changed", "skipped"} so an
+    in-process caller (run-pipeline.py) can count results and decide whether
+    to write the record back. `skipped` is a reason string or None.
+    """
+    result = {"slug": data.get("slug"), "changed": False, "skipped": None}
+    if not data.get("name"):
+        result["skipped"] = "no name"
+        return result
+    result["changed"] = generate_seo(data, force=force)
+    return result
+
+
 def process_file(path, force=False):
     with open(path) as f:
         data = json.load(f)
-    if not data.get("name"):
-        print(f"  ⚠️  skip (no name): {path}")
+    result = process_record(data, force=force)
+    if result["skipped"]:
+        print(f"  ⚠️  skip ({result['skipped']}): {path}")
         return False
-    if generate_seo(data, force=force):
+    if result["changed"]:
         with open(path, "w") as f:
             json.dump(data, f, indent=2)
             f.write("\n")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Shared geodesy: great-circle distances over trail paths, in miles.
+
+Every script used to carry its own haversine (haversine_mi, haversine_distance,
+hav_mi, _hav_mi, km, ...) and walked paths point by point in Python loops.
+This module is the one implementation. A path is a sequence of [lat, lon, ...]
+points — extra columns such as elevation are ignored — and distances use the
+3,959 mi sphere the data has always been computed with.
+
+The array APIs (segment_lengths_mi, cumulative_mi, distances_from_mi,
+nearest_vertex, point_to_path_mi) use NumPy when it is installed, so a
+per-path metric is one vectorized call, and fall back to pure Python when it
+isn't. With NumPy they return arrays, otherwise lists; both index and iterate
+the same way, but convert with float() before writing a value to JSON.
+
+Every function accepts either the JSON list form or a PathArray (below), the
+compact column form the trail store keeps paths in.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: everything below has a pure-Python path
+    np = None
+
+EARTH_RADIUS_MI = 3959.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_mi(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two coordinates, in miles."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_MI * 2 * math.asin(math.sqrt(min(1.0, h)))
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres (6,371 km sphere)."""
+    return distance_mi(lat1, lon1, lat2, lon2) * EARTH_RADIUS_KM / EARTH_RADIUS_MI
+
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    """Initial compass bearing from point 1 to point 2, 0-360 degrees."""
+    dlon = math.radians(lon2 - lon1)
+    y = math.sin(dlon) * math.cos(math.radians(lat2))
+    x = (math.cos(math.radians(lat1)) * math.sin(math.radians(lat2))
+         - math.sin(math.radians(lat1)) * math.cos(math.radians(lat2))
+         * math.cos(dlon))
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def haversine_mi(a, b):
+    """Distance between two [lat, lon, ...] points, in miles."""
+    return distance_mi(a[0], a[1], b[0], b[1])
+
+
+def _latlon(path):
+    """(lats, lons) as float sequences; a PathArray's columns are used as-is."""
+    if isinstance(path, PathArray):
+        return path.lats, path.lons
+    return [p[0] for p in path], [p[1] for p in path]
+
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    """Vectorized haversine on radian arrays (broadcasts)."""
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return EARTH_RADIUS_MI * 2 * np.arcsin(np.sqrt(np.minimum(1.0, h)))
+
+
+def _columns(path):
+    """(lat, lon) in radians as NumPy arrays."""
+    lats, lons = _latlon(path)
+    if isinstance(path, PathArray):
+        lat, lon = np.frombuffer(lats), np.frombuffer(lons)
+    else:
+        lat, lon = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    return np.radians(lat), np.radians(lon)
+
+
+def segment_lengths_mi(path):
+    """Length of each consecutive segment (len(path) - 1 values)."""
+    if len(path) < 2:
+        return np.zeros(0) if np is not None else []
+    if np is not None:
+        lat, lon = _columns(path)
+        return _haversine_np(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    lats, lons = _latlon(path)
+    return [distance_mi(lats[i - 1], lons[i - 1], lats[i], lons[i])
+            for i in range(1, len(lats))]
+
+
+def cumulative_mi(path):
+    """Distance along the path at each point; starts at 0, len(path) values.
+
+    A PathArray computes this once and caches it; treat the result as
+    read-only.
+    """
+    if isinstance(path, PathArray):
+        return path.cumulative_mi()
+    return _cumulative(path)
+
+
+def _cumulative(path):
+    if not len(path):
+        return np.zeros(0) if np is not None else []
+    seg = segment_lengths_mi(path)
+    if np is not None:
+        return np.concatenate(([0.0], np.cumsum(seg)))
+    cum = [0.0]
+    for d in seg:
+        cum.append(cum[-1] + d)
+    return cum
+
+
+def path_length_mi(path):
+    """Total length of the path in miles (0.0 for fewer than two points)."""
+    if len(path) < 2:
+        return 0.0
+    if isinstance(path, PathArray):
+        return float(path.cumulative_mi()[-1])
+    return float(sum(segment_lengths_mi(path)) if np is None
+                 else segment_lengths_mi(path).sum())
+
+
+def distances_from_mi(pt, path):
+    """Distance from one point to every vertex of the path."""
+    if np is not None:
+        lat, lon = _columns(path)
+        return _haversine_np(math.radians(pt[0]), math.radians(pt[1]), lat, lon)
+    lats, lons = _latlon(path)
+    return [distance_mi(pt[0], pt[1], la, lo) for la, lo in zip(lats, lons)]
+
+
+def nearest_vertex(pt, path):
+    """(index, distance_mi) of the path vertex closest to pt."""
+    d = distances_from_mi(pt, path)
+    if np is not None:
+        i = int(np.argmin(d))
+        return i, float(d[i])
+    i = min(range(len(d)), key=d.__getitem__)
+    return i, d[i]
+
+
+def point_to_path_mi(pt, path, cum=None):
+    """Closest approach of pt to the path's SEGMENTS, not just its vertices.
+
+    Returns (offset_mi, along_mi, segment_index): the perpendicular offset
+    from the path, the distance along the path to the foot of that
+    perpendicular, and the segment it falls on. Each segment is projected
+    onto a local equirectangular plane around pt — exact enough at trail
+    scale. `cum` (from cumulative_mi) may be passed to avoid recomputing it.
+    """
+    if len(path) < 2:
+        return (haversine_mi(pt, path[0]) if path else float("inf")), 0.0, 0
+    if cum is None:
+        cum = cumulative_mi(path)
+    kx = math.cos(math.radians(pt[0])) * EARTH_RADIUS_MI * math.pi / 180
+    ky = EARTH_RADIUS_MI * math.pi / 180
+    if np is not None:
+        lat, lon = _columns(path)
+        x = (np.degrees(lon) - pt[1]) * kx
+        y = (np.degrees(lat) - pt[0]) * ky
+        dx, dy = x[1:] - x[:-1], y[1:] - y[:-1]
+        seg2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(seg2 > 0, -(x[:-1] * dx + y[:-1] * dy) / seg2, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        fx, fy = x[:-1] + t * dx, y[:-1] + t * dy
+        off = np.hypot(fx, fy)
+        i = int(np.argmin(off))
+        seg_len = cum[i + 1] - cum[i]
+        return float(off[i]), float(cum[i] + t[i] * seg_len), i
+    lats, lons = _latlon(path)
+    best = None
+    for i in range(len(lats) - 1):
+        ax, ay = (lons[i] - pt[1]) * kx, (lats[i] - pt[0]) * ky
+        bx, by = (lons[i + 1] - pt[1]) * kx, (lats[i + 1] - pt[0]) * ky
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / seg2))
+        off = math.hypot(ax + t * dx, ay + t * dy)
+        if best is None or off < best[0]:
+            best = (off, cum[i] + t * (cum[i + 1] - cum[i]), i)
+    return best
+
+
+# Value kinds a PathArray column can hold, so the JSON form round-trips
+# exactly: elevations are stored as ints, a point may lack elevation, and
+# (rarely) an elevation is null.
+_FLOAT, _INT, _NONE, _ABSENT = 0, 1, 2, 3
+
+
+def _kind(v):
+    if v is None:
+        return _NONE
+    return _INT if isinstance(v, int) else _FLOAT
+
+
+class PathArray:
+    """A route path held as three array('d') columns instead of a list of
+    [lat, lon, ele] lists.
+
+    A JSON path point is a list plus three boxed floats, roughly 150 bytes;
+    here it is 24. Whole-state passes that keep every record in memory hold
+    hundreds of thousands of points, so this is the in-memory form the
+    trail store hands out (TrailStore(compact_paths=True)).
+
+    It reads like the list it replaces — len(), iteration and indexing yield
+    [lat, lon, ele] lists, slices yield PathArrays — and to_json() gives
+    back exactly what was parsed: ints stay ints, 2-D points stay 2-D. The
+    geodesy functions read the columns directly, and cumulative distance is
+    computed on first use and cached. It is immutable; to change a route,
+    assign a new path.
+    """
+
+    __slots__ = ("lats", "lons", "eles", "_kinds", "_cum")
+
+    def __init__(self, points=()):
+        self.lats, self.lons, self.eles = array("d"), array("d"), array("d")
+        kinds = ([], [], [])
+        for p in points:
+            if not 2 <= len(p) <= 3:
+                raise ValueError(f"path point must be [lat, lon] or [lat, lon, ele]: {p!r}")
+            self.lats.append(p[0])
+            self.lons.append(p[1])
+            ele = p[2] if len(p) == 3 else None
+            self.eles.append(math.nan if ele is None else ele)
+            kinds[0].append(_kind(p[0]))
+            kinds[1].append(_kind(p[1]))
+            kinds[2].append(_kind(ele) if len(p) == 3 else _ABSENT)
+        # A uniform column (the normal case) stores one code, not one per point.
+        self._kinds = tuple(k[0] if len(set(k)) == 1 else bytes(k) for k in kinds) \
+            if kinds[0] else (_FLOAT, _FLOAT, _INT)
+        self._cum = None
+
+    def _kind_at(self, col, i):
+        k = self._kinds[col]
+        return k if isinstance(k, int) else k[i]
+
+    def _value(self, col, i):
+        kind = self._kind_at(col, i)
+        v = (self.lats, self.lons, self.eles)[col][i]
+        if kind == _INT:
+            return int(v)
+        return None if kind == _NONE else v
+
+    def __len__(self):
+        return len(self.lats)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PathArray(self[j] for j in range(*i.indices(len(self))))
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("PathArray index out of range")
+        point = [self._value(0, i), self._value(1, i)]
+        if self._kind_at(2, i) != _ABSENT:
+            point.append(self._value(2, i))
+        return point
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, PathArray):
+            other = other.to_json()
+        return isinstance(other, list) and self.to_json() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PathArray({len(self)} points)"
+
+    def to_json(self):
+        """The path as the [[lat, lon, ele], ...] lists it was built from."""
+        return list(self)
+
+    @property
+    def is_3d(self):
+        """True when every point carries an elevation slot."""
+        k = self._kinds[2]
+        return k != _ABSENT if isinstance(k, int) else _ABSENT not in k
+
+    @property
+    def nbytes(self):
+        return sum(c.itemsize * len(c) for c in (self.lats, self.lons, self.eles))
+
+    def cumulative_mi(self):
+        if self._cum is None:
+            self._cum = _cumulative(self)
+        return self._cum
+
+    def length_mi(self):
+        return path_length_mi(self)
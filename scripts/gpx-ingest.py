@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Batch GPX ingest: apply a whole drop of GPX tracks in one parallel pass.
+
+run-pipeline.py converts gpx-downloads/<slug>.gpx one file at a time, and
+only as part of a full state run. A drop of hundreds of volunteer tracks
+wants one command that, for every GPX in the folder and across CPU cores:
+
+  1. matches it to the trail record with that slug (any state)
+  2. streams, validates and simplifies it (gpx-to-geo.py, validate-gpx.py)
+  3. writes the route, chart and gain, then the canonical distance fields
+     via route_metrics.apply_to_trail
+  4. reports one row per file: points in/out, distance, gain, issues
+
+A file whose GPS density is too low to publish (validate-gpx's POOR) is
+rejected rather than applied, unless --force. Records that already have a
+route are left alone unless --overwrite. Results go to the console and to
+pipeline-reports/gpx-ingest.json; nothing is published — run-pipeline.py
+and curate-state.py take it from there.
+
+Usage:
+  python3 scripts/gpx-ingest.py                      # every GPX in gpx-downloads/
+  python3 scripts/gpx-ingest.py --dir ~/volunteer-drop --jobs 8
+  python3 scripts/gpx-ingest.py --state colorado --overwrite
+  python3 scripts/gpx-ingest.py --dry-run            # validate + report, write nothing
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+import route_metrics  # noqa: E402
+
+
+def load_module(path, name):
+    """Load a script with a hyphenated filename as an importable module."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_MODS = None
+
+
+def modules():
+    """gpx-to-geo and validate-gpx, loaded once per worker process."""
+    global _MODS
+    if _MODS is None:
+        _MODS = (load_module(SCRIPTS / "gpx-to-geo.py", "gpx_to_geo"),
+                 load_module(SCRIPTS / "validate-gpx.py", "validate_gpx"))
+    return _MODS
+
+
+def record_index(data_dir, state=None):
+    """{slug: [record file, ...]} over every state (or one)."""
+    index = {}
+    for f in sorted(data_dir.glob(f"{state or '*'}/*.json")):
+        try:
+            slug = json.loads(f.read_text()).get("slug") or f.stem
+        except (OSError, ValueError):
+            continue
+        index.setdefault(slug, []).append(f)
+    return index
+
+
+def ingest_one(job):
+    """Validate, convert and apply one GPX. Returns its result row."""
+    gpx, record, overwrite, force, dry_run = job
+    gpx_mod, validate_mod = modules()
+    row = {"file": Path(gpx).name, "record": None, "status": None,
+           "points_in": None, "points_out": None, "distance": None,
+           "gain": None, "issues": []}
+    if record is None:
+        row["status"] = "no matching trail"
+        return row
+    record = Path(record)
+    row["record"] = str(record.relative_to(ROOT))
+    d = json.loads(record.read_text())
+    trails = d.get("trails") or []
+    if not trails:
+        row["status"] = "record has no trails"
+        return row
+    if trails[0].get("geo", {}).get("path") and not overwrite:
+        row["status"] = "has route (use --overwrite)"
+        return row
+
+    stats = {}
+    try:
+        result = gpx_mod.gpx_to_geo(gpx, stats=stats)
+    except Exception as e:  # malformed XML etc. — report it, keep going
+        row["status"] = "parse error"
+        row["issues"].append(str(e))
+        return row
+    usable, issues = validate_mod.gpx_issues(stats.get("points", 0),
+                                             stats.get("with_elevation", 0),
+                                             stats.get("distance_mi", 0.0))
+    row["issues"] = issues
+    if not result:
+        row["status"] = "no points"
+        return row
+    row.update(points_in=result["points_in"], points_out=result["points_out"],
+               gain=result["gain"])
+    if not usable and not force:
+        row["status"] = "rejected"
+        return row
+
+    gpx_mod.apply_to_record(d, result)
+    t = d["trails"][0]
+    t["stats"].pop("distance_source", None)  # freshly computed geometry
+    route_metrics.apply_to_trail(t)
+    row["distance"] = t["stats"].get("distance")
+    ds = d.setdefault("data_sources", {})
+    ds["gps_source"] = f"GPX track ({Path(gpx).name})"
+    ds["route_verified"] = str(date.today())
+    if dry_run:
+        row["status"] = "ok (dry run)"
+        return row
+    record.write_text(json.dumps(d, indent=2) + "\n")
+    row["status"] = "applied"
+    return row
+
+
+def main():
+    config = json.loads((ROOT / "pipeline.config.json").read_text())
+    parser = argparse.ArgumentParser(description="Apply a folder of GPX tracks in parallel.")
+    parser.add_argument("--dir", default=str(ROOT / config.get("gpx_dir", "gpx-downloads")),
+                        help="folder of <slug>.gpx files")
+    parser.add_argument("--state", help="only match records in this state")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="replace routes that records already have")
+    parser.add_argument("--force", action="store_true",
+                        help="apply tracks that fail the density check")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="validate and report only; write nothing")
+    args = parser.parse_args()
+
+    gpx_dir = Path(args.dir).expanduser()
+    files = sorted(gpx_dir.glob("*.gpx"))
+    if not files:
+        sys.exit(f"❌ No .gpx files in {gpx_dir}")
+    index = record_index(ROOT / config["data_dir"], args.state)
+
+    jobs, rows = [], {}
+    for gpx in files:
+        matches = index.get(gpx.stem, [])
+        if len(matches) > 1:
+            rows[gpx.name] = {"file": gpx.name, "record": None,
+                              "status": f"ambiguous slug ({len(matches)} records)",
+                              "points_in": None, "points_out": None,
+                              "distance": None, "gain": None, "issues": []}
+            continue
+        jobs.append((str(gpx), str(matches[0]) if matches else None,
+                     args.overwrite, args.force, args.dry_run))
+
+    workers = max(1, min(args.jobs, len(jobs)))
+    print(f"Ingesting {len(files)} GPX file(s) from {gpx_dir} "
+          f"({workers} worker{'s' if workers > 1 else ''})…\n")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for row in pool.map(ingest_one, jobs, chunksize=4):
+                rows[row["file"]] = row
+    else:
+        for job in jobs:
+            row = ingest_one(job)
+            rows[row["file"]] = row
+
+    table = [rows[f.name] for f in files]
+    print(f"{'FILE':<34} {'STATUS':<28} {'IN':>7} {'OUT':>5} {'MI':>6} {'GAIN':>6}  ISSUES")
+    print("-" * 100)
+    for r in table:
+        cells = [("" if r[k] is None else r[k]) for k in ("points_in", "points_out",
+                                                          "distance", "gain")]
+        print(f"{r['file'][:34]:<34} {r['status'][:28]:<28} {cells[0]:>7} {cells[1]:>5} "
+              f"{cells[2]:>6} {cells[3]:>6}  {'; '.join(r['issues'])}")
+    applied = sum(r["status"] == "applied" for r in table)
+    print("-" * 100)
+    print(f"Applied {applied} of {len(table)} track(s).")
+    if applied:
+        print("Now run:  python3 scripts/run-pipeline.py --state <state>")
+
+    out = ROOT / config.get("report_dir", "pipeline-reports") / "gpx-ingest.json"
+    out.parent.mkdir(exist_ok=True)
+    out.write_text(json.dumps({"date": str(date.today()), "dir": str(gpx_dir),
+                               "files": table}, indent=2) + "\n")
+    print(f"JSON: {out.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
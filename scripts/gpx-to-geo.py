@@ -10,165 +10,147 @@ Features:
 - Calculates elevation profile points
 - Generates proper chart data
 - Validates coordinates
+- Streams the file (GPX 1.0 or 1.1), so multi-day tracks convert in flat memory
+
+run-pipeline.py imports this file and calls gpx_to_geo() / apply_to_record()
+in-process rather than running it once per GPX as a subprocess.
 """
 
 import sys
 import json
-import math
-import xml.etree.ElementTree as ET
-
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two GPS points in miles"""
-    R = 3959  # Earth radius in miles
-
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import elevation_chart  # noqa: E402
+import geodesy  # noqa: E402
+import gpx_stream  # noqa: E402
+import path_simplify  # noqa: E402
+
+def iter_gpx_points(gpx_file, stats=None):
+    """Stream [lat, lon, ele_ft] per GPX point (GPX 1.0 or 1.1)
+
+    If a `stats` dict is passed it is filled with the raw track's figures
+    as they stream by: points, with_elevation, distance_mi.
+    """
+    if stats is not None:
+        stats.update(points=0, with_elevation=0, distance_mi=0.0)
+    prev = None
+    for lat, lon, ele in gpx_stream.iter_points(gpx_file):
+        if stats is not None:
+            stats['points'] += 1
+            stats['with_elevation'] += ele is not None
+            if prev is not None:
+                stats['distance_mi'] += geodesy.distance_mi(prev[0], prev[1], lat, lon)
+            prev = (lat, lon)
+        # Elevation in meters, convert to feet
+        ele = ele * 3.28084 if ele is not None else 0
+        yield [round(lat, 5), round(lon, 5), round(ele)]
 
 def parse_gpx(gpx_file):
     """Parse GPX file and extract trail points"""
-    tree = ET.parse(gpx_file)
-    root = tree.getroot()
-
-    # Handle GPX namespace
-    ns = {'gpx': 'http://www.topografix.com/GPX/1/1'}
-
-    points = []
-
-    # Try tracks first (most common for trails)
-    for trk in root.findall('.//gpx:trk', ns):
-        for seg in trk.findall('.//gpx:trkseg', ns):
-            for pt in seg.findall('.//gpx:trkpt', ns):
-                lat = float(pt.get('lat'))
-                lon = float(pt.get('lon'))
-                ele_elem = pt.find('gpx:ele', ns)
-
-                # Elevation in meters, convert to feet
-                ele = float(ele_elem.text) * 3.28084 if ele_elem is not None else 0
-
-                points.append({
-                    'lat': round(lat, 5),
-                    'lon': round(lon, 5),
-                    'ele': round(ele)
-                })
-
-    # If no tracks, try route
-    if not points:
-        for rte in root.findall('.//gpx:rte', ns):
-            for pt in rte.findall('.//gpx:rtept', ns):
-                lat = float(pt.get('lat'))
-                lon = float(pt.get('lon'))
-                ele_elem = pt.find('gpx:ele', ns)
-                ele = float(ele_elem.text) * 3.28084 if ele_elem is not None else 0
-
-                points.append({
-                    'lat': round(lat, 5),
-                    'lon': round(lon, 5),
-                    'ele': round(ele)
-                })
-
-    return points
+    return [{'lat': lat, 'lon': lon, 'ele': ele}
+            for lat, lon, ele in iter_gpx_points(gpx_file)]
 
 def simplify_path(points, max_points=100):
     """Simplify path to reduce file size while keeping accuracy"""
     if len(points) <= max_points:
         return points
 
-    # Keep every nth point
-    step = len(points) // max_points
-    simplified = []
-
-    for i in range(0, len(points), step):
-        simplified.append(points[i])
-
-    # Always include the last point
-    if simplified[-1] != points[-1]:
-        simplified.append(points[-1])
-
-    return simplified
+    # Keep the points that carry the shape: switchback corners, the summit
+    # and climb inflections (elevation-aware Douglas-Peucker to the budget)
+    coords = [(p['lat'], p['lon'], p['ele']) for p in points]
+    keep = path_simplify.keep_indices(coords, max_points=max_points,
+                                      tolerance_m=0, elevation=True)
+    return [points[i] for i in keep]
+
+def generate_chart(points, num_points=15, spacing_mi=None):
+    """Generate elevation chart data points
+
+    Frontend canonical chart shape: ElevationChart reads mile/elev.
+    Samples fall on exact mile marks, interpolated between GPS points.
+    """
+    path = [(p['lat'], p['lon'], p['ele']) for p in points]
+    chart = elevation_chart.build(path, num=num_points, spacing_mi=spacing_mi)
+    return chart, round(geodesy.path_length_mi(path), 1)
+
+def gpx_to_geo(gpx_file, max_points=100, num_chart=15, stats=None):
+    """Stage entry point: parse + simplify one GPX into a structured result.
+
+    Returns None when the file has no GPS points, else a dict with the `geo`
+    block (markers, path, chart) plus the figures the CLI reports:
+    points_in, points_out, distance, gain, min_ele, max_ele. `stats` is
+    filled as in iter_gpx_points(), from the same single read.
+    """
+    # Stream the file: a huge track is thinned as it is read, so memory
+    # stays flat however large the GPX is
+    coords, points_in = path_simplify.thin_stream(iter_gpx_points(gpx_file, stats))
+    if not coords:
+        return None
+    points = [{'lat': lat, 'lon': lon, 'ele': ele} for lat, lon, ele in coords]
 
-def generate_chart(points, num_points=15):
-    """Generate elevation chart data points"""
-    chart = []
-    total_distance = 0
-
-    # Calculate cumulative distances
-    distances = [0]
-    for i in range(1, len(points)):
-        dist = haversine_distance(
-            points[i-1]['lat'], points[i-1]['lon'],
-            points[i]['lat'], points[i]['lon']
-        )
-        total_distance += dist
-        distances.append(total_distance)
+    # Simplify path if too many points
+    if len(points) > max_points:
+        points = simplify_path(points, max_points=max_points)
 
-    # Generate evenly spaced chart points
-    interval = total_distance / (num_points - 1)
+    # Generate elevation chart
+    chart, total_distance = generate_chart(points, num_points=num_chart)
 
-    for i in range(num_points):
-        target_dist = i * interval
+    # Calculate elevation gain
+    min_ele = min(p['ele'] for p in points)
+    max_ele = max(p['ele'] for p in points)
 
-        # Find closest point
-        closest_idx = min(range(len(distances)),
-                         key=lambda idx: abs(distances[idx] - target_dist))
+    return {
+        "geo": {
+            "markers": {
+                "start": [points[0]['lat'], points[0]['lon']],
+                "summit": [points[-1]['lat'], points[-1]['lon']]
+            },
+            "path": [[p['lat'], p['lon'], p['ele']] for p in points],
+            "chart": chart
+        },
+        "points_in": points_in,
+        "points_out": len(points),
+        "distance": total_distance,
+        "gain": round(max_ele - min_ele),
+        "min_ele": min_ele,
+        "max_ele": max_ele,
+    }
 
-        # Frontend canonical chart shape: ElevationChart reads mile/elev.
-        chart.append({
-            "mile": round(target_dist, 2),
-            "elev": points[closest_idx]['ele'],
-            "coord": [points[closest_idx]['lat'], points[closest_idx]['lon']]
-        })
+def apply_to_record(trail_data, result):
+    """Write a gpx_to_geo() result onto a parsed trail record's first route.
 
-    return chart, round(total_distance, 1)
+    Returns True when the record was updated (it needs a trails array).
+    """
+    if not trail_data.get('trails'):
+        return False
+    trail = trail_data['trails'][0]
+    trail['geo'] = result['geo']
+    stats = trail.setdefault('stats', {})
+    stats['distance'] = result['distance']
+    stats['gain'] = result['gain']
+    return True
 
 def convert_gpx_to_geo(gpx_file, output_file):
     """Main conversion function"""
     print(f"📍 Parsing GPX file: {gpx_file}")
-    points = parse_gpx(gpx_file)
+    result = gpx_to_geo(gpx_file)
 
-    if not points:
+    if not result:
         print("❌ Error: No GPS points found in GPX file")
         return False
 
-    print(f"   Found {len(points)} GPS points")
-
-    # Simplify path if too many points
-    if len(points) > 100:
-        original_count = len(points)
-        points = simplify_path(points, max_points=100)
-        print(f"   Simplified to {len(points)} points (from {original_count})")
-
-    # Generate elevation chart
-    chart, total_distance = generate_chart(points, num_points=15)
-
-    # Calculate elevation gain
-    min_ele = min(p['ele'] for p in points)
-    max_ele = max(p['ele'] for p in points)
-    ele_gain = round(max_ele - min_ele)
+    print(f"   Found {result['points_in']} GPS points")
+    if result['points_out'] < result['points_in']:
+        print(f"   Simplified to {result['points_out']} points "
+              f"(from {result['points_in']})")
 
     print(f"\n📊 Trail Statistics:")
-    print(f"   Distance: {total_distance} mi")
-    print(f"   Elevation Gain: {ele_gain} ft")
-    print(f"   Min Elevation: {round(min_ele)} ft")
-    print(f"   Max Elevation: {round(max_ele)} ft")
-
-    # Create geo object
-    geo = {
-        "markers": {
-            "start": [points[0]['lat'], points[0]['lon']],
-            "summit": [points[-1]['lat'], points[-1]['lon']]
-        },
-        "path": [[p['lat'], p['lon'], p['ele']] for p in points],
-        "chart": chart
-    }
+    print(f"   Distance: {result['distance']} mi")
+    print(f"   Elevation Gain: {result['gain']} ft")
+    print(f"   Min Elevation: {round(result['min_ele'])} ft")
+    print(f"   Max Elevation: {round(result['max_ele'])} ft")
+
+    geo = result['geo']
 
     # Try to update existing trail file
     if output_file:
@@ -176,14 +158,8 @@ def convert_gpx_to_geo(gpx_file, output_file):
             with open(output_file, 'r') as f:
                 trail_data = json.load(f)
 
-            # Update geo in first trail
-            if 'trails' in trail_data and len(trail_data['trails']) > 0:
-                trail_data['trails'][0]['geo'] = geo
-
-                # Update stats
-                trail_data['trails'][0]['stats']['distance'] = total_distance
-                trail_data['trails'][0]['stats']['gain'] = ele_gain
-
+            # Update geo + stats in first trail
+            if apply_to_record(trail_data, result):
                 with open(output_file, 'w') as f:
                     json.dump(trail_data, f, indent=2)
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Streaming GPX reader: track points as a generator, in flat memory.
+
+gpx-to-geo.py and validate-gpx.py used ET.parse, which holds the whole DOM —
+plus a dict per point — before anything is simplified; a multi-day thru-hike
+export is tens of MB of XML. iter_points() walks the file with iterparse and
+deletes each point element once it has been read, so memory does not grow
+with the file.
+
+  versions   GPX 1.0 and 1.1 (any namespace, or none) — only local tag
+             names are matched
+  tracks     <trkpt> points of every <trk>/<trkseg>, in file order
+  routes     <rtept> points are used only when the file has no track, as
+             before; GPX puts <rte> ahead of <trk>, so route points are held
+             until the end of the file decides (routes are short)
+"""
+
+import xml.etree.ElementTree as ET
+
+# Elements that are finished with at their end tag: deleting them from their
+# parent is what keeps memory flat.
+_DONE = {"trkpt", "rtept", "wpt", "trkseg", "trk", "rte", "metadata"}
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _point(elem):
+    """(lat, lon, ele_m or None) from a trkpt/rtept element."""
+    ele = None
+    for child in elem:
+        if _local(child.tag) == "ele" and child.text and child.text.strip():
+            ele = float(child.text)
+            break
+    return float(elem.get("lat")), float(elem.get("lon")), ele
+
+
+def iter_points(source):
+    """Yield (lat, lon, ele_m) per point of a GPX file path or file object.
+
+    Elevation is in metres as the file has it, None where a point has none.
+    Raises xml.etree.ElementTree.ParseError on malformed XML.
+    """
+    stack = []
+    route = []
+    any_track = False
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        tag = _local(elem.tag)
+        if tag == "trkpt":
+            any_track = True
+            yield _point(elem)
+        elif tag == "rtept" and not any_track:
+            route.append(_point(elem))
+        if tag in _DONE and stack:
+            parent = stack[-1]
+            if len(parent) and parent[-1] is elem:
+                del parent[-1]
+            else:
+                parent.remove(elem)
+    if not any_track:
+        yield from route
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for every upstream HTTP fetch.
+
+Overpass, the ArcGIS trail services, Open-Meteo, USGS EPQS and Wikidata are
+rate-limited public servers, and the pipeline used to ask them the same
+questions on every run: a retried state, an auto-all re-run or a local code
+fix all re-downloaded identical responses. fetch() puts one SQLite file in
+front of them (.cache/http.sqlite):
+
+  key       sha256 of method + URL + request body, so a request is cached
+            exactly when it is byte-for-byte the same request
+  TTL       per source host (TTL_DAYS): DEM samples never change, OSM does
+  eviction  least-recently-used entries go once the store passes
+            SUMMITSEEKER_HTTP_CACHE_MB (default 512)
+  failures  only responses that parse are stored; a body that looks like an
+            error payload is not. If a refetch of a stale entry fails, the
+            stale body is served rather than nothing.
+
+Offline replay: with SUMMITSEEKER_OFFLINE=1 (or auto-state/auto-all
+--offline) nothing touches the network. Cached entries are served whatever
+their age, and a miss raises OfflineMiss, which callers treat like a failed
+request. Re-running a state after a local code fix then needs zero network.
+SUMMITSEEKER_HTTP_CACHE=off bypasses the cache entirely.
+
+record(keys) lets a caller see which requests a piece of work made and
+whether each one got usable data — fetch-trails journals them so a peak that
+genuinely has no trail can be told apart from one whose queries failed.
+
+Environment variables are the switch because the stage scripts run as
+subprocesses of auto-state.py; the setting reaches every one of them.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+from pathlib import Path
+
+import http_client
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_PATH = ROOT / ".cache" / "http.sqlite"
+
+DAY = 86400
+TTL_DAYS = {
+    "api.open-meteo.com": 365,      # DEM samples: static
+    "epqs.nationalmap.gov": 365,    # DEM samples: static
+    "overpass-api.de": 7,           # OSM edits land daily
+    "www.wikidata.org": 14,
+    "commons.wikimedia.org": 14,
+}
+DEFAULT_TTL_DAYS = 30               # ArcGIS trail services and the rest
+
+
+class OfflineMiss(urllib.error.URLError):
+    """Offline mode and the request was never cached."""
+
+
+def offline():
+    return os.environ.get("SUMMITSEEKER_OFFLINE", "") not in ("", "0")
+
+
+def enabled():
+    return os.environ.get("SUMMITSEEKER_HTTP_CACHE", "on").lower() not in ("off", "0")
+
+
+def max_bytes():
+    return int(float(os.environ.get("SUMMITSEEKER_HTTP_CACHE_MB", "512")) * 1024 * 1024)
+
+
+def ttl_for(url):
+    host = urllib.parse.urlsplit(url).hostname or ""
+    return TTL_DAYS.get(host, DEFAULT_TTL_DAYS) * DAY
+
+
+def request_key(req):
+    body = req.data or b""
+    if isinstance(body, str):
+        body = body.encode()
+    h = hashlib.sha256()
+    h.update(req.get_method().encode() + b"\n" + req.full_url.encode() + b"\n" + body)
+    return h.hexdigest()
+
+
+def _looks_failed(obj):
+    """JSON that parsed but is an upstream error, not data worth keeping."""
+    if not isinstance(obj, dict):
+        return False
+    if "error" in obj:
+        return True
+    return "runtime error" in str(obj.get("remark", ""))  # Overpass timeout/OOM
+
+
+_DB = None
+_LOCK = threading.RLock()  # fetch() is called from worker threads too
+
+
+def _db():
+    global _DB
+    if _DB is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Several pipeline processes may share the file; WAL + a busy timeout
+        # lets them read and write concurrently.
+        _DB = sqlite3.connect(str(CACHE_PATH), timeout=30, isolation_level=None,
+                              check_same_thread=False)
+        _DB.execute("PRAGMA journal_mode=WAL")
+        _DB.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, url TEXT, body BLOB, size INTEGER,"
+            " stored REAL, used REAL)")
+        _DB.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses(used)")
+    return _DB
+
+
+def _get(key):
+    with _LOCK:
+        return _get_locked(key)
+
+
+def _get_locked(key):
+    row = _db().execute("SELECT body, stored FROM responses WHERE key = ?",
+                        (key,)).fetchone()
+    if row is None:
+        return None
+    _db().execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+    return zlib.decompress(row[0]), row[1]
+
+
+def _put(key, url, raw):
+    with _LOCK:
+        _put_locked(key, url, raw)
+
+
+def _put_locked(key, url, raw):
+    blob = zlib.compress(raw)
+    now = time.time()
+    db = _db()
+    db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+               (key, url, blob, len(blob), now, now))
+    limit = max_bytes()
+    total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total > limit:
+        # Evict least-recently-used down to 90% so this doesn't run per insert.
+        for k, size in db.execute(
+                "SELECT key, size FROM responses ORDER BY used").fetchall():
+            if total <= limit * 0.9:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (k,))
+            total -= size
+
+
+_recorder = contextvars.ContextVar("http_cache_recorder", default=None)
+
+
+def record(keys):
+    """From here on in the current context — an asyncio task, and threads it
+    starts with asyncio.to_thread — append (key, ok) to `keys` for every
+    fetch(): its request_key and whether it returned usable data."""
+    _recorder.set(keys)
+
+
+def fetch(req, timeout=60, context=None, parse=json.loads):
+    """The response to `req` (a urllib Request), parsed with `parse`.
+
+    Served from the cache when a fresh copy exists; otherwise fetched over a
+    pooled keep-alive connection (http_client.read) and stored if it parses. Network and HTTP errors
+    propagate exactly as urlopen raises them, so callers keep their own
+    retry loops.
+    """
+    keys = _recorder.get()
+    if keys is None:
+        return _fetch(req, timeout, context, parse)
+    try:
+        value = _fetch(req, timeout, context, parse)
+    except Exception:
+        keys.append((request_key(req), False))
+        raise
+    keys.append((request_key(req), not _looks_failed(value)))
+    return value
+
+
+def _fetch(req, timeout, context, parse):
+    if not enabled():
+        return parse(http_client.read(req, timeout=timeout, context=context))
+    key = request_key(req)
+    hit = _get(key)
+    if hit is not None and (offline() or time.time() - hit[1] < ttl_for(req.full_url)):
+        return parse(hit[0])
+    if offline():
+        raise OfflineMiss(f"offline and not cached: {req.full_url[:120]}")
+    try:
+        raw = http_client.read(req, timeout=timeout, context=context)
+    except (urllib.error.URLError, OSError):
+        if hit is not None:
+            return parse(hit[0])  # stale beats nothing
+        raise
+    value = parse(raw)
+    if not _looks_failed(value):
+        _put(key, req.full_url, raw)
+    return value
+
+
+def stats():
+    """{entries, bytes} currently stored."""
+    with _LOCK:
+        n, size = _db().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+    return {"entries": n, "bytes": size}
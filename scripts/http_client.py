@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client: persistent keep-alive connections, one SSL context, gzip.
+
+urllib.request.urlopen opens a new TCP connection — and a new TLS handshake —
+for every request, and each script built its own SSL context (import-state
+rebuilt one per Overpass query). A bulk state build makes thousands of small
+requests to the same handful of hosts (ArcGIS, Overpass, Open-Meteo,
+Wikimedia), so most of its wall time was handshakes. read() keeps one open
+http.client connection per host and reuses it:
+
+  pool      one connection per (scheme, host, port), per thread — an
+            http.client connection is not safe to share, and fetch-trails
+            runs its fetches on worker threads
+  TLS       ssl_context() is built once per process and reused everywhere
+  gzip      requests ask for Accept-Encoding: gzip and the body is inflated
+            before it is returned
+  reuse     a kept-alive connection the server has since closed is reopened
+            and the request sent once more
+  pacing    every request waits for its host's slot in the cross-process
+            rate limiter (rate_limit.py) and reports 429/503/504 back to it
+
+Errors surface as urllib raises them — HTTPError for a 4xx/5xx status,
+URLError for connection and TLS failures — so callers' retry loops and the
+CERTIFICATE_VERIFY_FAILED hints are unchanged. Requests that must go through
+an HTTP(S) proxy from the environment fall back to urlopen.
+"""
+
+import gzip
+import http.client
+import io
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+
+import rate_limit
+
+MAX_REDIRECTS = 5
+_local = threading.local()
+_ctx = None
+_ctx_lock = threading.Lock()
+
+
+def ssl_context():
+    """The process-wide verifying SSL context, preferring certifi if it's
+    installed.
+
+    Fixes the common macOS python.org issue where Python doesn't use the
+    system keychain and TLS verification fails with CERTIFICATE_VERIFY_FAILED.
+    """
+    global _ctx
+    with _ctx_lock:
+        if _ctx is None:
+            try:
+                import certifi
+                _ctx = ssl.create_default_context(cafile=certifi.where())
+            except Exception:
+                _ctx = ssl.create_default_context()
+    return _ctx
+
+
+def _pool():
+    if not hasattr(_local, "conns"):
+        _local.conns = {}
+    return _local.conns
+
+
+def _connection(scheme, netloc, timeout, context):
+    key = (scheme, netloc, id(context))
+    conn = _pool().get(key)
+    if conn is None:
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(netloc, timeout=timeout, context=context)
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=timeout)
+        _pool()[key] = conn
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return key, conn
+
+
+def _drop(key):
+    conn = _pool().pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+def close():
+    """Close this thread's pooled connections."""
+    for key in list(_pool()):
+        _drop(key)
+
+
+def _proxied(url):
+    parts = urllib.parse.urlsplit(url)
+    proxies = urllib.request.getproxies()
+    return parts.scheme in proxies and not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+def _inflate(body, encoding):
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)  # raw deflate
+    return body
+
+
+def _send(req, url, timeout, context):
+    """One request/response on a pooled connection: (status, headers, body)."""
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    headers = {k.capitalize(): v for k, v in req.header_items()}
+    headers.setdefault("Accept-encoding", "gzip")
+    headers.setdefault("Connection", "keep-alive")
+    if req.data is not None:
+        headers.setdefault("Content-type", "application/x-www-form-urlencoded")
+    key, conn = _connection(parts.scheme, parts.netloc, timeout, context)
+    reused = conn.sock is not None
+    try:
+        conn.request(req.get_method(), path, body=req.data, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+    except (http.client.RemoteDisconnected, ConnectionResetError,
+            BrokenPipeError, http.client.CannotSendRequest) as e:
+        _drop(key)
+        if reused:
+            # The server closed the idle connection; a fresh one gets the
+            # request exactly once more.
+            return _send(req, url, timeout, context)
+        raise urllib.error.URLError(e)
+    except (OSError, http.client.HTTPException) as e:
+        _drop(key)
+        if isinstance(e, (TimeoutError, urllib.error.URLError)):
+            raise
+        raise urllib.error.URLError(e)
+    if resp.will_close:
+        _drop(key)
+    return resp.status, resp.headers, _inflate(body, resp.headers.get("Content-Encoding"))
+
+
+def read(req, timeout=60, context=None):
+    """The response body of `req` (a urllib Request) as bytes.
+
+    Raises urllib.error.HTTPError for a 4xx/5xx status and URLError when the
+    server can't be reached, as urlopen would.
+    """
+    context = context or ssl_context()
+    url = req.full_url
+    if _proxied(url):
+        host = urllib.parse.urlsplit(url).hostname
+        rate_limit.acquire(host)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout, context=context) as resp:
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code in rate_limit.THROTTLE_STATUSES:
+                rate_limit.throttled(host, rate_limit.retry_after(e.headers.get("Retry-After")))
+            raise
+        rate_limit.succeeded(host)
+        return body
+    for _ in range(MAX_REDIRECTS + 1):
+        host = urllib.parse.urlsplit(url).hostname
+        rate_limit.acquire(host)
+        status, headers, body = _send(req, url, timeout, context)
+        if status in rate_limit.THROTTLE_STATUSES:
+            rate_limit.throttled(host, rate_limit.retry_after(headers.get("Retry-After")))
+        elif status < 400:
+            rate_limit.succeeded(host)
+        if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+            url = urllib.parse.urljoin(url, headers["Location"])
+            if status == 303 or (status in (301, 302) and req.get_method() == "POST"):
+                req = urllib.request.Request(url, headers=dict(req.header_items()))
+            continue
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, http.client.responses.get(status, ""),
+                                         headers, io.BytesIO(body))
+        return body
+    raise urllib.error.HTTPError(url, status, "too many redirects", headers, io.BytesIO(body))
@@ -20,13 +20,18 @@ Options:
   --min-prominence M skip peaks below this prominence in meters (default 0)
   --limit N          keep only the N highest peaks (default: no limit)
   --dry-run          report what would be imported, write nothing
+  --catalogue        read peaks from the local peak catalogue, not Overpass
+                     (build it once with scripts/build-peak-catalogue.py)
+  --catalogue-dir D  as --catalogue, from catalogue directory D
 
 Examples:
   python3 scripts/import-state.py colorado --min-ele 13000
   python3 scripts/import-state.py vermont --limit 50 --dry-run
+  python3 scripts/import-state.py maine --min-ele 2000 --catalogue
 """
 
 import json
+import math
 import re
 import ssl
 import sys
@@ -34,6 +39,7 @@ import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
 
@@ -41,18 +47,10 @@ ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 OVERPASS = "https://overpass-api.de/api/interpreter"
 
-
-def ssl_context():
-    """Build a verifying SSL context, preferring certifi if it's installed.
-
-    Fixes the common macOS python.org issue where Python doesn't use the
-    system keychain and TLS verification fails with CERTIFICATE_VERIFY_FAILED.
-    """
-    try:
-        import certifi
-        return ssl.create_default_context(cafile=certifi.where())
-    except Exception:
-        return ssl.create_default_context()
+sys.path.insert(0, str(ROOT / "scripts"))
+import http_cache  # noqa: E402
+import peak_catalogue  # noqa: E402
+from http_client import ssl_context  # noqa: E402
 
 
 CERT_HINT = (
@@ -158,10 +156,33 @@ def slugify(name, abbr):
     return f"{s}-{abbr}"
 
 
-def overpass_query(state_name, retries=4):
-    q = (f'[out:json][timeout:120];'
-         f'area["name"="{state_name}"]["admin_level"="4"]["boundary"="administrative"]->.a;'
-         f'node["natural"="peak"]["name"](area.a);out;')
+# Whole-state import is tiled: STATE_BBOX is cut into IMPORT_TILE_DEG cells
+# and each is its own Overpass query (still restricted to the state's area),
+# so Alaska or California is many small responses instead of one huge one
+# near the server's timeout, and a tile that fails is retried on its own.
+# Tiles that did come back sit in the HTTP cache, so a re-run after a failed
+# tile only fetches what is missing.
+IMPORT_TILE_DEG = 4.0
+IMPORT_WORKERS = 2  # Overpass allows about two slots per client
+
+
+def import_tiles(state_slug):
+    """(south, west, north, east) cells covering the state's bounding box;
+    one open box when the state has none."""
+    box = STATE_BBOX.get(state_slug)
+    if not box:
+        return [None]
+    min_lat, min_lon, max_lat, max_lon = box
+    rows = max(1, math.ceil((max_lat - min_lat) / IMPORT_TILE_DEG))
+    cols = max(1, math.ceil((max_lon - min_lon) / IMPORT_TILE_DEG))
+    dlat, dlon = (max_lat - min_lat) / rows, (max_lon - min_lon) / cols
+    return [(round(min_lat + r * dlat, 4), round(min_lon + c * dlon, 4),
+             round(min_lat + (r + 1) * dlat, 4), round(min_lon + (c + 1) * dlon, 4))
+            for r in range(rows) for c in range(cols)]
+
+
+def overpass_fetch(q, retries=4):
+    """One Overpass query, retried with backoff; raises the last error."""
     data = urllib.parse.urlencode({"data": q}).encode()
     req = urllib.request.Request(
         OVERPASS, data=data,
@@ -170,8 +191,12 @@ def overpass_query(state_name, retries=4):
     last = None
     for attempt in range(retries):
         try:
-            with urllib.request.urlopen(req, timeout=180, context=ctx) as resp:
-                return json.loads(resp.read())
+            result = http_cache.fetch(req, timeout=180, context=ctx)
+            if "runtime error" in str(result.get("remark", "")):
+                raise RuntimeError(result["remark"][:120])  # timed out server-side
+            return result
+        except http_cache.OfflineMiss:
+            raise
         except urllib.error.URLError as e:
             # Certificate failures will never succeed on retry — fail fast with
             # an actionable hint instead of burning the retry budget.
@@ -192,6 +217,28 @@ def overpass_query(state_name, retries=4):
     raise last
 
 
+def overpass_query(state_name, state_slug=None, retries=4):
+    """Every named peak in the state: {"elements": [...]}, one per OSM id,
+    fetched tile by tile (import_tiles) on IMPORT_WORKERS threads. Request
+    pacing is the shared Overpass budget (rate_limit.py). Raises if a tile
+    still fails after its retries — a partial state would prune wrongly."""
+    area = (f'area["name"="{state_name}"]["admin_level"="4"]'
+            f'["boundary"="administrative"]->.a;')
+    queries = []
+    for tile in import_tiles(state_slug):
+        bbox = "" if tile is None else "({},{},{},{})".format(*tile)
+        queries.append(f'[out:json][timeout:120];{area}'
+                       f'node["natural"="peak"]["name"](area.a){bbox};out;')
+    if len(queries) > 1:
+        print(f"  {len(queries)} tiles of {IMPORT_TILE_DEG:g}°")
+    by_id = {}
+    with ThreadPoolExecutor(max_workers=min(IMPORT_WORKERS, len(queries))) as ex:
+        for result in ex.map(lambda q: overpass_fetch(q, retries), queries):
+            for el in result.get("elements", []):
+                by_id.setdefault(el["id"], el)  # tiles share their edges
+    return {"elements": [by_id[k] for k in sorted(by_id)]}
+
+
 def parse_ele(tags, dem_ft=None):
     """Resolve an OSM `ele` tag to feet, cross-checked against the DEM.
 
@@ -317,7 +364,7 @@ def main():
     args = sys.argv[1:]
     opts = {"min_ele": 0, "max_ele": None, "min_prominence": 0, "limit": None,
             "dry_run": False, "enable": False, "pipeline": False,
-            "sort_by": "elevation"}
+            "sort_by": "elevation", "catalogue": None}
     positional = []
     i = 0
     while i < len(args):
@@ -346,6 +393,10 @@ def main():
             opts["enable"] = True; i += 1
         elif a == "--pipeline":
             opts["pipeline"] = True; i += 1
+        elif a == "--catalogue":
+            opts["catalogue"] = peak_catalogue.CATALOGUE_DIR; i += 1
+        elif a == "--catalogue-dir":
+            opts["catalogue"] = Path(args[i + 1]).expanduser(); i += 2
         else:
             positional.append(a); i += 1
 
@@ -357,11 +408,25 @@ def main():
     state_slug = positional[0]
     state_name, abbr = STATES[state_slug]
 
-    print(f"Querying OpenStreetMap for named peaks in {state_name}…")
-    try:
-        result = overpass_query(state_name)
-    except Exception as e:
-        sys.exit(f"❌ Overpass query failed: {e}")
+    if opts["catalogue"]:
+        # Same elements Overpass would return, pre-filtered on the raw tags;
+        # parse_ele and the filters below still decide.
+        print(f"Reading named peaks in {state_name} from {opts['catalogue']}…")
+        try:
+            catalogue = peak_catalogue.Catalogue(opts["catalogue"])
+        except (OSError, ValueError) as e:
+            sys.exit(f"❌ {e}")
+        if state_slug not in catalogue.states():
+            sys.exit(f"❌ The peak catalogue has no {state_name} peaks — rebuild it "
+                     f"with an extract that covers the state")
+        result = {"elements": catalogue.select(state_slug, opts["min_ele"], opts["max_ele"],
+                                               opts["min_prominence"])}
+    else:
+        print(f"Querying OpenStreetMap for named peaks in {state_name}…")
+        try:
+            result = overpass_query(state_name, state_slug)
+        except Exception as e:
+            sys.exit(f"❌ Overpass query failed: {e}")
 
     elements = [e for e in result.get("elements", []) if e.get("tags", {}).get("name")]
     print(f"  {len(elements)} named peaks returned")
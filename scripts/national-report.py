@@ -3,18 +3,29 @@
 Nationwide inventory health report: every state at a glance.
 
 One table for the whole dataset — LIVE vs DRAFT per state, the top reasons
-drafts are held, and a duplicate guard (same name or <0.3 mi apart within a
-state — duplicate pages cannibalize each other in search). Also written as
-machine-readable JSON to pipeline-reports/national-report.json.
+drafts are held, and a duplicate guard (duplicate pages cannibalize each
+other in search). Also written as machine-readable JSON to
+pipeline-reports/national-report.json.
+
+The duplicate guard runs over the whole country at once, so the same peak
+imported under two adjacent states is caught too. A pair is flagged when
+  - both are in one state under the same normalized name, or
+  - they are under 0.3 mi apart (any states), or
+  - they share a normalized name and are under 2 mi apart (any states).
+Names go through a hash map and coordinates through a spatial index
+(spatial_index.py), so the check is near-linear rather than all-pairs. Each
+pair is reported with its distance and name similarity.
 
 Usage:
   python3 scripts/national-report.py
 """
 
+import difflib
 import glob
 import json
-import math
-from collections import Counter
+import re
+import sys
+from collections import Counter, defaultdict
 from datetime import date
 from pathlib import Path
 
@@ -22,13 +33,12 @@ ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 NON_TRAIL = {"blog", "guides", "_rejected"}
 
+sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
+from spatial_index import PointIndex  # noqa: E402
 
-def haversine_mi(a, b):
-    R = 3959
-    p1, p2 = math.radians(a[0]), math.radians(b[0])
-    dlat = math.radians(b[0] - a[0]); dlon = math.radians(b[1] - a[1])
-    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(h))
+DUP_RADIUS_MI = 0.3        # this close is one peak, whatever the names say
+SAME_NAME_RADIUS_MI = 2.0  # same name this close across a state line
 
 
 def is_live(d):
@@ -49,50 +59,93 @@ def draft_reason(d):
     return "quality review"
 
 
+def name_key(name):
+    """Normalized name for matching: "Mt. Washington" == "mount washington"."""
+    s = re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).strip()
+    return re.sub(r"^mt\b", "mount", s)
+
+
+def find_duplicates(recs):
+    """Possible duplicate pairs among recs: (state, file, name, lat, lon).
+
+    Returns pair dicts in input order (recs are expected sorted by state,
+    then file).
+    """
+    pairs = {}  # (i, j) -> reason, i < j
+
+    by_name = defaultdict(list)
+    for i, r in enumerate(recs):
+        by_name[(r[0], name_key(r[2]))].append(i)
+    for group in by_name.values():
+        for a in range(len(group)):
+            for b in range(a + 1, len(group)):
+                pairs[(group[a], group[b])] = "same name"
+
+    index = PointIndex(cell_deg=0.05)
+    for i, r in enumerate(recs):
+        index.add(r[3], r[4], i)
+    for i, r in enumerate(recs):
+        for d, j in index.within(r[3], r[4], SAME_NAME_RADIUS_MI):
+            if j <= i or (i, j) in pairs:
+                continue
+            if d < DUP_RADIUS_MI:
+                pairs[(i, j)] = "proximity"
+            elif name_key(r[2]) == name_key(recs[j][2]):
+                pairs[(i, j)] = "same name"
+
+    out = []
+    for (i, j), reason in sorted(pairs.items()):
+        a, b = recs[i], recs[j]
+        out.append({
+            "state": a[0] if a[0] == b[0] else f"{a[0]}/{b[0]}",
+            "files": [a[1], b[1]],
+            "reason": reason,
+            "distance_mi": round(geodesy.distance_mi(a[3], a[4], b[3], b[4]), 2),
+            "name_similarity": round(difflib.SequenceMatcher(
+                None, name_key(a[2]), name_key(b[2])).ratio(), 2),
+        })
+    return out
+
+
 def main():
     states = sorted(p.name for p in DATA.iterdir()
                     if p.is_dir() and p.name not in NON_TRAIL)
     report = {"date": str(date.today()), "states": {}, "duplicates": []}
     tot_live = tot_draft = 0
+    recs = []
 
     print(f"{'STATE':<16} {'LIVE':>5} {'DRAFT':>6}  TOP DRAFT REASONS")
     print("-" * 64)
     for state in states:
         live = draft = 0
         reasons = Counter()
-        recs = []
         for f in sorted(glob.glob(str(DATA / state / "*.json"))):
             d = json.loads(Path(f).read_text())
             if not d.get("name"):
                 continue
             if d.get("lat") is not None:
-                recs.append((Path(f).name, d["name"].lower().strip(),
-                             d["lat"], d["lon"]))
+                recs.append((state, Path(f).name, d["name"], d["lat"], d["lon"]))
             if is_live(d):
                 live += 1
             else:
                 draft += 1
                 reasons[draft_reason(d)] += 1
-        # duplicate guard within the state
-        for i in range(len(recs)):
-            for j in range(i + 1, len(recs)):
-                a, b = recs[i], recs[j]
-                if a[1] == b[1] or haversine_mi((a[2], a[3]), (b[2], b[3])) < 0.3:
-                    report["duplicates"].append(
-                        {"state": state, "files": [a[0], b[0]]})
         tot_live += live; tot_draft += draft
         top = ", ".join(f"{r} ({n})" for r, n in reasons.most_common(2)) or "—"
         print(f"{state:<16} {live:>5} {draft:>6}  {top}")
         report["states"][state] = {"live": live, "draft": draft,
                                    "draft_reasons": dict(reasons)}
 
+    report["duplicates"] = find_duplicates(recs)
+
     print("-" * 64)
     print(f"{'TOTAL':<16} {tot_live:>5} {tot_draft:>6}   across {len(states)} state(s)")
     if report["duplicates"]:
         print(f"\n⚠️  {len(report['duplicates'])} possible duplicate pair(s) "
               f"(SEO cannibalization risk):")
         for dup in report["duplicates"][:10]:
-            print(f"   {dup['state']}: {dup['files'][0]} <-> {dup['files'][1]}")
+            print(f"   {dup['state']}: {dup['files'][0]} <-> {dup['files'][1]} "
+                  f"({dup['distance_mi']} mi, names {dup['name_similarity']:.0%} alike)")
     else:
         print("✅ No duplicate trails detected.")
 
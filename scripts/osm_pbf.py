@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Streaming OSM PBF reader: tagged nodes from a .osm.pbf extract, in flat memory.
+
+A Geofabrik extract is a sequence of independently zlib-compressed blocks of
+a few thousand OSM entities each. iter_nodes() reads one block at a time, so
+a multi-GB national extract never has to fit in memory, and decodes the
+protobuf by hand (no osmium / protobuf dependency):
+
+  prefilter  a block is only decoded when its string table holds both the
+             key and the value asked for (e.g. natural / peak) — almost every
+             block is skipped after a byte search of the decompressed data
+  nodes      DenseNodes (what every modern writer emits) and plain Node
+             groups; ways and relations are never decoded
+  sorted     when the header advertises Sort.Type_then_ID, all nodes come
+             before the first way, so reading stops at the first block
+             without nodes
+"""
+
+import struct
+import zlib
+
+SUPPORTED_FEATURES = {"OsmSchema-V0.6", "DenseNodes"}
+
+
+class PBFError(ValueError):
+    pass
+
+
+def _varint(buf, i):
+    """(value, next index) for the protobuf varint at buf[i]."""
+    shift = result = 0
+    while True:
+        b = buf[i]
+        i += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, i
+        shift += 7
+
+
+def _zigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _int64(n):
+    return n - (1 << 64) if n >= 1 << 63 else n
+
+
+def _fields(buf):
+    """(field number, value) for each field of a message: ints for varints,
+    memoryviews for length-delimited fields (fixed-width fields skipped)."""
+    buf = memoryview(buf)
+    i, n = 0, len(buf)
+    while i < n:
+        key, i = _varint(buf, i)
+        wire = key & 7
+        if wire == 0:
+            value, i = _varint(buf, i)
+        elif wire == 2:
+            size, i = _varint(buf, i)
+            value, i = buf[i:i + size], i + size
+        elif wire == 1:
+            i += 8
+            continue
+        elif wire == 5:
+            i += 4
+            continue
+        else:
+            raise PBFError(f"unsupported protobuf wire type {wire}")
+        yield key >> 3, value
+
+
+def _packed(buf, signed=False):
+    out = []
+    i, n = 0, len(buf)
+    while i < n:
+        v, i = _varint(buf, i)
+        out.append(_zigzag(v) if signed else v)
+    return out
+
+
+def _deltas(buf):
+    """A delta-coded packed sint64 array, decoded to absolute values."""
+    out = []
+    total = 0
+    for v in _packed(buf, signed=True):
+        total += v
+        out.append(total)
+    return out
+
+
+def _blobs(f):
+    """(type, decompressed data) for each block of the file."""
+    while True:
+        head = f.read(4)
+        if not head:
+            return
+        if len(head) < 4:
+            raise PBFError("truncated block header")
+        header = dict(_fields(f.read(struct.unpack(">I", head)[0])))
+        kind = bytes(header.get(1, b"")).decode()
+        blob = dict(_fields(f.read(header.get(3, 0))))
+        if 1 in blob:
+            data = bytes(blob[1])
+        elif 3 in blob:
+            data = zlib.decompress(blob[3])
+        else:
+            raise PBFError("unsupported block compression (only raw and zlib)")
+        yield kind, data
+
+
+def _header(data):
+    required, optional = [], []
+    for no, value in _fields(data):
+        if no == 4:
+            required.append(bytes(value).decode())
+        elif no == 5:
+            optional.append(bytes(value).decode())
+    missing = set(required) - SUPPORTED_FEATURES
+    if missing:
+        raise PBFError(f"extract needs unsupported features: {', '.join(sorted(missing))}")
+    return "Sort.Type_then_ID" in optional
+
+
+def _dense(group, strings, want, scale):
+    """Tagged nodes of a DenseNodes group that carry key=value."""
+    parts = dict(_fields(group))
+    kv = _packed(parts.get(10, b""))
+    if not kv:
+        return
+    # Find the matching nodes from the tags alone first; ids and coordinates
+    # are only decoded for blocks that have one.
+    hits, tags, node = {}, {}, 0
+    i = 0
+    while i < len(kv):
+        k = kv[i]
+        if k == 0:
+            if tags.get(want[0]) == want[1]:
+                hits[node] = tags
+            tags, node = {}, node + 1
+            i += 1
+            continue
+        tags[strings[k]] = strings[kv[i + 1]]
+        i += 2
+    if not hits:
+        return
+    ids, lats, lons = _deltas(parts[1]), _deltas(parts[8]), _deltas(parts[9])
+    for n, t in hits.items():
+        yield ids[n], scale(lats[n], lons[n]), t
+
+
+def _plain(node, strings, want, scale):
+    parts = {}
+    for no, value in _fields(node):
+        parts[no] = value
+    keys, vals = _packed(parts.get(2, b"")), _packed(parts.get(3, b""))
+    tags = {strings[k]: strings[v] for k, v in zip(keys, vals)}
+    if tags.get(want[0]) == want[1]:
+        yield _zigzag(parts[1]), scale(_zigzag(parts[8]), _zigzag(parts[9])), tags
+
+
+def iter_nodes(path, key, value):
+    """(osm_id, (lat, lon), tags) for every node tagged key=value."""
+    needle = (key.encode(), value.encode())
+    sorted_ = False
+    with open(path, "rb") as f:
+        for kind, data in _blobs(f):
+            if kind == "OSMHeader":
+                sorted_ = _header(data)
+                continue
+            if kind != "OSMData":
+                continue
+            hit = needle[1] in data and needle[0] in data
+            if not (hit or sorted_):
+                continue
+            table, groups = b"", []
+            granularity, lat_off, lon_off = 100, 0, 0
+            for no, v in _fields(data):
+                if no == 1:
+                    table = v
+                elif no == 2:
+                    groups.append(v)
+                elif no == 17:
+                    granularity = v
+                elif no == 19:
+                    lat_off = _int64(v)
+                elif no == 20:
+                    lon_off = _int64(v)
+            if sorted_ and not any(next(_fields(g), (0,))[0] in (1, 2) for g in groups):
+                return  # past the nodes
+            if not hit:
+                continue
+            table = [bytes(s) for n, s in _fields(table) if n == 1]
+            if needle[0] not in table or needle[1] not in table:
+                continue
+            strings = [s.decode("utf-8", "replace") for s in table]
+
+            def scale(lat, lon):
+                return ((lat_off + granularity * lat) * 1e-9,
+                        (lon_off + granularity * lon) * 1e-9)
+
+            for group in groups:
+                for no, v in _fields(group):
+                    if no == 2:
+                        yield from _dense(v, strings, (key, value), scale)
+                    elif no == 1:
+                        yield from _plain(v, strings, (key, value), scale)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Shape-preserving path simplification: Douglas–Peucker to a point budget.
+
+fetch-trails.py (120 points) and gpx-to-geo.py (100) used to thin a route by
+keeping every k-th point. That cuts the corners off switchbacks and can step
+over the summit itself, and audit_route then flags the result as "Path very
+straight" or sparse. keep_indices() keeps the points that carry the shape
+instead:
+
+  metric     perpendicular offset from the chord, in metres, on a local
+             equirectangular projection of the path (exact enough at trail
+             scale)
+  elevation  elevation=True also measures each point's climb deviation from
+             the chord's straight-line grade (path elevations are in feet),
+             weighted by ELE_WEIGHT, so climb inflections — a false summit,
+             the low point of a saddle — survive even on a straight line;
+             the highest point is always kept
+  budget     chords are split worst-first, so stopping at max_points keeps
+             the most significant points; tolerance_m stops earlier once
+             every point is within that error
+
+The splitting is iterative (a heap of pending chords, no recursion), so a
+100k-point GPX track never approaches the recursion limit. Tracks that dense
+are first thinned by a radial-distance pass at a spacing well below the
+result's resolution (the summit and low point always stay), and each chord
+scan is vectorized with NumPy when it is installed.
+"""
+
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError:  # optional: the chord scan falls back to a Python loop
+    np = None
+
+EARTH_RADIUS_M = 6371000.0
+FT_TO_M = 0.3048
+TOLERANCE_M = 5.0
+ELE_WEIGHT = 2.0  # a metre of climb error counts as two metres sideways
+PREFILTER_MIN_POINTS = 5000
+PREFILTER_RATIO = 20
+STREAM_CAP = 20000
+
+
+def _project(path):
+    """(xs, ys) in metres around the path's mean latitude."""
+    lat0 = math.radians(sum(p[0] for p in path) / len(path))
+    k = EARTH_RADIUS_M * math.pi / 180
+    kx = k * math.cos(lat0)
+    return [p[1] * kx for p in path], [p[0] * k for p in path]
+
+
+def _farthest(xs, ys, zs, a, b):
+    """(index, error) of the point between a and b farthest from chord a-b."""
+    ax, ay = xs[a], ys[a]
+    dx, dy = xs[b] - ax, ys[b] - ay
+    seg2 = dx * dx + dy * dy
+    if np is not None and b - a > 64:
+        px, py = xs[a + 1:b] - ax, ys[a + 1:b] - ay
+        if seg2 > 0:
+            t = np.clip((px * dx + py * dy) / seg2, 0.0, 1.0)
+        else:
+            t = np.zeros(len(px))
+        err = np.hypot(px - t * dx, py - t * dy)
+        if zs is not None:
+            dz = np.abs(zs[a + 1:b] - (zs[a] + t * (zs[b] - zs[a])))
+            err = np.maximum(err, ELE_WEIGHT * dz)
+        i = int(np.argmax(err))
+        return a + 1 + i, float(err[i])
+    # Squared errors in the loop; one sqrt at the end.
+    best_i, best = a + 1, -1.0
+    za = zs[a] if zs is not None else 0.0
+    dzab = zs[b] - za if zs is not None else 0.0
+    w2 = ELE_WEIGHT * ELE_WEIGHT
+    inv = 1.0 / seg2 if seg2 > 0 else 0.0
+    for i in range(a + 1, b):
+        px = xs[i] - ax
+        py = ys[i] - ay
+        t = (px * dx + py * dy) * inv
+        if t < 0.0:
+            t = 0.0
+        elif t > 1.0:
+            t = 1.0
+        ex = px - t * dx
+        ey = py - t * dy
+        err = ex * ex + ey * ey
+        if zs is not None:
+            dz = zs[i] - za - t * dzab
+            dz = dz * dz * w2
+            if dz > err:
+                err = dz
+        if err > best:
+            best_i, best = i, err
+    return best_i, math.sqrt(best)
+
+
+def _radial(xs, ys, zs, spacing_m):
+    """Indices left after dropping points within spacing_m of the previous
+    kept one. The lowest and highest points always stay."""
+    n = len(xs)
+    must = set()
+    if zs is not None:
+        must = {min(range(n), key=zs.__getitem__), max(range(n), key=zs.__getitem__)}
+    s2 = spacing_m * spacing_m
+    zlim = spacing_m / ELE_WEIGHT
+    out = [0]
+    lx, ly, lz = xs[0], ys[0], zs[0] if zs is not None else 0.0
+    for i in range(1, n - 1):
+        dx, dy = xs[i] - lx, ys[i] - ly
+        if (dx * dx + dy * dy > s2 or i in must
+                or (zs is not None and abs(zs[i] - lz) > zlim)):
+            out.append(i)
+            lx, ly = xs[i], ys[i]
+            if zs is not None:
+                lz = zs[i]
+    out.append(n - 1)
+    return out
+
+
+def keep_indices(path, max_points=None, tolerance_m=TOLERANCE_M, elevation=False):
+    """Sorted indices of the [lat, lon(, ele_ft)] points to keep.
+
+    The first and last points are always kept. At most max_points are kept
+    (None: no budget), and splitting stops once no point is off by more than
+    tolerance_m.
+    """
+    n = len(path)
+    if n <= 2:
+        return list(range(n))
+    budget = n if max_points is None else max(2, max_points)
+    xs, ys = _project(path)
+    zs = None
+    if elevation and all(len(p) > 2 and p[2] is not None for p in path):
+        zs = [p[2] * FT_TO_M for p in path]
+
+    # Long dense tracks are first thinned to a spacing far below what the
+    # result can resolve, so the chord scans below run over thousands of
+    # points, not 100k: the tolerance, or the budget's mean spacing divided
+    # by PREFILTER_RATIO.
+    ids = None
+    if n > PREFILTER_MIN_POINTS:
+        spacing = tolerance_m or 0.0
+        if max_points:
+            length = sum(math.hypot(xs[i] - xs[i - 1], ys[i] - ys[i - 1])
+                         for i in range(1, n))
+            per_point = length / budget / PREFILTER_RATIO
+            spacing = min(spacing, per_point) if spacing else per_point
+        if spacing > 0:
+            ids = _radial(xs, ys, zs, spacing)
+            xs = [xs[i] for i in ids]
+            ys = [ys[i] for i in ids]
+            zs = [zs[i] for i in ids] if zs is not None else None
+            n = len(ids)
+    if np is not None:
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        zs = np.asarray(zs) if zs is not None else None
+
+    keep = [0, n - 1]
+    heap = []
+
+    def push(a, b):
+        if b - a >= 2:
+            i, err = _farthest(xs, ys, zs, a, b)
+            heapq.heappush(heap, (-err, a, b, i))
+
+    # The high point is kept whatever the budget: it is the summit marker.
+    top = int(np.argmax(zs)) if zs is not None and np is not None else \
+        max(range(n), key=zs.__getitem__) if zs is not None else 0
+    if 0 < top < n - 1 and budget > 2:
+        keep.append(top)
+        push(0, top)
+        push(top, n - 1)
+    else:
+        push(0, n - 1)
+    while heap and len(keep) < budget:
+        neg_err, a, b, i = heapq.heappop(heap)
+        if -neg_err <= tolerance_m:
+            break
+        keep.append(i)
+        push(a, i)
+        push(i, b)
+    keep.sort()
+    return keep if ids is None else [ids[i] for i in keep]
+
+
+def thin_stream(points, cap=STREAM_CAP):
+    """(kept, count) from an iterable of [lat, lon(, ele_ft)] points.
+
+    Holds at most ~cap points whatever the input length, so a track can be
+    read and reduced in one pass: a radial-distance filter whose spacing
+    starts at zero (input under cap comes back whole) and doubles each time
+    the kept set fills. The first and last points and the running high and
+    low points are always kept. Run keep_indices() on the result.
+    """
+    k = EARTH_RADIUS_M * math.pi / 180
+    kept, spacing, count = [], 0.0, 0
+    last = pending = None
+    hi = lo = None  # the running high and low points
+
+    def far(a, b, s2):
+        dx = (b[1] - a[1]) * k * math.cos(math.radians(a[0]))
+        dy = (b[0] - a[0]) * k
+        return dx * dx + dy * dy > s2
+
+    for p in points:
+        count += 1
+        ele = p[2] if len(p) > 2 else None
+        extreme = False
+        if ele is not None:
+            if hi is None or ele > hi[2]:
+                hi, extreme = p, True
+            if lo is None or ele < lo[2]:
+                lo, extreme = p, True
+        if last is None or extreme or spacing == 0.0 or far(last, p, spacing * spacing):
+            kept.append(p)
+            last, pending = p, None
+        else:
+            pending = p
+        if len(kept) > cap:
+            spacing = max(1.0, spacing * 2)
+            s2 = spacing * spacing
+            thinned = [kept[0]]
+            for q in kept[1:-1]:
+                if q is hi or q is lo or far(thinned[-1], q, s2):
+                    thinned.append(q)
+            thinned.append(kept[-1])
+            kept = thinned
+            last = kept[-1]
+    if pending is not None:
+        kept.append(pending)
+    return kept, count
+
+
+def simplify(path, max_points=None, tolerance_m=TOLERANCE_M, elevation=False):
+    """The path reduced to keep_indices(); the points themselves are reused."""
+    return [path[i] for i in keep_indices(path, max_points, tolerance_m, elevation)]
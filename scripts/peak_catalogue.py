@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Peak catalogue: every named OSM peak, per state, as memory-mapped columns.
+
+import-state.py asks the public Overpass server for a state's peaks on every
+run, and bootstrapping fifty states means fifty rate-limited whole-state
+queries. build-peak-catalogue.py reads the same peaks once from a local
+Geofabrik extract (osm_pbf.py) and writes them here; import-state.py
+--catalogue then selects from disk instead:
+
+  columns    one flat file per numeric column (id, lat, lon, ele, prominence,
+             and each row's offset into tags.jsonl), written with array and
+             read back through mmap — nothing is parsed to open it
+  rows       grouped by state and sorted by raw `ele` (highest first) within
+             each; meta.json maps each state to its [start, stop) rows, so a
+             state is a slice and --min-ele is a binary search into it
+  tags       the raw name / ele / prominence / wikidata tags, one JSON line
+             per row, read only for the rows a query returns; import-state
+             still runs its own ele checks (parse_ele) on them
+  states     a per-state extract (vermont-latest.osm.pbf) assigns its peaks
+             to that state by Geofabrik's boundary polygon; a larger extract
+             falls back to STATE_BBOX, so a peak near a border is listed under
+             every state whose box holds it
+
+The ele and prominence columns are the tags' leading numbers with no unit
+handling (NaN when missing), so select() only pre-filters: a peak is kept
+when either reading of `ele` (metres or feet) could pass the bounds.
+"""
+
+import json
+import math
+import mmap
+import re
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CATALOGUE_DIR = ROOT / "peak-catalogue"
+M_TO_FT = 3.28084
+
+COLUMNS = {"id": "q", "lat": "d", "lon": "d", "ele": "f", "prominence": "f",
+           "offset": "q"}
+TAGS = ("name", "ele", "prominence", "wikidata")
+
+
+def tag_number(raw):
+    """The leading number of an OSM tag value, or NaN."""
+    m = re.match(r"[-+]?[0-9]*\.?[0-9]+", str(raw or "").replace(",", "."))
+    return float(m.group()) if m else math.nan
+
+
+def _by_ele(row):
+    ele = tag_number(row[3].get("ele"))
+    return (-ele if not math.isnan(ele) else math.inf, row[0])
+
+
+def write(rows_by_state, out_dir=CATALOGUE_DIR, sources=()):
+    """Write {state_slug: [(osm_id, lat, lon, tags), ...]} as a catalogue."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cols = {name: array(code) for name, code in COLUMNS.items()}
+    states = {}
+    with open(out_dir / "tags.jsonl", "wb") as tags_out:
+        for slug in sorted(rows_by_state):
+            start = len(cols["id"])
+            for osm_id, lat, lon, tags in sorted(rows_by_state[slug], key=_by_ele):
+                cols["id"].append(osm_id)
+                cols["lat"].append(lat)
+                cols["lon"].append(lon)
+                cols["ele"].append(tag_number(tags.get("ele")))
+                cols["prominence"].append(tag_number(tags.get("prominence")))
+                cols["offset"].append(tags_out.tell())
+                keep = {k: tags[k] for k in TAGS if tags.get(k)}
+                tags_out.write(json.dumps(keep, ensure_ascii=False).encode() + b"\n")
+            states[slug] = [start, len(cols["id"])]
+        cols["offset"].append(tags_out.tell())  # end of the last row
+    for name, col in cols.items():
+        with open(out_dir / f"{name}.bin", "wb") as f:
+            col.tofile(f)
+    meta = {"built": str(date.today()), "sources": [str(s) for s in sources],
+            "byteorder": sys.byteorder, "count": len(cols["id"]),
+            "columns": COLUMNS, "states": states}
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2) + "\n")
+    return meta
+
+
+class Catalogue:
+    def __init__(self, path=CATALOGUE_DIR):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(
+                f"no peak catalogue at {self.path} — build one with "
+                f"scripts/build-peak-catalogue.py")
+        self.meta = json.loads(meta_path.read_text())
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"peak catalogue was built {self.meta.get('byteorder')}-endian")
+        self._cols = {}
+
+    def _col(self, name):
+        if name not in self._cols:
+            with open(self.path / f"{name}.bin", "rb") as f:
+                if f.seek(0, 2) == 0:
+                    view = memoryview(b"").cast(COLUMNS[name])
+                else:
+                    view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                    view = view.cast(COLUMNS[name])
+            self._cols[name] = view
+        return self._cols[name]
+
+    def states(self):
+        return sorted(self.meta["states"])
+
+    def select(self, state_slug, min_ele_ft=0, max_ele_ft=None, min_prominence=0):
+        """Overpass-shaped elements ({id, lat, lon, tags}) for the state's
+        peaks that could pass the bounds, highest first."""
+        start, stop = self.meta["states"].get(state_slug, (0, 0))
+        ele, prom = self._col("ele"), self._col("prominence")
+        # Highest plausible reading is the metres one; rows are sorted by
+        # raw ele, so everything past the first row below the floor fails.
+        floor = (min_ele_ft - 0.5) / M_TO_FT if min_ele_ft else None
+        lo, hi = start, stop
+        while floor is not None and lo < hi:
+            mid = (lo + hi) // 2
+            if ele[mid] >= floor:
+                lo = mid + 1
+            else:
+                hi = mid
+        end = lo if floor is not None else stop
+        ids, lats, lons = self._col("id"), self._col("lat"), self._col("lon")
+        offsets = self._col("offset")
+        out = []
+        with open(self.path / "tags.jsonl", "rb") as tags:
+            for row in range(start, end):
+                e = ele[row]
+                if not e > 0:  # missing or non-positive: parse_ele rejects it
+                    continue
+                if max_ele_ft is not None and e > max_ele_ft + 0.5:
+                    continue  # even the feet reading is too high
+                if min_prominence and not prom[row] >= min_prominence:
+                    continue
+                tags.seek(offsets[row])
+                out.append({"id": ids[row], "lat": lats[row], "lon": lons[row],
+                            "tags": json.loads(tags.read(offsets[row + 1] - offsets[row]))})
+        return out
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Persistent manifest for incremental run-pipeline.py runs.
+
+pipeline-reports/.manifest.json remembers, per state, what every trail file
+looked like after the last run (a content hash) and the per-record results a
+state report is built from: the audit result, the live/draft flag and the
+record's nearby_peaks link targets. On the next run a record whose inputs are
+unchanged is neither parsed nor re-run — its cached results go straight into
+the report — so a no-op rerun across all states costs one hashing pass.
+
+What invalidates a record:
+  hash  sha1 of the trail file as the last run left it
+  gpx   size/mtime of gpx-downloads/<slug>.gpx (a dropped GPX is new input)
+  env   per state: the stage scripts' source, the state's config entry and
+        the quality settings. Any change re-runs every record in the state.
+
+Link verdicts are deliberately not cached, only each record's targets: they
+are re-checked against the current slug index every run, so adding or
+removing a trail in another state is picked up without re-parsing anything.
+
+Runs for different states may overlap (auto-all.py schedules them side by
+side), so a run does not write back the manifest it loaded: update() merges
+just its own states into the file as it is now, under a lock.
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; the replace is still atomic
+    fcntl = None
+
+MANIFEST_VERSION = 1
+
+# Scripts whose code decides a record's pipeline output. Editing any of them
+# changes every state's env hash, so the next run redoes everything.
+STAGE_SOURCES = [
+    "run-pipeline.py", "trail_store.py", "pipeline_manifest.py",
+    "gpx-to-geo.py", "generate-nearby-peaks.py", "generate-description.py",
+    "generate-seo.py", "check-links.py", "audit-gps-quality.py", "geodesy.py",
+    "spatial_index.py", "path_simplify.py", "gpx_stream.py",
+    "elevation_chart.py", "route_locator.py",
+]
+
+
+def file_hash(path):
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def gpx_signature(path):
+    """Cheap change marker for a GPX drop (size + mtime), None if absent."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def code_version(scripts_dir):
+    h = hashlib.sha1()
+    for name in STAGE_SOURCES:
+        p = Path(scripts_dir) / name
+        if p.exists():
+            h.update(name.encode() + b"\0" + p.read_bytes())
+    return h.hexdigest()
+
+
+def state_env(code, state, config):
+    """Hash of everything, besides the records themselves, a state's stage
+    results depend on."""
+    key = {"code": code, "state": state,
+           "quality": config.get("quality", {}),
+           "data_dir": config.get("data_dir"),
+           "gpx_dir": config.get("gpx_dir", "gpx-downloads")}
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def empty():
+    return {"version": MANIFEST_VERSION, "states": {}}
+
+
+def load(path):
+    """The saved manifest, or an empty one if missing, corrupt or outdated."""
+    try:
+        manifest = json.loads(Path(path).read_text())
+    except (OSError, json.JSONDecodeError):
+        return empty()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty()
+    manifest.setdefault("states", {})
+    return manifest
+
+
+def save(path, manifest):
+    """Write the manifest atomically (readers never see a partial file)."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked(path):
+    """Hold an exclusive lock on the manifest's sidecar .lock file."""
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def update(path, entries):
+    """Merge {state: entry} into the saved manifest. It is re-read under the
+    lock, so states written by a concurrent run are kept."""
+    with _locked(path):
+        manifest = load(path)
+        manifest["states"].update(entries)
+        save(path, manifest)
+
+
+def slug_index(data_dir, states, manifest):
+    """{state: {(state_slug, slug)}} for every parseable trail in `states`.
+
+    Files whose hash matches the manifest reuse its cached slugs; only new or
+    changed files are parsed.
+    """
+    out = {}
+    for state in states:
+        cached = manifest.get("states", {}).get(state, {}).get("records", {})
+        slugs = set()
+        for f in (Path(data_dir) / state).glob("*.json"):
+            prev = cached.get(f.name)
+            if prev and prev.get("hash") == file_hash(f):
+                if prev.get("slug"):
+                    slugs.add((prev["state_slug"], prev["slug"]))
+                continue
+            try:
+                d = json.loads(f.read_text())
+            except json.JSONDecodeError:
+                continue
+            slugs.add((d.get("state_slug", state), d.get("slug", f.stem)))
+        out[state] = slugs
+    return out
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Cross-process rate limiter: one adaptive request budget per upstream host.
+
+Pacing used to be fixed sleeps scattered through the fetchers — 0.2 s per
+Open-Meteo batch, 0.5 s per trail in enrich-poi, 0.3 s per Wikimedia call,
+a 20 s stagger between auto-all workers — and none of it was shared: three
+auto-all workers each kept their own pace and burst into Overpass together.
+http_client.read() now asks acquire() for a slot before every request, and
+the slots are shared by every pipeline process through one SQLite file
+(.cache/ratelimit.sqlite), the same way http_cache shares its store:
+
+  budget    RATES gives each host a request interval and a burst: a token
+            bucket, kept as the time the next request is due (GCRA), so a
+            slot is reserved in one short transaction and waited for outside
+            it; processes queue for a host in the order they asked
+  adapt     a 429/503/504 (or a caller-detected soft limit) doubles the
+            host's interval, up to MAX_INTERVAL, and holds every process off
+            for the server's Retry-After; each successful response then
+            eases the interval back toward the configured rate, so
+            throughput settles at what the server actually allows
+  off       SUMMITSEEKER_RATE_LIMIT=off skips it (offline replay never
+            reaches the network, so it never waits)
+"""
+
+import email.utils
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STATE_PATH = ROOT / ".cache" / "ratelimit.sqlite"
+
+# host -> (seconds between requests, burst)
+RATES = {
+    "overpass-api.de": (1.0, 1),         # asks for about one client slot
+    "api.open-meteo.com": (0.2, 2),
+    "epqs.nationalmap.gov": (0.3, 1),
+    "www.wikidata.org": (0.3, 1),
+    "commons.wikimedia.org": (0.3, 1),
+}
+DEFAULT_RATE = (0.1, 3)                  # ArcGIS trail services and the rest
+MAX_INTERVAL = 60.0
+RECOVERY = 0.9  # interval multiplier per successful response while throttled
+THROTTLE_STATUSES = (429, 503, 504)
+
+_DB = None
+_LOCK = threading.Lock()  # http_client reads run on worker threads too
+
+
+def enabled():
+    return os.environ.get("SUMMITSEEKER_RATE_LIMIT", "on").lower() not in ("off", "0")
+
+
+def rate_for(host):
+    return RATES.get(host or "", DEFAULT_RATE)
+
+
+def _db():
+    global _DB
+    if _DB is None:
+        STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _DB = sqlite3.connect(str(STATE_PATH), timeout=30, isolation_level=None,
+                              check_same_thread=False)
+        _DB.execute("PRAGMA journal_mode=WAL")
+        _DB.execute(
+            "CREATE TABLE IF NOT EXISTS hosts ("
+            " host TEXT PRIMARY KEY, due REAL, interval REAL)")
+    return _DB
+
+
+def _update(host, fn):
+    """Run fn(due, interval, now) -> (due, interval, result) atomically
+    across processes; returns result."""
+    with _LOCK:
+        db = _db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT due, interval FROM hosts WHERE host = ?",
+                             (host,)).fetchone()
+            now = time.time()
+            if row is None:
+                row = (now, rate_for(host)[0])
+            due, interval, result = fn(row[0], row[1], now)
+            db.execute("INSERT OR REPLACE INTO hosts VALUES (?, ?, ?)",
+                       (host, due, interval))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+    return result
+
+
+def acquire(host):
+    """Block until a request to host may start."""
+    if not enabled():
+        return
+    burst = rate_for(host)[1]
+
+    def reserve(due, interval, now):
+        # The bucket allows up to `burst` requests ahead of the steady pace.
+        due = max(due, now)
+        start = max(now, due - (burst - 1) * interval)
+        return due + interval, interval, start
+
+    wait = _update(host, reserve) - time.time()
+    if wait > 0:
+        time.sleep(wait)
+
+
+def retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def throttled(host, wait_s=None):
+    """The server pushed back: slow this host down for every process."""
+    if not enabled():
+        return
+    burst = rate_for(host)[1]
+
+    def back_off(due, interval, now):
+        interval = min(MAX_INTERVAL, interval * 2)
+        hold = wait_s if wait_s is not None else interval
+        # No burst allowance until the hold is over.
+        return max(due, now + hold + (burst - 1) * interval), interval, None
+
+    _update(host, back_off)
+
+
+def succeeded(host):
+    """A normal response: ease a throttled host back toward its rate."""
+    if not enabled():
+        return
+    base = rate_for(host)[0]
+    with _LOCK:
+        row = _db().execute("SELECT interval FROM hosts WHERE host = ?",
+                            (host,)).fetchone()
+    if row is None or row[0] <= base:
+        return
+    _update(host, lambda due, interval, now:
+            (due, max(base, interval * RECOVERY), None))
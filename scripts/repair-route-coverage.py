@@ -30,7 +30,9 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "website" / "src" / "data"
 sys.path.insert(0, str(ROOT / "scripts"))
+import geodesy  # noqa: E402
 import route_metrics as rm  # noqa: E402
+import trail_graph  # noqa: E402
 
 # A candidate must land within this fraction of the authored distance. Kept
 # strict: a partial centreline that merely shares a name would otherwise
@@ -129,10 +131,10 @@ def best_candidate(ft, summit, target_mi, hint, ctx):
             # Identity first: this must be the route the record names.
             if not (name_tokens(name) & wanted):
                 continue
-            path = ft.assemble(group)
+            path = trail_graph.assemble(group)
             if not path or len(path) < 2:
                 continue
-            near = min(ft.haversine_mi(summit, p) for p in path)
+            near = geodesy.nearest_vertex(summit, path)[1]
             if near > SEARCH_RADIUS_KM * 0.62:
                 continue  # doesn't reach this peak
             hiked, _, _ = rm.hiked_distance_mi(path)
@@ -184,7 +186,7 @@ def main():
             repaired += 1
             continue
 
-        raw_len = ft.path_len_mi(cand_path)
+        raw_len = geodesy.path_length_mi(cand_path)
         maxn = max(120, min(900, int(raw_len * 60)))
         cand_path = ft.simplify(ft.orient_to_summit(cand_path, summit), maxn=maxn)
         eles = ee.batch_elevations([(p[0], p[1]) for p in cand_path], ctx)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Route locator: where along a trail a nearby point falls, and how far off it.
+
+enrich-poi.py placed each OSM feature at the nearest path *vertex* — a full
+distance scan of the route per feature, O(POIs x points) — so both the mile
+and the offset were off by up to half a segment on a sparse route.
+geodesy.point_to_path_mi() measures to segments but is itself a full scan.
+RouteLocator is built once per path and answers each query from a grid:
+
+  index      every segment's bounding box in a spatial_index.BoxIndex
+  query      only segments whose box meets the search envelope are measured,
+             with the same local projection as point_to_path_mi(), so the
+             answer is the same one the full scan gives
+  result     (offset_mi, along_mi, segment_index): the perpendicular offset
+             and the exact distance along the route to its foot, from the
+             path's cumulative-distance array
+
+With no search radius the envelope doubles until a segment is found within
+it. An envelope spanning more grid cells than the route has segments costs
+more to walk than measuring every segment, so from there the query is a
+plain scan instead — a point far from the route costs O(segments), as in
+point_to_path_mi(). generate-description.py uses it to place features that
+carry only coordinates at their mile along the route.
+"""
+
+import math
+
+import geodesy
+from spatial_index import MI_PER_DEG, BoxIndex
+
+CELL_DEG = 0.01  # ~0.7 mi: a few segments per cell on a typical route
+
+
+class RouteLocator:
+    def __init__(self, path, cell_deg=CELL_DEG):
+        self.lats = [p[0] for p in path]
+        self.lons = [p[1] for p in path]
+        self.cum = geodesy.cumulative_mi(path)
+        self.index = BoxIndex(cell_deg)
+        for i in range(len(self.lats) - 1):
+            la, lb = self.lats[i], self.lats[i + 1]
+            oa, ob = self.lons[i], self.lons[i + 1]
+            self.index.add(min(la, lb), min(oa, ob), max(la, lb), max(oa, ob), i)
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _measure(self, lat, lon, i, kx, ky):
+        """(offset_mi, along_mi) from (lat, lon) to segment i."""
+        ax, ay = (self.lons[i] - lon) * kx, (self.lats[i] - lat) * ky
+        bx, by = (self.lons[i + 1] - lon) * kx, (self.lats[i + 1] - lat) * ky
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / seg2))
+        c0, c1 = float(self.cum[i]), float(self.cum[i + 1])
+        return math.hypot(ax + t * dx, ay + t * dy), c0 + t * (c1 - c0)
+
+    def _closest(self, lat, lon, segments):
+        """(offset_mi, along_mi, segment_index) of the nearest of segments."""
+        kx = math.cos(math.radians(lat)) * MI_PER_DEG
+        best = None
+        for i in segments:
+            off, along = self._measure(lat, lon, i, kx, MI_PER_DEG)
+            if best is None or off < best[0]:
+                best = (off, along, i)
+        return best
+
+    def _envelope(self, lat, lon, radius_mi):
+        """(south, west, north, east) of the search box, or None when it
+        spans more grid cells than there are segments to measure."""
+        dlat = radius_mi / MI_PER_DEG
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        c = self.index.cell_deg
+        cells = (2 * dlat / c + 2) * (2 * dlon / c + 2)
+        if cells > len(self.lats) - 1:
+            return None
+        return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+    def _within(self, lat, lon, radius_mi):
+        box = self._envelope(lat, lon, radius_mi)
+        segments = range(len(self.lats) - 1) if box is None else self.index.intersecting(*box)
+        best = self._closest(lat, lon, segments)
+        return best if best is not None and best[0] <= radius_mi else None
+
+    def locate(self, lat, lon, max_mi=None):
+        """(offset_mi, along_mi, segment_index) for the closest approach of
+        the route to (lat, lon); None when nothing is within max_mi."""
+        if len(self.lats) < 2:
+            if not self.lats:
+                return None
+            off = geodesy.distance_mi(lat, lon, self.lats[0], self.lons[0])
+            return (off, 0.0, 0) if max_mi is None or off <= max_mi else None
+        if max_mi is not None:
+            return self._within(lat, lon, max_mi)
+        # Everything within r has been measured, so the first hit inside r
+        # is the closest segment overall.
+        r = self.index.cell_deg * MI_PER_DEG
+        while self._envelope(lat, lon, r) is not None:
+            hit = self._within(lat, lon, r)
+            if hit is not None:
+                return hit
+            r *= 2
+        return self._closest(lat, lon, range(len(self.lats) - 1))
+
+    def mile(self, lat, lon, max_mi=None):
+        """Distance along the route (miles, 2 places) to the point's foot on
+        it, or None when the point is farther than max_mi from the route."""
+        hit = self.locate(lat, lon, max_mi)
+        return None if hit is None else round(hit[1], 2)
@@ -23,27 +23,21 @@ record so the page can state the basis explicitly ("out-and-back — 8.6 mi
 round trip") rather than publishing an unlabeled number.
 """
 
-import math
+import geodesy
 
 # Endpoints closer than this fraction of total length are treated as the same
 # place, i.e. the route closes on itself.
 LOOP_CLOSURE_FRACTION = 0.15
 
 
-def haversine_mi(a, b):
-    R = 3959.0
-    p1, p2 = math.radians(a[0]), math.radians(b[0])
-    dlat = math.radians(b[0] - a[0])
-    dlon = math.radians(b[1] - a[1])
-    h = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(h))
-
-
 def route_length_mi(path):
-    """Length of one traverse of the stored geometry, in miles."""
+    """Length of one traverse of the stored geometry, in miles.
+
+    `path` is the JSON list form or a geodesy.PathArray (cached length).
+    """
     if not path or len(path) < 2:
         return 0.0
-    return sum(haversine_mi(path[i - 1], path[i]) for i in range(1, len(path)))
+    return geodesy.path_length_mi(path)
 
 
 def is_loop(path):
@@ -53,7 +47,7 @@ def is_loop(path):
     total = route_length_mi(path)
     if total <= 0:
         return False
-    return haversine_mi(path[0], path[-1]) < LOOP_CLOSURE_FRACTION * total
+    return geodesy.haversine_mi(path[0], path[-1]) < LOOP_CLOSURE_FRACTION * total
 
 
 def hiked_distance_mi(path):
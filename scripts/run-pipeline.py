@@ -13,23 +13,48 @@ Per state, for each target state the orchestrator runs:
   2. GPS quality audit          - reuses scripts/audit-gps-quality.py
   3. Trail-data validation      - reuses scripts/validate-trail-data.js
 
+The Python stages (gpx-to-geo, nearby peaks, descriptions, SEO, link check,
+audit) are imported once and called in-process on parsed records; each
+returns a structured result that is counted directly. Only the synthetic-GPS
+fallback and the JS validator still run as subprocesses.
+
+All stages share one TrailStore: each state directory is parsed once, stages
+mutate the same record dicts, and only records a stage actually changed are
+written back, in one flush at the end of the state. Route paths are held as
+compact geodesy.PathArray columns rather than lists of point lists.
+
+Runs are incremental: pipeline-reports/.manifest.json records each file's
+content hash (plus the stage code and state settings) and the per-record
+results the report needs. Unchanged records are skipped and their cached
+audit/link results reused, so a no-op rerun only hashes files. --full
+ignores the manifest and redoes every record.
+
 Usage:
   python3 scripts/run-pipeline.py                # all enabled states (audit+validate)
   python3 scripts/run-pipeline.py --rerun        # only states with "rerun": true
   python3 scripts/run-pipeline.py --state maine  # one state, ignores enabled/rerun
   python3 scripts/run-pipeline.py --no-validate  # skip the JS validation step
+  python3 scripts/run-pipeline.py --jobs 8       # 8 states at a time (process pool)
+  python3 scripts/run-pipeline.py --full         # ignore the incremental manifest
 """
 
 import argparse
+import contextlib
 import importlib.util
+import io
 import json
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+import pipeline_manifest as manifest_mod  # noqa: E402
+from geodesy import PathArray  # noqa: E402
+from trail_store import TrailStore  # noqa: E402
 
 
 def load_module(path, name):
@@ -60,42 +85,36 @@ def select_states(config, args):
     return enabled
 
 
-def apply_gpx(state, config):
+def apply_gpx(state, config, store, gpx_mod, only=None):
     """Always-on: convert any real gpx-downloads/<slug>.gpx into the trail's
     geo data (accurate path + distance + gain). Runs every pipeline so dropping
     a GPX and re-running is all it takes to give a trail its route."""
-    data_dir = ROOT / config["data_dir"] / state["slug"]
     gpx_dir = ROOT / config.get("gpx_dir", "gpx-downloads")
     applied = []
-    for trail_file in sorted(data_dir.glob("*.json")):
-        try:
-            data = json.loads(trail_file.read_text())
-        except json.JSONDecodeError:
-            continue
+    for trail_file, data in store.records(state["slug"], only):
         trails = data.get("trails") or []
         has_path = trails and trails[0].get("geo", {}).get("path")
         if has_path:
             continue  # already has a route; gpx-to-geo manually to overwrite
         slug = data.get("slug", trail_file.stem)
         gpx = gpx_dir / f"{slug}.gpx"
-        if gpx.exists():
-            subprocess.run(
-                [sys.executable, str(SCRIPTS / "gpx-to-geo.py"), str(gpx), str(trail_file)],
-                check=False,
-            )
+        if not gpx.exists():
+            continue
+        try:
+            result = gpx_mod.gpx_to_geo(str(gpx))
+        except Exception as e:  # malformed XML etc. — skip, don't abort the state
+            print(f"  · GPX: could not parse {gpx.name} ({e})")
+            continue
+        if result and gpx_mod.apply_to_record(data, result):
+            store.mark_dirty(trail_file)
             applied.append(slug)
     return applied
 
 
-def generate_gps(state, config, audit_mod):
+def generate_gps(state, config, store, audit_mod, only=None):
     """Synthetic fallback ONLY (opt-in). Real GPX is handled by apply_gpx."""
-    data_dir = ROOT / config["data_dir"] / state["slug"]
     synthetic = []
-    for trail_file in sorted(data_dir.glob("*.json")):
-        try:
-            data = json.loads(trail_file.read_text())
-        except json.JSONDecodeError:
-            continue
+    for trail_file, data in store.records(state["slug"], only):
         trails = data.get("trails") or []
         if trails and trails[0].get("geo", {}).get("path"):
             continue
@@ -106,82 +125,274 @@ def generate_gps(state, config, audit_mod):
         # opt-in that no state config sets, kept only so the historical
         # behaviour is inspectable rather than silently missing.
         if state.get("synthetic_fallback", False) and state.get("allow_fabricated_routes", False):
+            # Still a subprocess: hand it the current record, then re-read.
+            store.flush(state["slug"])
             subprocess.run(
                 [sys.executable, str(SCRIPTS / "enhance-gps-path.py"), str(trail_file)],
                 check=False,
             )
+            store.reload(trail_file)
             synthetic.append(data.get("slug", trail_file.stem))
     return synthetic
 
 
-def generate_descriptions(state, config):
+def generate_descriptions(state, config, store, desc_mod, only=None):
     """Fill factual generated_description for trails that have none."""
-    proc = subprocess.run(
-        [sys.executable, str(SCRIPTS / "generate-description.py"),
-         "--state", state["slug"]],
-        capture_output=True, text=True,
-    )
-    return [ln for ln in proc.stdout.splitlines() if "✅ description" in ln]
+    updated = []
+    for trail_file, data in store.records(state["slug"], only):
+        if desc_mod.process_record(data)["changed"]:
+            store.mark_dirty(trail_file)
+            updated.append(trail_file.stem)
+    return updated
 
 
-def generate_seo(state, config):
+def generate_seo(state, config, store, seo_mod, only=None):
     """Fill missing SEO blocks (meta, canonical, schema) from real fields."""
-    data_dir = ROOT / config["data_dir"] / state["slug"]
     updated = []
-    for trail_file in sorted(data_dir.glob("*.json")):
-        proc = subprocess.run(
-            [sys.executable, str(SCRIPTS / "generate-seo.py"), str(trail_file)],
-            capture_output=True, text=True,
-        )
-        if "SEO written" in proc.stdout:
+    for trail_file, data in store.records(state["slug"], only):
+        if seo_mod.process_record(data)["changed"]:
+            store.mark_dirty(trail_file)
             updated.append(trail_file.stem)
     return updated
 
 
-def generate_nearby(state, config):
+def generate_nearby(state, config, store, nearby_mod):
     """Fill nearby_peaks (nearest in-state trails) for hikes that have none."""
-    proc = subprocess.run(
-        [sys.executable, str(SCRIPTS / "generate-nearby-peaks.py"), state["slug"]],
-        capture_output=True, text=True,
-    )
-    return [ln for ln in proc.stdout.splitlines() if ln.strip().startswith("✅")]
+    linked = []
+    for r in nearby_mod.link_state(store.records(state["slug"]), state["slug"]):
+        if r["changed"]:
+            store.mark_dirty(r["file"])
+            linked.append(r["slug"])
+    return linked
+
+
+def is_live(d):
+    """Publicly live (route-complete) vs a hidden draft."""
+    t = (d.get("trails") or [{}])[0]
+    path = (t.get("geo") or {}).get("path")
+    dist = (t.get("stats") or {}).get("distance")
+    return bool(not d.get("_status") and isinstance(path, (list, PathArray)) and path
+                and isinstance(dist, (int, float)) and dist > 0)
+
+
+def record_result(trail_file, d, gpx_dir, audit_mod, links_mod):
+    """Everything the state report needs from one record, in the form the
+    manifest caches: audit result, live flag (None when the record has no
+    name and is not counted) and nearby_peaks link targets. `d` is None for
+    a file that is not valid JSON."""
+    slug = d.get("slug", trail_file.stem) if d is not None else trail_file.stem
+    entry = {"hash": manifest_mod.file_hash(trail_file),
+             "gpx": manifest_mod.gpx_signature(gpx_dir / f"{slug}.gpx"),
+             "slug": None, "state_slug": None,
+             "live": None, "targets": None}
+    if d is None:
+        # Unparseable files still get a (zero-score) "Invalid JSON" result.
+        entry["audit"] = audit_mod.audit_trail(str(trail_file))
+        return entry
+    entry["slug"] = slug
+    entry["state_slug"] = d.get("state_slug", trail_file.parent.name)
+    entry["audit"] = audit_mod.audit_record(d, str(trail_file))
+    if d.get("name"):
+        entry["live"] = is_live(d)
+    entry["targets"] = [list(t) for t in links_mod.link_targets(d)]
+    return entry
+
+
+_CONTEXT = None
+
+
+def stage_context(config, index=None):
+    """Stage modules + TrailStore, loaded once per process (pool workers
+    each build their own on first use). `index` pre-seeds the store's link
+    index with every trail's slug, as computed from the manifest."""
+    global _CONTEXT
+    if _CONTEXT is None:
+        _CONTEXT = {
+            "store": TrailStore(ROOT / config["data_dir"], compact_paths=True),
+            "audit": load_module(SCRIPTS / "audit-gps-quality.py", "audit_gps_quality"),
+            "links": load_module(SCRIPTS / "check-links.py", "check_links"),
+            "gpx": load_module(SCRIPTS / "gpx-to-geo.py", "gpx_to_geo"),
+            "nearby": load_module(SCRIPTS / "generate-nearby-peaks.py",
+                                  "generate_nearby_peaks"),
+            "desc": load_module(SCRIPTS / "generate-description.py",
+                                "generate_description"),
+            "seo": load_module(SCRIPTS / "generate-seo.py", "generate_seo"),
+        }
+        if index is not None:
+            _CONTEXT["store"].seed_index(index)
+    return _CONTEXT
+
+
+def run_state(state, config, env, prior=None):
+    """Every stage for one state; writes pipeline-reports/<state>.json.
+
+    `prior` is the state's manifest entry from the last run (None for a full
+    run). Records whose file and inputs are unchanged since then are not
+    parsed or re-run: their cached results go straight into the report.
+    Returns (report, new manifest entry).
+    """
+    ctx = stage_context(config)
+    store = ctx["store"]
+    audit_mod, links_mod = ctx["audit"], ctx["links"]
+    gpx_mod, nearby_mod = ctx["gpx"], ctx["nearby"]
+    desc_mod, seo_mod = ctx["desc"], ctx["seo"]
+    min_score = config.get("quality", {}).get("min_score", 80)
+    slug = state["slug"]
+    data_dir = ROOT / config["data_dir"] / slug
+    gpx_dir = ROOT / config.get("gpx_dir", "gpx-downloads")
+    print(f"\n▶ {slug}")
+
+    cached = prior["records"] if prior and prior.get("env") == env else {}
+    files = sorted(data_dir.glob("*.json"))
+    results = {}  # filename -> record_result(), cached or fresh
+    stale = []
+    for f in files:
+        prev = cached.get(f.name)
+        if (prev and prev["hash"] == manifest_mod.file_hash(f)
+                and prev["gpx"] == manifest_mod.gpx_signature(
+                    gpx_dir / f"{prev['slug'] or f.stem}.gpx")):
+            results[f.name] = prev
+        else:
+            stale.append(f)
+    if cached:
+        print(f"  · incremental: {len(stale)} changed, {len(results)} unchanged "
+              f"(cached)")
 
+    synthetic = []
+    if stale:
+        # Always-on: turn any dropped real GPX into a trail route.
+        gpx_applied = apply_gpx(state, config, store, gpx_mod, stale)
+        if gpx_applied:
+            print(f"  · GPX: converted {len(gpx_applied)} real track(s) → route "
+                  f"({', '.join(gpx_applied[:5])}{'…' if len(gpx_applied) > 5 else ''})")
+
+        if state.get("generate_gps", False):
+            print("  · synthetic GPS fallback (opt-in) for trails still without a route…")
+            synthetic = generate_gps(state, config, store, audit_mod, stale)
+            if synthetic:
+                print(f"  · {len(synthetic)} trail(s) used SYNTHETIC paths "
+                      f"(flagged for real-GPX upgrade)")
 
-def count_live_draft(state, config):
-    """How many trails are publicly live (route-complete) vs hidden drafts."""
-    data_dir = ROOT / config["data_dir"] / state["slug"]
+        if state.get("generate_nearby", True):
+            # Links depend on every peer in the state, so this one stage sees
+            # the whole state; records it changes join the stale set.
+            linked = generate_nearby(state, config, store, nearby_mod)
+            if linked:
+                print(f"  · nearby_peaks: linked {len(linked)} hike(s) that had none")
+            stale = sorted(set(stale) | set(store.dirty(slug)))
+
+        if state.get("generate_description", True):
+            desc_updated = generate_descriptions(state, config, store, desc_mod, stale)
+            if desc_updated:
+                print(f"  · descriptions: wrote {len(desc_updated)} factual "
+                      f"paragraph(s)")
+
+        if state.get("generate_seo", True):
+            seo_updated = generate_seo(state, config, store, seo_mod, stale)
+            if seo_updated:
+                print(f"  · SEO: filled {len(seo_updated)} trail(s) missing meta/schema")
+
+        # One write-back per state: only the records a stage changed.
+        store.flush(slug)
+        parsed = dict(store.records(slug, stale))
+        for f in stale:
+            results[f.name] = record_result(f, parsed.get(f), gpx_dir,
+                                            audit_mod, links_mod)
+        store.release(slug)
+
+    # Internal link integrity: broken nearby_peaks links 404 → retention/SEO loss.
+    # Verdicts are re-derived every run from the current index, never cached.
+    index = links_mod.build_index(links_mod.trail_states(), store)
+    broken_links, no_links, total_links = [], [], 0
     live = draft = 0
-    for f in sorted(data_dir.glob("*.json")):
-        try:
-            d = json.loads(f.read_text())
-        except json.JSONDecodeError:
-            continue
-        if not d.get("name"):
-            continue
-        t = (d.get("trails") or [{}])[0]
-        path = (t.get("geo") or {}).get("path")
-        dist = (t.get("stats") or {}).get("distance")
-        is_live = (not d.get("_status") and isinstance(path, list) and path
-                   and isinstance(dist, (int, float)) and dist > 0)
-        if is_live:
-            live += 1
-        else:
-            draft += 1
-    return live, draft
+    audit_results = []
+    for f in files:
+        entry = results[f.name]
+        rel = f.relative_to(ROOT)
+        if entry["targets"] is not None:
+            if not entry["targets"]:
+                no_links.append(rel)
+            for name, st, tslug in entry["targets"]:
+                total_links += 1
+                if (st, tslug) not in index:
+                    broken_links.append((rel, name, st, tslug))
+        if entry["live"] is not None:
+            if entry["live"]:
+                live += 1
+            else:
+                draft += 1
+        r = dict(entry["audit"])
+        r["state_slug"] = slug
+        audit_results.append(r)
+    passed = [r for r in audit_results if r.get("quality_score", 0) >= min_score]
+    failed = [r for r in audit_results if r.get("quality_score", 0) < min_score]
+
+    if broken_links:
+        print(f"  · links: {len(broken_links)} BROKEN nearby_peaks link(s)")
+        for f, name, st, tslug in broken_links[:10]:
+            print(f"      ✗ {f}  →  {st}/{tslug}")
+    elif no_links:
+        print(f"  · links: {total_links} ok, "
+              f"{len(no_links)} hike(s) have no nearby_peaks (weak linking)")
+    else:
+        print(f"  · links: {total_links} nearby_peaks all resolve ✓")
+
+    print(f"  · publish: {live} LIVE on site, {draft} draft (hidden until "
+          f"route-complete)")
+
+    state_pass = len(failed) == 0 and len(broken_links) == 0
+
+    print(f"  · audit: {len(passed)}/{len(audit_results)} trails ≥ {min_score} "
+          f"→ {'PASS' if state_pass else 'NEEDS WORK'}")
+    for r in sorted(failed, key=lambda x: x.get("quality_score", 0))[:10]:
+        st = r.get("stats", {})
+        routes = r.get("routes", [])
+        culprit = ""
+        if len(routes) > 1:
+            worst = min(routes, key=lambda x: x.get("score", 100))
+            culprit = f"  weakest route: '{worst['name']}'"
+        print(f"      ✗ {r['name']:<32} score {r.get('quality_score', 0):>3} "
+              f"({st.get('points_per_mile', 0)} pts/mi){culprit}")
+
+    report = {
+        "state": slug,
+        "date": str(date.today()),
+        "min_score": min_score,
+        "total": len(audit_results),
+        "passed": len(passed),
+        "failed": len(failed),
+        "synthetic_gps": synthetic,
+        "live": live,
+        "draft": draft,
+        "broken_links": [
+            {"file": str(f), "target": f"{st}/{tslug}", "name": name}
+            for f, name, st, tslug in broken_links
+        ],
+        "hikes_without_nearby_peaks": [str(f) for f in no_links],
+        "needs_work": [
+            {"name": r["name"], "file": r.get("file"),
+             "score": r.get("quality_score", 0),
+             "routes": r.get("routes", []),
+             "issues": r.get("issues", []), "warnings": r.get("warnings", [])}
+            for r in failed
+        ],
+    }
+    report_dir = ROOT / config.get("report_dir", "pipeline-reports")
+    (report_dir / f"{slug}.json").write_text(json.dumps(report, indent=2))
+    return report, {"env": env, "records": results}
 
 
-def audit_state(state, config, audit_mod):
-    """Per-state GPS quality audit using the shared audit logic."""
-    data_dir = ROOT / config["data_dir"] / state["slug"]
-    min_score = config.get("quality", {}).get("min_score", 80)
-    results = []
-    for trail_file in sorted(data_dir.glob("*.json")):
-        r = audit_mod.audit_trail(str(trail_file))
-        r["state_slug"] = state["slug"]
-        results.append(r)
-    passed = [r for r in results if r.get("quality_score", 0) >= min_score]
-    failed = [r for r in results if r.get("quality_score", 0) < min_score]
-    return results, passed, failed
+def run_state_captured(state, config, env, prior):
+    """run_state in a pool worker: buffer its console output so parallel
+    states print as whole blocks rather than interleaved lines."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        report, entry = run_state(state, config, env, prior)
+    return report, entry, buf.getvalue()
+
+
+def state_passed(report):
+    return report["failed"] == 0 and not report["broken_links"]
 
 
 def main():
@@ -189,11 +400,13 @@ def main():
     parser.add_argument("--rerun", action="store_true", help="only states with rerun:true")
     parser.add_argument("--state", help="process a single state by slug")
     parser.add_argument("--no-validate", action="store_true", help="skip JS validation")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="process N states in parallel (default 1)")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and re-run every record")
     args = parser.parse_args()
 
     config = load_config()
-    audit_mod = load_module(SCRIPTS / "audit-gps-quality.py", "audit_gps_quality")
-    links_mod = load_module(SCRIPTS / "check-links.py", "check_links")
 
     targets = select_states(config, args)
     if not targets:
@@ -205,103 +418,49 @@ def main():
     report_dir.mkdir(exist_ok=True)
     min_score = config.get("quality", {}).get("min_score", 80)
 
+    # Incremental state: what every file looked like after the last run.
+    manifest_path = report_dir / ".manifest.json"
+    manifest = manifest_mod.load(manifest_path)
+    code = manifest_mod.code_version(SCRIPTS)
+    envs = [manifest_mod.state_env(code, s, config) for s in targets]
+    priors = [None if args.full else manifest["states"].get(s["slug"])
+              for s in targets]
+    # Every trail's (state_slug, slug) for the link check, from cached
+    # slugs where the file is unchanged — other states are not re-parsed.
+    index = manifest_mod.slug_index(ROOT / config["data_dir"],
+                                    [s["slug"] for s in config.get("states", [])],
+                                    manifest)
+
     print("=" * 78)
     print(f"TRAIL-DATA PIPELINE  ·  {date.today()}  ·  {len(targets)} state(s)")
     print("=" * 78)
 
     overall = {"states": [], "all_pass": True}
-
-    for state in targets:
-        slug = state["slug"]
-        print(f"\n▶ {slug}")
-
-        # Always-on: turn any dropped real GPX into a trail route.
-        gpx_applied = apply_gpx(state, config)
-        if gpx_applied:
-            print(f"  · GPX: converted {len(gpx_applied)} real track(s) → route "
-                  f"({', '.join(gpx_applied[:5])}{'…' if len(gpx_applied) > 5 else ''})")
-
-        synthetic = []
-        if state.get("generate_gps", False):
-            print("  · synthetic GPS fallback (opt-in) for trails still without a route…")
-            synthetic = generate_gps(state, config, audit_mod)
-            if synthetic:
-                print(f"  · {len(synthetic)} trail(s) used SYNTHETIC paths "
-                      f"(flagged for real-GPX upgrade)")
-
-        if state.get("generate_nearby", True):
-            linked = generate_nearby(state, config)
-            if linked:
-                print(f"  · nearby_peaks: linked {len(linked)} hike(s) that had none")
-
-        if state.get("generate_description", True):
-            desc_updated = generate_descriptions(state, config)
-            if desc_updated:
-                print(f"  · descriptions: wrote {len(desc_updated)} factual "
-                      f"paragraph(s)")
-
-        if state.get("generate_seo", True):
-            seo_updated = generate_seo(state, config)
-            if seo_updated:
-                print(f"  · SEO: filled {len(seo_updated)} trail(s) missing meta/schema")
-
-        # Internal link integrity: broken nearby_peaks links 404 → retention/SEO loss.
-        broken_links, no_links, total_links = links_mod.check([slug])
-        if broken_links:
-            print(f"  · links: {len(broken_links)} BROKEN nearby_peaks link(s)")
-            for f, name, st, tslug in broken_links[:10]:
-                print(f"      ✗ {f}  →  {st}/{tslug}")
-        elif no_links:
-            print(f"  · links: {total_links} ok, "
-                  f"{len(no_links)} hike(s) have no nearby_peaks (weak linking)")
-        else:
-            print(f"  · links: {total_links} nearby_peaks all resolve ✓")
-
-        live, draft = count_live_draft(state, config)
-        print(f"  · publish: {live} LIVE on site, {draft} draft (hidden until "
-              f"route-complete)")
-
-        results, passed, failed = audit_state(state, config, audit_mod)
-        state_pass = len(failed) == 0 and len(broken_links) == 0
-        overall["all_pass"] = overall["all_pass"] and state_pass
-
-        print(f"  · audit: {len(passed)}/{len(results)} trails ≥ {min_score} "
-              f"→ {'PASS' if state_pass else 'NEEDS WORK'}")
-        for r in sorted(failed, key=lambda x: x.get("quality_score", 0))[:10]:
-            st = r.get("stats", {})
-            routes = r.get("routes", [])
-            culprit = ""
-            if len(routes) > 1:
-                worst = min(routes, key=lambda x: x.get("score", 100))
-                culprit = f"  weakest route: '{worst['name']}'"
-            print(f"      ✗ {r['name']:<32} score {r.get('quality_score', 0):>3} "
-                  f"({st.get('points_per_mile', 0)} pts/mi){culprit}")
-
-        report = {
-            "state": slug,
-            "date": str(date.today()),
-            "min_score": min_score,
-            "total": len(results),
-            "passed": len(passed),
-            "failed": len(failed),
-            "synthetic_gps": synthetic,
-            "live": live,
-            "draft": draft,
-            "broken_links": [
-                {"file": str(f), "target": f"{st}/{tslug}", "name": name}
-                for f, name, st, tslug in broken_links
-            ],
-            "hikes_without_nearby_peaks": [str(f) for f in no_links],
-            "needs_work": [
-                {"name": r["name"], "file": r.get("file"),
-                 "score": r.get("quality_score", 0),
-                 "routes": r.get("routes", []),
-                 "issues": r.get("issues", []), "warnings": r.get("warnings", [])}
-                for r in failed
-            ],
-        }
-        (report_dir / f"{slug}.json").write_text(json.dumps(report, indent=2))
-        overall["states"].append(report)
+    entries = {}
+
+    if args.jobs > 1 and len(targets) > 1:
+        # States are independent (each owns its data directory), so they run
+        # on a process pool. ex.map yields in `targets` order, which keeps the
+        # console output and the SUMMARY deterministic.
+        workers = min(args.jobs, len(targets))
+        print(f"  ({workers} parallel worker(s))")
+        with ProcessPoolExecutor(max_workers=workers, initializer=stage_context,
+                                 initargs=(config, index)) as ex:
+            for state, (report, entry, log) in zip(targets, ex.map(
+                    run_state_captured, targets, [config] * len(targets),
+                    envs, priors)):
+                print(log, end="")
+                overall["states"].append(report)
+                entries[state["slug"]] = entry
+    else:
+        stage_context(config, index)
+        for state, env, prior in zip(targets, envs, priors):
+            report, entry = run_state(state, config, env, prior)
+            overall["states"].append(report)
+            entries[state["slug"]] = entry
+    # Only this run's states: another run may have saved its own since.
+    manifest_mod.update(manifest_path, entries)
+    overall["all_pass"] = all(state_passed(r) for r in overall["states"])
 
     # Whole-repo schema/field validation (JS).
     validate_ok = True
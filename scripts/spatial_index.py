@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Spatial index over lat/lon points: radius and k-nearest queries in miles.
+
+Replaces all-pairs scans — every target against every other point, then a
+full sort — which made linking a 1,000-peak state O(n² log n). Points are
+bucketed into a fixed grid of cell_deg x cell_deg lat/lon cells. A query
+visits only the cells its search circle can reach and ranks the few
+candidates there by exact great-circle distance (geodesy.distance_mi), so
+results are the same as a brute-force scan, ties included: equal distances
+come back in insertion order, as a stable sort over the input list would.
+
+Longitude wraps at ±180 (the Aleutians straddle it), and near the poles a
+query widens to every column rather than under-cover.
+
+BoxIndex is the same grid for bounding boxes rather than points: each box is
+listed in every cell it covers, and an envelope query checks only those cells.
+"""
+
+import math
+
+import geodesy
+
+MI_PER_DEG = geodesy.EARTH_RADIUS_MI * math.pi / 180
+_PAD_DEG = 1e-9  # so a point exactly on the search circle is never cell-culled
+
+
+class PointIndex:
+    def __init__(self, cell_deg=0.5):
+        self.cell_deg = cell_deg
+        self._ncols = math.ceil(360 / cell_deg)
+        self._cells = {}  # (row, col) -> [(seq, lat, lon, item)]
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def _row(self, lat):
+        return math.floor((lat + 90) / self.cell_deg)
+
+    def _col(self, lon):
+        return math.floor((lon + 180) / self.cell_deg) % self._ncols
+
+    def add(self, lat, lon, item):
+        self._cells.setdefault((self._row(lat), self._col(lon)), []).append(
+            (self._n, lat, lon, item))
+        self._n += 1
+
+    def _cols_for(self, lat, lon, radius_mi):
+        """Grid columns a circle of radius_mi around (lat, lon) can touch."""
+        ang = radius_mi / geodesy.EARTH_RADIUS_MI
+        if ang >= math.pi / 2:
+            return range(self._ncols)
+        # Widest longitude reached by a spherical cap; a cap that contains a
+        # pole reaches every longitude.
+        cos_lat = math.cos(math.radians(lat))
+        if cos_lat <= math.sin(ang):
+            return range(self._ncols)
+        dlon = math.degrees(math.asin(math.sin(ang) / cos_lat)) + _PAD_DEG
+        first = math.floor((lon - dlon + 180) / self.cell_deg)
+        last = math.floor((lon + dlon + 180) / self.cell_deg)
+        if last - first + 1 >= self._ncols:
+            return range(self._ncols)
+        return sorted({c % self._ncols for c in range(first, last + 1)})
+
+    def within(self, lat, lon, radius_mi):
+        """[(distance_mi, item)] for every point within radius_mi, nearest
+        first."""
+        dlat = radius_mi / MI_PER_DEG + _PAD_DEG
+        rows = range(self._row(max(-90.0, lat - dlat)),
+                     self._row(min(90.0, lat + dlat)) + 1)
+        hits = []
+        for col in self._cols_for(lat, lon, radius_mi):
+            for row in rows:
+                for seq, plat, plon, item in self._cells.get((row, col), ()):
+                    d = geodesy.distance_mi(lat, lon, plat, plon)
+                    if d <= radius_mi:
+                        hits.append((d, seq, item))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [(d, item) for d, _, item in hits]
+
+    def nearest(self, lat, lon, k=1, max_mi=None, exclude=None):
+        """[(distance_mi, item)] for the k points closest to (lat, lon).
+
+        max_mi caps the search radius; `exclude(item)` drops items from the
+        result (e.g. the query point's own record).
+        """
+        def keep(hits):
+            return [h for h in hits if exclude is None or not exclude(h[1])]
+
+        if max_mi is not None:
+            return keep(self.within(lat, lon, max_mi))[:k]
+        # No cap: widen the circle until it holds k points. Everything inside
+        # radius r has been seen, so once k are found they are the k nearest.
+        r = self.cell_deg * MI_PER_DEG
+        limit = math.pi * geodesy.EARTH_RADIUS_MI
+        while True:
+            hits = keep(self.within(lat, lon, r))
+            if len(hits) >= k or r >= limit:
+                return hits[:k]
+            r *= 2
+
+
+class BoxIndex:
+    """Grid index over lat/lon bounding boxes, for "what intersects this
+    envelope" queries (e.g. trail features harvested once per state, then
+    looked up per peak). Items come back in insertion order, each once.
+    Longitudes are not wrapped; boxes are expected not to span ±180.
+    """
+
+    def __init__(self, cell_deg=0.1):
+        self.cell_deg = cell_deg
+        self._cells = {}  # (row, col) -> [seq]
+        self._items = []  # seq -> (south, west, north, east, item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _span(self, south, west, north, east):
+        c = self.cell_deg
+        for row in range(math.floor(south / c), math.floor(north / c) + 1):
+            for col in range(math.floor(west / c), math.floor(east / c) + 1):
+                yield row, col
+
+    def add(self, south, west, north, east, item):
+        seq = len(self._items)
+        self._items.append((south, west, north, east, item))
+        for cell in self._span(south, west, north, east):
+            self._cells.setdefault(cell, []).append(seq)
+
+    def intersecting(self, south, west, north, east):
+        """Items whose box overlaps the envelope."""
+        seen = set()
+        for cell in self._span(south, west, north, east):
+            seen.update(self._cells.get(cell, ()))
+        out = []
+        for seq in sorted(seen):
+            s, w, n, e, item = self._items[seq]
+            if s <= north and n >= south and w <= east and e >= west:
+                out.append(item)
+        return out
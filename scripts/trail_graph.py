@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Trail-network graph: stitch a trail's GIS segments into one continuous route.
+
+GIS services return a trail as many independent polylines, often disjoint
+(parallel spurs, far-apart pieces sharing a name). Naively concatenating them
+draws long straight jumps across the map. The old stitcher chained greedily —
+every attach step rescanned all remaining segments x 2 ends x 2 orientations,
+O(s²) per trail — and it ran for every name group in pick_trail and again for
+each full-geometry refetch. A trail with hundreds of segments was slow.
+
+TrailGraph builds the network once instead:
+
+  nodes      segment endpoints, snapped together when within JOIN_GAP_MI of
+             each other (found through a spatial_index.PointIndex, so
+             snapping is near-linear)
+  edges      one per segment, weighted by its length
+  route      the longest walk that uses each segment at most once, over all
+             connected components. Pieces that don't connect are dropped,
+             as before, and a loop trail comes back as the whole loop.
+
+A chain or a loop — at most two odd-degree junctions — has a walk through
+every segment, found directly (Hierholzer's algorithm). Networks with spurs
+are searched exhaustively, longest segments first; on a pathological mesh the
+search stops after MAX_SEARCH_STEPS and keeps the longest walk found so far.
+"""
+
+import geodesy
+from spatial_index import PointIndex
+
+JOIN_GAP_MI = 0.12  # segments whose endpoints are farther apart than this
+                    # are disconnected pieces, not a continuation
+MAX_SEARCH_STEPS = 50000
+
+
+def segments(features):
+    """[lat, lon] polylines from normalized features ({order, lines}), in
+    milepost order, coordinates rounded to 5 places."""
+    segs = []
+    for f in sorted(features, key=lambda f: f.get("order") or 0):
+        for line in f.get("lines", []):
+            pts = [[round(lat, 5), round(lon, 5)] for lon, lat in line]
+            if len(pts) >= 2:
+                segs.append(pts)
+    return segs
+
+
+class TrailGraph:
+    def __init__(self, segs, join_gap_mi=JOIN_GAP_MI):
+        # Longest first, so equal-length walks prefer the main stem.
+        order = sorted(((geodesy.path_length_mi(s), i) for i, s in enumerate(segs)),
+                       key=lambda t: -t[0])
+        self.segs = [segs[i] for _, i in order]
+        self.lengths = [length for length, _ in order]
+        ends = [s[0] for s in self.segs] + [s[-1] for s in self.segs]
+        self._node_of = _snap(ends, join_gap_mi)
+        n = len(self.segs)
+        self.edges = [(self._node_of[i], self._node_of[n + i]) for i in range(n)]
+        self.adj = {}  # node -> [(edge, forward, other_node)]
+        for e, (a, b) in enumerate(self.edges):
+            self.adj.setdefault(a, []).append((e, True, b))
+            if a != b:
+                self.adj.setdefault(b, []).append((e, False, a))
+
+    def components(self):
+        """Lists of edge indices, one per connected component."""
+        seen, out = set(), []
+        for start in self.adj:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack, comp = [start], set()
+            while stack:
+                node = stack.pop()
+                for e, _, other in self.adj[node]:
+                    comp.add(e)
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            out.append(sorted(comp))
+        return out
+
+    def degree(self, node):
+        return sum(2 if self.edges[e][0] == self.edges[e][1] else 1
+                   for e, _, _ in self.adj[node])
+
+    def longest_walk(self, comp):
+        """(length_mi, [(edge, forward)]) of the longest walk in one
+        component that uses no edge twice."""
+        total = sum(self.lengths[e] for e in comp)
+        nodes = sorted({n for e in comp for n in self.edges[e]})
+        odd = [n for n in nodes if self.degree(n) % 2]
+        if len(odd) <= 2:
+            # A chain or a loop (the usual case): an Euler walk uses every
+            # segment, found in linear time.
+            return total, self._euler_walk(odd[0] if odd else nodes[0])
+        # A longest walk starts at a dead end or odd junction, so those are
+        # tried first.
+        nodes.sort(key=lambda n: self.degree(n) % 2 == 0)
+        best = (0.0, [])
+        steps = 0
+        for start in nodes:
+            used, walk = set(), []
+            length = 0.0
+            stack = [iter(self.adj[start])]
+            while stack:
+                steps += 1
+                if steps > MAX_SEARCH_STEPS:
+                    return best
+                nxt = None
+                for e, fwd, other in stack[-1]:
+                    if e not in used:
+                        nxt = (e, fwd, other)
+                        break
+                if nxt is None:
+                    stack.pop()
+                    if walk:
+                        e, _ = walk.pop()
+                        used.discard(e)
+                        length -= self.lengths[e]
+                    continue
+                e, fwd, other = nxt
+                used.add(e)
+                walk.append((e, fwd))
+                length += self.lengths[e]
+                if length > best[0] + 1e-12:
+                    best = (length, list(walk))
+                    if length >= total - 1e-12:
+                        return best  # every edge used: nothing can be longer
+                stack.append(iter(self.adj[other]))
+        return best
+
+    def _euler_walk(self, start):
+        """Hierholzer's algorithm: [(edge, forward)] using every edge of
+        start's component once."""
+        used, nxt = set(), {}
+        stack, out = [(start, None)], []
+        while stack:
+            node, via = stack[-1]
+            adj = self.adj[node]
+            i = nxt.get(node, 0)
+            while i < len(adj) and adj[i][0] in used:
+                i += 1
+            nxt[node] = i
+            if i == len(adj):
+                stack.pop()
+                if via is not None:
+                    out.append(via)
+            else:
+                e, fwd, other = adj[i]
+                used.add(e)
+                stack.append((other, (e, fwd)))
+        out.reverse()
+        return out
+
+    def route(self):
+        """The longest continuous [lat, lon] path through the network."""
+        best = (0.0, [])
+        for comp in self.components():
+            cand = self.longest_walk(comp)
+            if cand[0] > best[0]:
+                best = cand
+        chain = []
+        for e, fwd in best[1]:
+            s = self.segs[e]
+            chain.extend(s if fwd else reversed(s))
+        if not chain:
+            return []
+        # de-dup consecutive identical points
+        path = [chain[0]]
+        for p in chain[1:]:
+            if p != path[-1]:
+                path.append(p)
+        return path
+
+
+def _snap(points, gap_mi):
+    """Node id per point: points within gap_mi of each other (transitively)
+    share one."""
+    parent = list(range(len(points)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = PointIndex(cell_deg=0.01)
+    for i, p in enumerate(points):
+        index.add(p[0], p[1], i)
+    for i, p in enumerate(points):
+        for _, j in index.within(p[0], p[1], gap_mi):
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+    return [find(i) for i in range(len(points))]
+
+
+def assemble(features, join_gap_mi=JOIN_GAP_MI):
+    """Stitch a trail's features into one CONTINUOUS [lat, lon] path — the
+    longest run a hiker can actually walk."""
+    segs = segments(features)
+    if not segs:
+        return []
+    return TrailGraph(segs, join_gap_mi).route()
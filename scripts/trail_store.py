@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Single-parse trail-record store shared by every stage of a pipeline run.
+
+Before this, each stage of run-pipeline.py (GPX apply, synthetic GPS, nearby
+peaks, descriptions, SEO, link check, live/draft count, audit) re-read and
+re-parsed every file in the state, and every stage that changed a record
+rewrote it immediately — O(stages x files) parses and writes over the same
+data tree.
+
+The store parses each state directory once and hands the same record dicts to
+every stage. Stages mutate records in place and report what they changed; the
+caller marks those paths dirty, and one flush at the end of the state writes
+back only the dirty records, in the repo's canonical layout (indent=2 plus a
+trailing newline).
+
+Files that fail to parse are never handed out as records — they are listed
+by invalid() so the audit can still report them as "Invalid JSON".
+
+With compact_paths=True every route's geo.path is held as a
+geodesy.PathArray rather than a list of [lat, lon, ele] lists, which cuts a
+loaded state's memory several-fold; dump() writes it back unchanged.
+"""
+
+import json
+from pathlib import Path
+
+from geodesy import PathArray
+
+
+def _encode(o):
+    if isinstance(o, PathArray):
+        return o.to_json()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dump(record):
+    """Canonical on-disk JSON for a trail record."""
+    return json.dumps(record, indent=2, default=_encode) + "\n"
+
+
+def compact_paths(record):
+    """Swap each route's geo.path list for a PathArray, in place."""
+    for t in record.get("trails") or []:
+        geo = t.get("geo") if isinstance(t, dict) else None
+        if isinstance(geo, dict) and isinstance(geo.get("path"), list):
+            try:
+                geo["path"] = PathArray(geo["path"])
+            except (TypeError, ValueError):
+                continue  # malformed points: leave as-is for the audit to flag
+    return record
+
+
+class TrailStore:
+    def __init__(self, data_dir, compact_paths=False):
+        self.data_dir = Path(data_dir)
+        self.compact_paths = compact_paths
+        self._states = {}   # state slug -> {path: record} parsed so far
+        self._invalid = {}  # state slug -> [path] that failed to parse
+        self._owner = {}    # path -> state slug
+        self._dirty = set()
+        self._complete = set()  # states whose whole directory has been read
+        self._slugs = {}    # state slug -> {(state_slug, slug)} for link checks
+
+    def _parse(self, state, path):
+        """Parse one file into the state's records; False if invalid JSON."""
+        try:
+            record = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            if path not in self._invalid.setdefault(state, []):
+                self._invalid[state].append(path)
+            return False
+        if self.compact_paths and isinstance(record, dict):
+            compact_paths(record)
+        self._states.setdefault(state, {})[path] = record
+        self._owner[path] = state
+        return True
+
+    def records(self, state, only=None):
+        """(path, record) pairs for a state, sorted by filename. Parsed once.
+
+        With `only` (an iterable of paths), just those files are parsed and
+        returned — an incremental run touches only the records it must.
+        """
+        loaded = self._states.setdefault(state, {})
+        if only is not None:
+            paths = sorted(Path(p) for p in only)
+        else:
+            self._complete.add(state)
+            paths = sorted((self.data_dir / state).glob("*.json"))
+        out = []
+        for path in paths:
+            if path not in loaded and path not in self._invalid.get(state, []):
+                self._parse(state, path)
+            if path in loaded:
+                out.append((path, loaded[path]))
+        return out
+
+    def invalid(self, state):
+        """Files in the state that are not valid JSON (among those parsed)."""
+        if state not in self._complete:
+            self.records(state)
+        return list(self._invalid.get(state, []))
+
+    def mark_dirty(self, path):
+        """Record that a stage changed this record; flush() will write it."""
+        path = Path(path)
+        if path not in self._owner:
+            raise KeyError(f"not a loaded trail record: {path}")
+        self._dirty.add(path)
+
+    def dirty(self, state):
+        """Paths in the state that a stage has changed since the last flush."""
+        return sorted(p for p in self._dirty if self._owner.get(p) == state)
+
+    def reload(self, path):
+        """Re-read one record after something outside the store rewrote it
+        (e.g. a stage that still runs as a subprocess)."""
+        path = Path(path)
+        state = self._owner.get(path)
+        if state is None:
+            return None
+        record = json.loads(path.read_text())
+        if self.compact_paths and isinstance(record, dict):
+            compact_paths(record)
+        self._states[state][path] = record
+        self._dirty.discard(path)
+        return record
+
+    def flush(self, state=None):
+        """Write back dirty records (one state, or all). Returns paths written."""
+        written = []
+        for path in sorted(self._dirty):
+            owner = self._owner[path]
+            if state is not None and owner != state:
+                continue
+            path.write_text(dump(self._states[owner][path]))
+            written.append(path)
+        self._dirty.difference_update(written)
+        return written
+
+    def release(self, state):
+        """Drop a state's parsed records (after flush) to bound memory."""
+        pending = self.dirty(state)
+        if pending:
+            raise RuntimeError(f"{len(pending)} unflushed record(s) in {state}")
+        for path in self._states.pop(state, {}):
+            self._owner.pop(path, None)
+        self._invalid.pop(state, None)
+        self._complete.discard(state)
+
+    def seed_index(self, slugs_by_state):
+        """Pre-fill the link index, e.g. from a manifest that already knows
+        every file's slug, so index() does not have to parse other states."""
+        for state, slugs in slugs_by_state.items():
+            self._slugs[state] = set(slugs)
+
+    def index(self, states):
+        """Set of (state_slug, slug) for every parseable trail in `states`.
+
+        Loaded states answer from memory; others are parsed once for their
+        slugs only (not retained as records) and cached for the whole run.
+        """
+        out = set()
+        for state in states:
+            slugs = self._slugs.get(state)
+            if slugs is None:
+                slugs = set()
+                if state in self._complete:
+                    pairs = self._states[state].items()
+                else:
+                    pairs = []
+                    for f in (self.data_dir / state).glob("*.json"):
+                        try:
+                            pairs.append((f, json.loads(f.read_text())))
+                        except json.JSONDecodeError:
+                            continue
+                for f, d in pairs:
+                    slugs.add((d.get("state_slug", state), d.get("slug", f.stem)))
+                self._slugs[state] = slugs
+            out |= slugs
+        return out
@@ -8,26 +8,49 @@ Checks:
 - Has elevation data
 - Reasonable distance
 - GPS point density
+
+The file is streamed (gpx_stream.py), so large tracks validate in flat memory.
 """
 
 import sys
 import xml.etree.ElementTree as ET
-import math
-
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two GPS points in miles"""
-    R = 3959
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import geodesy  # noqa: E402
+import gpx_stream  # noqa: E402
+
+
+def density_quality(points_per_mile):
+    """EXCELLENT / GOOD / FAIR / POOR for a track's GPS density"""
+    if points_per_mile >= 50:
+        return "EXCELLENT"
+    if points_per_mile >= 15:
+        return "GOOD"
+    if points_per_mile >= 8:
+        return "FAIR"
+    return "POOR"
+
+
+def gpx_issues(points, with_elevation, distance_mi):
+    """(usable, issues) from a track's raw figures: the checks
+    validate_gpx() prints, for callers that report them instead"""
+    if not points:
+        return False, ["no GPS points (no tracks or routes)"]
+    issues = []
+    elevation_percent = with_elevation / points * 100
+    if elevation_percent < 50:
+        issues.append(f"missing elevation ({elevation_percent:.0f}% of points)")
+    elif elevation_percent < 95:
+        issues.append(f"partial elevation ({elevation_percent:.0f}% of points)")
+    if distance_mi <= 0:
+        return False, issues + ["cannot calculate distance (points too close)"]
+    points_per_mile = points / distance_mi
+    quality = density_quality(points_per_mile)
+    if quality in ("FAIR", "POOR"):
+        issues.append(f"{quality.lower()} GPS density ({points_per_mile:.1f} points/mile)")
+    return quality != "POOR", issues
 
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
 
 def validate_gpx(gpx_file):
     """Validate a GPX file"""
@@ -35,87 +58,45 @@ def validate_gpx(gpx_file):
     print("=" * 60)
 
     try:
-        tree = ET.parse(gpx_file)
-        root = tree.getroot()
-
-        # Check namespace
-        ns = {'gpx': 'http://www.topografix.com/GPX/1/1'}
-
-        # Try old GPX 1.0 namespace
-        if not root.findall('.//gpx:trk', ns):
-            ns = {'gpx': 'http://www.topografix.com/GPX/1/0'}
+        # Stream the points (GPX 1.0 or 1.1): counts and distance are
+        # accumulated as they are read, so file size doesn't matter
+        count = has_elevation = 0
+        total_distance = 0.0
+        prev = None
+        for lat, lon, ele in gpx_stream.iter_points(gpx_file):
+            count += 1
+            if ele is not None:
+                has_elevation += 1
+            if prev is not None:
+                total_distance += geodesy.distance_mi(prev[0], prev[1], lat, lon)
+            prev = (lat, lon)
 
         print("✅ Valid XML format")
 
-        # Count points
-        points = []
-
-        # Check tracks
-        for trk in root.findall('.//gpx:trk', ns):
-            for seg in trk.findall('.//gpx:trkseg', ns):
-                for pt in seg.findall('.//gpx:trkpt', ns):
-                    lat = float(pt.get('lat'))
-                    lon = float(pt.get('lon'))
-                    ele_elem = pt.find('gpx:ele', ns)
-                    ele = float(ele_elem.text) if ele_elem is not None else None
-
-                    points.append({'lat': lat, 'lon': lon, 'ele': ele})
-
-        # Check routes if no tracks
-        if not points:
-            for rte in root.findall('.//gpx:rte', ns):
-                for pt in rte.findall('.//gpx:rtept', ns):
-                    lat = float(pt.get('lat'))
-                    lon = float(pt.get('lon'))
-                    ele_elem = pt.find('gpx:ele', ns)
-                    ele = float(ele_elem.text) if ele_elem is not None else None
-
-                    points.append({'lat': lat, 'lon': lon, 'ele': ele})
-
-        if not points:
+        if not count:
             print("❌ No GPS points found (no tracks or routes)")
             return False
 
-        print(f"✅ Found {len(points)} GPS points")
+        print(f"✅ Found {count} GPS points")
 
         # Check elevation data
-        has_elevation = sum(1 for p in points if p['ele'] is not None)
-        elevation_percent = (has_elevation / len(points)) * 100
+        elevation_percent = (has_elevation / count) * 100
 
         if elevation_percent >= 95:
-            print(f"✅ Has elevation data ({has_elevation}/{len(points)} points = {elevation_percent:.0f}%)")
+            print(f"✅ Has elevation data ({has_elevation}/{count} points = {elevation_percent:.0f}%)")
         elif elevation_percent >= 50:
-            print(f"⚠️  Partial elevation data ({has_elevation}/{len(points)} points = {elevation_percent:.0f}%)")
+            print(f"⚠️  Partial elevation data ({has_elevation}/{count} points = {elevation_percent:.0f}%)")
         else:
-            print(f"❌ Missing elevation data ({has_elevation}/{len(points)} points = {elevation_percent:.0f}%)")
-
-        # Calculate distance
-        total_distance = 0
-        for i in range(1, len(points)):
-            dist = haversine_distance(
-                points[i-1]['lat'], points[i-1]['lon'],
-                points[i]['lat'], points[i]['lon']
-            )
-            total_distance += dist
+            print(f"❌ Missing elevation data ({has_elevation}/{count} points = {elevation_percent:.0f}%)")
 
         print(f"📏 Trail distance: {total_distance:.1f} miles")
 
         # Check GPS density
         if total_distance > 0:
-            points_per_mile = len(points) / total_distance
-
-            if points_per_mile >= 50:
-                quality = "EXCELLENT"
-                emoji = "🌟"
-            elif points_per_mile >= 15:
-                quality = "GOOD"
-                emoji = "✅"
-            elif points_per_mile >= 8:
-                quality = "FAIR"
-                emoji = "⚠️ "
-            else:
-                quality = "POOR"
-                emoji = "❌"
+            points_per_mile = count / total_distance
+
+            quality = density_quality(points_per_mile)
+            emoji = {"EXCELLENT": "🌟", "GOOD": "✅", "FAIR": "⚠️ ", "POOR": "❌"}[quality]
 
             print(f"{emoji} GPS density: {points_per_mile:.1f} points/mile ({quality})")
 